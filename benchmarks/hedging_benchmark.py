@@ -0,0 +1,57 @@
+"""Compare model-call tail latency with and without hedging, using the fake model.
+
+Usage: python benchmarks/hedging_benchmark.py [--calls 400] [--concurrency 8]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_model import FakeModel
+from hedging import HedgedModelCaller
+
+
+def run(enabled, args):
+    model = FakeModel(median_ms=args.median_ms, tail_ms=args.tail_ms,
+                      tail_probability=args.tail_probability, seed=args.seed)
+    caller = HedgedModelCaller(enabled=enabled, max_hedge_ratio=args.max_hedge_ratio)
+    prompt = "User: benchmark"
+
+    def one_call(_):
+        return caller.call(lambda cancel: model.generate_content(prompt).text, timeout=10)
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(one_call, range(args.calls)))
+    elapsed = time.perf_counter() - start
+
+    stats = caller.stats()
+    stats["upstream_calls"] = model.calls
+    stats["elapsed_s"] = round(elapsed, 2)
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--median-ms", type=float, default=100)
+    parser.add_argument("--tail-ms", type=float, default=1500)
+    parser.add_argument("--tail-probability", type=float, default=0.05)
+    parser.add_argument("--max-hedge-ratio", type=float, default=0.1)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for label, enabled in (("baseline", False), ("hedged", True)):
+        stats = run(enabled, args)
+        latency = stats["latency_ms"]
+        print(f"{label:>8}: p50={latency['p50']:7.1f}ms  p95={latency['p95']:7.1f}ms  "
+              f"p99={latency['p99']:7.1f}ms  hedge_rate={stats['hedge_rate']:.3f}  "
+              f"upstream_calls={stats['upstream_calls']}  elapsed={stats['elapsed_s']}s")
+
+
+if __name__ == "__main__":
+    main()
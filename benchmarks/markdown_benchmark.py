@@ -0,0 +1,100 @@
+"""Time message-bubble markup rendering on long LLM-style replies.
+
+Generates replies with paragraphs, **bold**, *italic*, `code`, links and
+fenced code blocks, then renders each one with the old chain of re.sub passes
+(which escaped nothing and knew no code), with markdown_render uncached, and
+through its cache once warm (the same messages laid out again, as happens on
+every resize and theme switch).
+
+Usage:
+    python benchmarks/markdown_benchmark.py [--messages 500] [--paragraphs 12] [--passes 5]
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from markdown_render import render_html
+
+WORDS = ("the model returns a response with several tokens and the request "
+         "queue keeps order while each reply is rendered into its bubble").split()
+
+
+def legacy_render(message):
+    # The renderer this replaced: uncompiled passes, no escaping, no code
+    message = re.sub(r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+',
+                     r'<a href="\g<0>">\g<0></a>', message)
+    message = message.replace('\n', '<br>')
+    message = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', message)
+    message = re.sub(r'\*(.*?)\*', r'<i>\1</i>', message)
+    return message
+
+
+def make_sentence(rng):
+    words = rng.choices(WORDS, k=rng.randint(8, 20))
+    roll = rng.random()
+    position = rng.randrange(len(words))
+    if roll < 0.2:
+        words[position] = f"**{words[position]}**"
+    elif roll < 0.35:
+        words[position] = f"*{words[position]}*"
+    elif roll < 0.55:
+        words[position] = f"`{words[position]}()`"
+    elif roll < 0.65:
+        words[position] = f"https://example.com/docs/{words[position]}?page={rng.randint(1, 99)}"
+    return " ".join(words).capitalize() + "."
+
+
+def make_reply(paragraphs, rng):
+    blocks = []
+    for _ in range(paragraphs):
+        if rng.random() < 0.2:
+            lines = [f"    result = handle_{rng.choice(WORDS)}(value < {rng.randint(1, 9)})"
+                     for _ in range(rng.randint(3, 10))]
+            blocks.append("```python\n" + "\n".join(lines) + "\n```")
+        else:
+            blocks.append(" ".join(make_sentence(rng) for _ in range(rng.randint(2, 5))))
+    return "\n\n".join(blocks)
+
+
+def timed(render, messages, passes):
+    start = time.perf_counter()
+    for _ in range(passes):
+        for message in messages:
+            render(message)
+    return (time.perf_counter() - start) / (passes * len(messages)) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--paragraphs", type=int, default=12, help="Paragraphs or code blocks per reply")
+    parser.add_argument("--passes", type=int, default=5, help="Times the whole transcript is rendered")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    messages = [make_reply(args.paragraphs, rng) for _ in range(args.messages)]
+    average = sum(map(len, messages)) / len(messages)
+    print(f"{len(messages)} replies, {average:,.0f} characters on average")
+
+    results = [
+        ("legacy re.sub passes", timed(legacy_render, messages, args.passes)),
+        ("single pass, uncached", timed(render_html.__wrapped__, messages, args.passes)),
+    ]
+    render_html.cache_clear()
+    timed(render_html, messages, 1)
+    # All hits, unless the transcript outgrows the cache
+    results.append(("single pass, relayout", timed(render_html, messages, args.passes)))
+    for name, micros in results:
+        print(f"  {name:<24} {micros:8.1f} us/message")
+    info = render_html.cache_info()
+    print(f"  cache: {info.hits} hits, {info.misses} misses, {info.currsize}/{info.maxsize} entries")
+
+
+if __name__ == "__main__":
+    main()
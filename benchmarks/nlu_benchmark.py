@@ -0,0 +1,72 @@
+"""Measure NLU throughput inline versus the micro-batching process pool.
+
+Concurrent client threads call analyze() the way concurrent /chat requests do.
+The pool runs with 1, 2, 4, ... workers up to the core count, so you can see
+how throughput scales.
+
+Usage: python benchmarks/nlu_benchmark.py [--messages 2000] [--clients 32] [--model en_core_web_sm]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SAMPLE_MESSAGES = [
+    "What's the weather like in Paris today?",
+    "Tell me a joke about computers",
+    "What time is it in Tokyo right now?",
+    "Can you help me plan a trip to New York next March?",
+    "I met Sarah Johnson from Google at the conference in Berlin.",
+    "thanks!",
+    "How do I bake sourdough bread at home without a dutch oven?",
+    "Explain the difference between Apple and Microsoft in two sentences.",
+]
+
+
+def measure(analyze, messages, clients):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=clients) as pool:
+        list(pool.map(analyze, messages))
+    elapsed = time.perf_counter() - start
+    return len(messages) / elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=2000)
+    parser.add_argument("--clients", type=int, default=32, help="Concurrent calling threads")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--max-wait-ms", type=float, default=5)
+    parser.add_argument("--model", default=os.getenv("SPACY_MODEL", "en_core_web_sm"))
+    args = parser.parse_args()
+
+    os.environ["SPACY_MODEL"] = args.model
+    import nlu
+    from nlu_pool import NLUBatcher
+
+    if nlu.nlp is None:
+        sys.exit(f"spaCy model '{args.model}' is not installed; run: python -m spacy download {args.model}")
+
+    messages = [SAMPLE_MESSAGES[i % len(SAMPLE_MESSAGES)] for i in range(args.messages)]
+    print(f"{args.messages} messages, {args.clients} client threads, model {args.model}, {os.cpu_count()} cores")
+
+    inline = measure(nlu.analyze_message, messages, args.clients)
+    print(f"{'inline (GIL)':>16}: {inline:9.1f} msg/s")
+
+    workers = 1
+    while workers <= max(1, os.cpu_count() or 1):
+        batcher = NLUBatcher(workers=workers, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+        batcher.analyze(messages[0])  # start the pool outside the timed run
+        throughput = measure(batcher.analyze, messages, args.clients)
+        stats = batcher.stats()
+        print(f"{f'pool x{workers}':>16}: {throughput:9.1f} msg/s  ({throughput / inline:.2f}x inline, "
+              f"avg batch {stats['avg_batch_size']})")
+        batcher.pool.shutdown()
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
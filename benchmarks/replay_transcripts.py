@@ -0,0 +1,188 @@
+"""Replay saved GUI transcripts against the backend and report performance.
+
+Each chat_*.json file written by the GUI's Save Chat is one session. Its user
+turns are sent in their original order, while many sessions run concurrently.
+By default the backend runs in-process on the fake model. Use --url to replay
+against a running server instead.
+
+Usage:
+    python benchmarks/replay_transcripts.py DIR [--concurrency 16] [--url http://127.0.0.1:5003/chat]
+"""
+import argparse
+import difflib
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+def load_sessions(directory):
+    # Each file becomes (name, [(user message, recorded reply or None), ...])
+    sessions = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.json"))):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Skipping {path}: {e}", file=sys.stderr)
+            continue
+
+        messages = data.get("messages", []) if isinstance(data, dict) else data
+        turns = []
+        for index, msg in enumerate(messages):
+            if not msg.get("is_user"):
+                continue
+            following = messages[index + 1] if index + 1 < len(messages) else None
+            recorded = None
+            if following and not following.get("is_user") and not following.get("is_error"):
+                recorded = following.get("message")
+            turns.append((msg.get("message", ""), recorded))
+        if turns:
+            sessions.append((os.path.basename(path), turns))
+    return sessions
+
+
+class HttpBackend:
+    def __init__(self, url):
+        import requests
+        self.url = url
+        self.local = threading.local()
+        self.requests = requests
+
+    def send(self, message, session_id):
+        # One connection-pooled HTTP session per worker thread
+        if not hasattr(self.local, "session"):
+            self.local.session = self.requests.Session()
+        response = self.local.session.post(
+            self.url, json={"message": message}, headers={"X-Session-ID": session_id}, timeout=60
+        )
+        return response.status_code, response.json()
+
+
+class InProcessBackend:
+    def __init__(self):
+        # Configure before import: chatbot reads these at import time
+        os.environ.setdefault("FAKE_MODEL", "true")
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        import chatbot
+        self.app = chatbot.app
+
+    def send(self, message, session_id):
+        response = self.app.test_client().post(
+            "/chat", json={"message": message}, headers={"X-Session-ID": session_id}
+        )
+        return response.status_code, response.get_json()
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def replay(backend, sessions, concurrency, run_id, divergence_threshold):
+    results = []
+    results_lock = threading.Lock()
+
+    def replay_session(session):
+        name, turns = session
+        session_id = f"replay-{run_id}-{name}"
+        for message, recorded in turns:
+            start = time.perf_counter()
+            try:
+                status, body = backend.send(message, session_id)
+                reply = (body or {}).get("reply", "")
+            except Exception as e:
+                status, body, reply = None, None, ""
+                print(f"{name}: request failed: {e}", file=sys.stderr)
+            latency = time.perf_counter() - start
+
+            similarity = None
+            if recorded is not None:
+                similarity = difflib.SequenceMatcher(None, recorded, reply).ratio()
+            with results_lock:
+                results.append({
+                    "latency": latency,
+                    "status": status,
+                    "degraded": bool((body or {}).get("degraded")),
+                    "similarity": similarity,
+                })
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(replay_session, sessions))
+    elapsed = time.perf_counter() - start
+
+    latencies = sorted(r["latency"] * 1000 for r in results)
+    compared = [r["similarity"] for r in results if r["similarity"] is not None]
+    statuses = {}
+    for r in results:
+        statuses[str(r["status"])] = statuses.get(str(r["status"]), 0) + 1
+
+    return {
+        "sessions": len(sessions),
+        "turns": len(results),
+        "elapsed_s": round(elapsed, 2),
+        "throughput_rps": round(len(results) / elapsed, 1) if elapsed else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, fraction), 1)
+            for name, fraction in (("p50", 0.50), ("p90", 0.90), ("p95", 0.95), ("p99", 0.99))
+        },
+        "latency_ms_max": round(latencies[-1], 1) if latencies else 0.0,
+        "statuses": statuses,
+        "degraded": sum(1 for r in results if r["degraded"]),
+        "divergence": {
+            "compared": len(compared),
+            "mean_similarity": round(sum(compared) / len(compared), 3) if compared else None,
+            "exact_matches": sum(1 for s in compared if s == 1.0),
+            "diverged": sum(1 for s in compared if s < divergence_threshold),
+            "threshold": divergence_threshold,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay saved GUI transcripts against the backend.")
+    parser.add_argument("directory", help="Folder of chat_*.json transcripts")
+    parser.add_argument("--url", help="Replay against a running server instead of in-process")
+    parser.add_argument("--concurrency", type=int, default=16, help="Sessions replayed at once")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay every transcript this many times")
+    parser.add_argument("--divergence-threshold", type=float, default=0.6,
+                        help="Replies less similar than this to the recorded reply count as diverged")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    sessions = load_sessions(args.directory)
+    if not sessions:
+        parser.error(f"no transcripts with user turns found in {args.directory}")
+    # Repeats get their own session ids so each copy keeps its turn order
+    sessions = [(f"{name}#{run}", turns) for run in range(args.repeat) for name, turns in sessions]
+
+    backend = HttpBackend(args.url) if args.url else InProcessBackend()
+    report = replay(backend, sessions, args.concurrency, int(time.time()), args.divergence_threshold)
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+        return
+
+    latency = report["latency_ms"]
+    divergence = report["divergence"]
+    print(f"Sessions: {report['sessions']}  Turns: {report['turns']}  Elapsed: {report['elapsed_s']}s  "
+          f"Throughput: {report['throughput_rps']} turns/s")
+    print(f"Latency: p50={latency['p50']}ms p90={latency['p90']}ms p95={latency['p95']}ms "
+          f"p99={latency['p99']}ms max={report['latency_ms_max']}ms")
+    print(f"Statuses: {report['statuses']}  Degraded: {report['degraded']}")
+    if divergence["compared"]:
+        print(f"Divergence: {divergence['diverged']}/{divergence['compared']} below {divergence['threshold']} "
+              f"(mean similarity {divergence['mean_similarity']}, exact {divergence['exact_matches']})")
+
+
+if __name__ == "__main__":
+    main()
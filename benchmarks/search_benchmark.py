@@ -0,0 +1,99 @@
+"""Measure search-as-you-type latency of the message search index.
+
+Indexes N synthetic messages (Zipf-distributed vocabulary, like real chat),
+then replays queries the way the search box issues them: one search per
+keystroke while typing one to three words taken from a random message. Also
+reports index build time and the size and load time of the saved index.
+
+Usage:
+    python benchmarks/search_benchmark.py [--messages 1000000] [--queries 200] [--files 100]
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search_index import SearchIndex
+
+
+def make_vocabulary(size, rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < size:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(2, 10))))
+    return sorted(words, key=lambda _: rng.random())
+
+
+def make_messages(count, vocabulary, rng):
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]
+    words = rng.choices(vocabulary, weights, k=count * 12)
+    messages, position = [], 0
+    for _ in range(count):
+        length = rng.randint(3, 21)
+        messages.append(" ".join(words[position:position + length]))
+        position += length
+        if position > len(words) - 21:
+            position = 0
+    return messages
+
+
+def keystrokes(query):
+    return [query[:end] for end in range(1, len(query) + 1)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=200, help="Queries typed, one search per keystroke")
+    parser.add_argument("--files", type=int, default=100, help="Transcript files the messages are spread over")
+    parser.add_argument("--vocabulary", type=int, default=50_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    vocabulary = make_vocabulary(args.vocabulary, rng)
+    messages = make_messages(args.messages, vocabulary, rng)
+
+    index = SearchIndex()
+    start = time.perf_counter()
+    per_file = -(-len(messages) // args.files)
+    for number in range(args.files):
+        index.index_source(f"chat_{number}.json", messages[number * per_file:(number + 1) * per_file])
+    build = time.perf_counter() - start
+    print(f"Indexed {len(index):,} messages ({index.stats()['tokens']:,} tokens) in {build:.1f}s")
+
+    timings, hits = [], []
+    for _ in range(args.queries):
+        words = rng.choice(messages).split()
+        query = " ".join(rng.sample(words, min(len(words), rng.randint(1, 3))))
+        for typed in keystrokes(query):
+            start = time.perf_counter()
+            results = index.search(typed)
+            timings.append((time.perf_counter() - start) * 1000)
+        hits.append(len(results))
+
+    timings.sort()
+    print(f"{len(timings)} keystroke searches: "
+          f"p50 {statistics.median(timings):.2f}ms  "
+          f"p99 {timings[int(len(timings) * 0.99)]:.2f}ms  "
+          f"max {timings[-1]:.2f}ms  "
+          f"(full queries found a median of {statistics.median(hits):.0f} results)")
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "search.idx")
+        start = time.perf_counter()
+        index.save(path)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        SearchIndex.load(path)
+        loaded = time.perf_counter() - start
+        print(f"Saved index: {os.path.getsize(path) / 2**20:.1f} MiB in {saved:.1f}s, loaded in {loaded:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
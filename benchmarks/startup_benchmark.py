@@ -0,0 +1,73 @@
+"""Measure GUI startup: time to the first painted frame and to an interactive window.
+
+Launches `ultra_gui.py --startup-profile` on Qt's offscreen platform, in a
+fresh working directory each time (no saved settings, sessions or search
+index), and reads the per-phase report it prints once the window is ready.
+Wall time is measured from process launch, so interpreter start-up and
+imports are included. No backend is needed; without one the window simply
+starts disconnected.
+
+Usage:
+    python benchmarks/startup_benchmark.py [--runs 5]
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PHASE = re.compile(r"^\s+(?P<phase>\S.*?)\s+(?P<ms>[\d.]+)\s+at\s+(?P<at>[\d.]+)$")
+
+
+def launch(timeout):
+    # (wall ms from launch to ready, {phase: (ms, ms since QApplication)})
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        process = subprocess.Popen(
+            [sys.executable, os.path.join(ROOT, "ultra_gui.py"), "--startup-profile"],
+            cwd=directory, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        phases = {}
+        try:
+            for line in process.stdout:
+                match = PHASE.match(line)
+                if match:
+                    phases[match["phase"]] = (float(match["ms"]), float(match["at"]))
+                    if match["phase"] == "ready":
+                        wall = (time.perf_counter() - start) * 1000
+                        break
+            else:
+                raise RuntimeError("ultra_gui.py exited without a startup profile")
+        finally:
+            process.kill()
+            process.wait(timeout)
+    return wall, phases
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+
+    runs = [launch(args.timeout) for _ in range(args.runs)]
+    walls = [wall for wall, _ in runs]
+    # Everything before QApplication: interpreter, imports, argument parsing
+    before_qt = [wall - phases["ready"][1] for wall, phases in runs]
+    first_paint = [before + phases["first paint"][1] for before, (_, phases) in zip(before_qt, runs)]
+
+    print(f"{args.runs} launches, medians:")
+    print(f"  {'interpreter and imports':<24} {statistics.median(before_qt):8.1f} ms")
+    for phase in runs[0][1]:
+        print(f"  {phase:<24} {statistics.median(phases[phase][0] for _, phases in runs):8.1f} ms")
+    print(f"First frame painted after {statistics.median(first_paint):.0f} ms, "
+          f"window interactive after {statistics.median(walls):.0f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Measure GUI theme-switch time with a long transcript.
+
+Builds the chat window offscreen, in a fresh working directory (so your saved
+settings and sessions are neither read nor touched), fills the transcript with
+N messages and times toggling between the dark and light themes, including the repaint. With
+--legacy it also times the old approach for comparison: one widget bubble
+with its own stylesheet per message, restyled through the window.
+
+Usage:
+    python benchmarks/theme_switch_benchmark.py [--messages 5000] [--switches 10] [--legacy]
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6.QtWidgets import QApplication, QFrame, QLabel, QVBoxLayout, QWidget, QScrollArea
+
+
+def sample_messages(count):
+    messages = []
+    for i in range(count):
+        is_user = i % 2 == 0
+        messages.append({
+            "sender": "You" if is_user else "Ultra AI",
+            "message": f"Message {i}: " + "some words in a chat message " * (1 + i % 5),
+            "timestamp": "12:00:00",
+            "is_user": is_user,
+            "is_error": i % 50 == 49,
+        })
+    return messages
+
+
+def time_switches(app, window, switch, switches):
+    # Seconds per switch, each until the window has repainted
+    timings = []
+    for _ in range(switches):
+        start = time.perf_counter()
+        switch()
+        window.repaint()
+        app.processEvents()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def run_engine(app, messages, switches):
+    import ultra_gui
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        # The window reads and writes settings and sessions in the cwd
+        os.chdir(directory)
+        try:
+            window = ultra_gui.UltraEnhancedChatbotGUI()
+            window.animation_clock.enabled = False
+            window.resize(1000, 800)
+            window.show()
+            window.transcript_model.append_messages(messages)
+            window.chat_view.scrollToBottom()
+            app.processEvents()
+            timings = time_switches(app, window, window.toggle_theme, switches)
+            # Stops the window's worker threads and flushes its journal
+            # while still inside the temporary directory
+            window.settings["save_on_exit"] = False
+            window.close()
+        finally:
+            os.chdir(cwd)
+    return timings
+
+
+def run_legacy(app, messages, switches):
+    # The pre-engine layout: a framed bubble with its own stylesheet per message
+    window = QScrollArea()
+    window.setWidgetResizable(True)
+    container = QWidget()
+    layout = QVBoxLayout(container)
+    for message in messages:
+        bubble = QFrame()
+        color = "#dc3545" if message["is_error"] else "#007acc" if message["is_user"] else "#28a745"
+        bubble.setStyleSheet(f"QFrame {{ background-color: {color}; border-radius: 15px; margin: 3px; }}"
+                             "QLabel { color: white; font-weight: 500; }")
+        bubble_layout = QVBoxLayout(bubble)
+        bubble_layout.addWidget(QLabel(message["message"]))
+        bubble_layout.addWidget(QLabel(f"{message['sender']} • {message['timestamp']}"))
+        layout.addWidget(bubble)
+    window.setWidget(container)
+    window.resize(1000, 800)
+    window.show()
+    app.processEvents()
+
+    themes = ["QScrollArea { background-color: #1e1e1e; } QFrame { border: 1px solid #404040; }",
+              "QScrollArea { background-color: #ffffff; } QFrame { border: 1px solid #dee2e6; }"]
+    state = {"index": 0}
+
+    def switch():
+        state["index"] ^= 1
+        window.setStyleSheet(themes[state["index"]])
+
+    return time_switches(app, window, switch, switches)
+
+
+def report(name, timings):
+    ms = sorted(t * 1000 for t in timings)
+    print(f"{name:<14} median {statistics.median(ms):8.1f} ms   max {ms[-1]:8.1f} ms   ({len(ms)} switches)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Time theme switches with a long transcript.")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--switches", type=int, default=10)
+    parser.add_argument("--legacy", action="store_true", help="Also time per-widget stylesheets")
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+    messages = sample_messages(args.messages)
+    print(f"Theme switches with {args.messages} messages")
+    report("theme engine", run_engine(app, messages, args.switches))
+    if args.legacy:
+        report("per-widget", run_legacy(app, messages, args.switches))
+
+
+if __name__ == "__main__":
+    main()
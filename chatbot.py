@@ -1,24 +1,56 @@
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, g, make_response
 from dotenv import load_dotenv
 import os
+import functools
 import logging
+import json
 import google.generativeai as genai
-from memory import ConversationMemory
+from log_config import setup_logging, logging_stats
+
+# Configure logging before the modules below log anything at import time
+load_dotenv()
+setup_logging()
+
+from memory import SessionStore
 from intents import handle_intent
 from nlu import analyze_message
+from rate_limiter import create_rate_limiter
+from scheduler import create_model_scheduler, QueueDeadlineExceeded
+from tracing import Trace, create_slow_request_log
+from speculation import HeldTokens, SpeculativeModelCalls
+from hedging import HedgedModelCaller
+from fake_model import create_fake_model
+from load_shedding import ModelOverloaded, ReplyCache, create_concurrency_limit
+from profiling import create_request_profiler
+from nlu_pool import create_nlu_batcher
+from model_router import create_model_router
+from generation import FirstParagraphStreamer, GenerationCancelled, create_generation_config, first_paragraph
+from ws_channel import create_channel_hub
+from flask_sock import Sock
+import concurrent.futures
 import requests
 import time
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-load_dotenv()
-
 GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
 GEMINI_MODEL = "gemini-1.5-flash"
+GENERATION_CONFIG = create_generation_config()
+# Cheaper model for short, simple messages; empty disables the fast tier
+GEMINI_FAST_MODEL = os.getenv("GEMINI_FAST_MODEL", "gemini-1.5-flash-8b")
+# Messages of history the fast tier sees
+FAST_TIER_HISTORY = 4
 
-def init_gemini_client():
+def init_gemini_client(tier="full"):
     # Set up the Google Gemini AI client for chat responses
+    model_name = GEMINI_FAST_MODEL if tier == "fast" else GEMINI_MODEL
+    if not model_name:
+        return None
+
+    if os.getenv("FAKE_MODEL", "false").lower() in ("1", "true", "yes"):
+        logger.info("Using the local fake model (FAKE_MODEL=true) for the %s tier.", tier)
+        return create_fake_model(tier)
+
     if not GOOGLE_API_KEY or GOOGLE_API_KEY in ["your_api_key_here", "test_disabled"]:
         logger.warning("Google API key not found or is placeholder. Please set GOOGLE_API_KEY in your .env file.")
         logger.info("Running in fallback mode without AI model.")
@@ -26,11 +58,11 @@ def init_gemini_client():
     
     try:
         genai.configure(api_key=GOOGLE_API_KEY)
-        model = genai.GenerativeModel(GEMINI_MODEL)
-        logger.info("Google Gemini client initialized successfully")
+        model = genai.GenerativeModel(model_name, generation_config=GENERATION_CONFIG)
+        logger.info("Google Gemini client (%s) initialized successfully", model_name)
         return model
     except Exception as e:
-        logger.error(f"Failed to initialize Google Gemini client: {e}")
+        logger.error("Failed to initialize Google Gemini client: %s", e)
         logger.info("Running in fallback mode without AI model.")
         return None
 
@@ -50,6 +82,10 @@ def get_simple_response(message):
     if any(farewell in message_lower for farewell in farewells):
         return "Goodbye! Have a great day!"
     
+    acknowledgements = ["ok", "okay", "k", "cool", "got it", "great", "nice", "sure", "alright"]
+    if message_lower.strip(" .!") in acknowledgements:
+        return "Great! Let me know if there's anything else you'd like to talk about."
+    
     thanks = ["thank", "thanks"]
     if any(thank in message_lower for thank in thanks):
         return "You're welcome! Is there anything else I can help you with?"
@@ -62,9 +98,172 @@ def get_simple_response(message):
     return "I understand you're trying to communicate with me. While my advanced AI features aren't available right now, I can still help with basic questions about weather, jokes, and time!"
 
 ai_client = init_gemini_client()
+fast_client = init_gemini_client("fast") if ai_client else None
 
 app = Flask(__name__)
-memory = ConversationMemory(max_history=5)
+sessions = SessionStore(max_sessions=int(os.getenv("MAX_SESSIONS", "1000")), max_history=5)
+rate_limiter = create_rate_limiter()
+model_scheduler = create_model_scheduler()
+slow_request_log = create_slow_request_log()
+# Opt-in: start the model call alongside NLU and cancel it if an intent answers
+SPECULATIVE_MODEL = os.getenv("SPECULATIVE_MODEL", "false").lower() in ("1", "true", "yes")
+speculative_calls = SpeculativeModelCalls()
+# Model calls share one executor; with hedging on, slow calls get a backup request
+model_caller = HedgedModelCaller(
+    enabled=os.getenv("HEDGE_REQUESTS", "false").lower() in ("1", "true", "yes"),
+    hedge_percentile=float(os.getenv("HEDGE_PERCENTILE", "0.95")),
+    min_delay=float(os.getenv("HEDGE_MIN_DELAY_MS", "200")) / 1000,
+    max_hedge_ratio=float(os.getenv("HEDGE_MAX_RATIO", "0.1")),
+)
+# Past the adaptive limit, general messages get a cached or rule-based reply
+# instead of waiting in the model queue
+SHED_ENABLED = os.getenv("SHED_ENABLED", "true").lower() in ("1", "true", "yes")
+concurrency_limit = create_concurrency_limit()
+reply_cache = ReplyCache()
+request_profiler = create_request_profiler()
+# With NLU_WORKERS set, spaCy runs in micro-batches on a process pool
+nlu_batcher = create_nlu_batcher()
+# Trivial messages get rule-based replies and short ones the fast model tier
+model_router = create_model_router(fast_available=fast_client is not None)
+paragraph_streamer = FirstParagraphStreamer()
+
+def get_client_key():
+    # Identify the caller by session id when the client sends one, otherwise by IP
+    payload = request.get_json(silent=True) or {}
+    session_id = (request.headers.get("X-Session-ID") or payload.get("session_id")
+                  or request.args.get("session_id"))
+    if session_id:
+        return f"session:{session_id}"
+    return f"ip:{request.remote_addr}"
+
+def get_priority():
+    # Scripts and bulk jobs mark themselves as batch so they queue behind interactive users
+    payload = request.get_json(silent=True) or {}
+    priority = request.headers.get("X-Priority") or payload.get("priority") or "interactive"
+    return priority.lower()
+
+def rate_limited_response(retry_after):
+    # 429 with a Retry-After header so well-behaved clients back off on their own
+    response = jsonify({
+        "reply": "You're sending messages too quickly. Please wait a moment and try again.",
+        "error": "Rate limit exceeded",
+        "retry_after": retry_after
+    })
+    response.status_code = 429
+    response.headers["Retry-After"] = str(retry_after)
+    return response
+
+def history_for_tier(memory, tier):
+    # The fast tier only gets the last few messages; shorter prompts are cheaper
+    return memory.get_formatted_history_string(
+        include_system_prompt=True, last=FAST_TIER_HISTORY if tier == "fast" else None
+    )
+
+def history_with_message(memory, user_message, tier="full"):
+    # The prompt history as it will look once the user message is stored
+    history = history_for_tier(memory, tier)
+    return f"{history}\nUser: {user_message}".strip()
+
+def call_model(history, client_key, priority, trace, on_token=None, tier="full", cancel=None):
+    # One scheduled, time-limited model call. Takes the trace explicitly because
+    # speculative calls run outside the request thread. Generation is streamed
+    # and stops after the first paragraph, or with GenerationCancelled once the
+    # cancel event is set. Calls that forward tokens to the client (on_token)
+    # aren't hedged since both copies would stream.
+    client = fast_client if tier == "fast" else ai_client
+    prompt = f"You are a helpful and friendly chatbot. Previous conversation:\n{history}\n\nRespond naturally and concisely to the user's message."
+
+    if SHED_ENABLED and not concurrency_limit.try_acquire():
+        raise ModelOverloaded("Model concurrency limit reached")
+
+    start = time.perf_counter()
+    queue_wait = 0.0
+    ok = False
+    cancelled = False
+    try:
+        # Wait for a fair-share model slot, then execute with timeout
+        with trace.span("queue"):
+            model_scheduler.acquire(client_key, priority, cost=len(history))
+        queue_wait = time.perf_counter() - start
+        model_start = time.perf_counter()
+        try:
+            with trace.span("model"):
+                text = model_caller.call(
+                    lambda cancel: paragraph_streamer.generate(client, prompt, on_token, cancel),
+                    timeout=10, hedge=on_token is None, cancel=cancel  # 10 second timeout
+                )
+            ok = True
+            return text
+        except GenerationCancelled:
+            cancelled = True
+            raise
+        except concurrent.futures.TimeoutError:
+            logger.warning("Gemini API timeout, falling back...")
+            raise requests.exceptions.Timeout("Gemini API timeout")
+        finally:
+            # A cancelled call tells us nothing about the model's health
+            if not cancelled:
+                model_router.record(tier, time.perf_counter() - model_start, ok)
+            model_scheduler.release()
+    finally:
+        if SHED_ENABLED:
+            concurrency_limit.release(time.perf_counter() - start, queue_wait, None if cancelled else ok)
+
+def clean_model_reply(response):
+    # Take only the first paragraph, without any model-generated prefix
+    reply = first_paragraph(response.strip() + "\n", final=True) or ""
+
+    # Fallback for empty or very short replies
+    if not reply or len(reply) < 2:
+        reply = "I understand your message. Could you please provide more details?"
+    return reply
+
+def profiled(view):
+    # Profile requests that ask for it (X-Profile plus the admin token) or are
+    # sampled. When profiling isn't configured the view isn't wrapped at all.
+    if not request_profiler.enabled:
+        return view
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        mode = request_profiler.mode_for(request.headers)
+        if mode is None:
+            return view(*args, **kwargs)
+        result, path = request_profiler.run(mode, g.trace.trace_id, view, *args, **kwargs)
+        response = make_response(result)
+        if path:
+            logger.info("Wrote %s profile to %s", mode, path)
+            response.headers["X-Profile-File"] = os.path.basename(path)
+        return response
+    return wrapper
+
+def trace_span(name):
+    # Time one stage of the current request
+    return g.trace.span(name)
+
+@app.before_request
+def start_trace():
+    if request.endpoint == "chat":
+        # Reuse the client's trace id when it sends one so both sides log the same id
+        g.trace = Trace(request.headers.get("X-Trace-ID"))
+
+@app.after_request
+def finish_trace(response):
+    trace = g.pop("trace", None)
+    if trace is None:
+        return response
+
+    trace.finish()
+    response.headers["X-Trace-ID"] = trace.trace_id
+    response.headers["Server-Timing"] = trace.server_timing_header()
+    body = response.get_json(silent=True)
+    if isinstance(body, dict):
+        body["timing"] = trace.to_dict()
+        response.set_data(app.json.dumps(body))
+
+    if slow_request_log.record(trace, path=request.path, status=response.status_code):
+        logger.warning("Slow request %s took %.0f ms", trace.trace_id, trace.total_ms, extra={"stages": trace.totals()})
+    return response
 
 @app.route('/')
 def home():
@@ -74,7 +273,61 @@ def home():
 def favicon():
     return '', 204
 
+@app.route('/metrics')
+def metrics():
+    return jsonify({
+        "rate_limit": rate_limiter.stats(),
+        "scheduler": model_scheduler.stats(),
+        "logging": logging_stats(),
+        "speculation": {"enabled": SPECULATIVE_MODEL, **speculative_calls.stats()},
+        "model_calls": model_caller.stats(),
+        "load_shedding": {"enabled": SHED_ENABLED, **concurrency_limit.stats(), "cache": reply_cache.stats()},
+        "nlu": nlu_batcher.stats() if nlu_batcher else {"workers": 0},
+        "websocket": channel_hub.stats(),
+        "routing": model_router.stats(),
+        "generation": {**GENERATION_CONFIG, **paragraph_streamer.stats()}
+    })
+
+@app.route('/debug/slow-requests')
+def slow_requests():
+    limit = request.args.get("limit", default=20, type=int)
+    min_ms = request.args.get("min_ms", default=0, type=float)
+    return jsonify({
+        "threshold_ms": slow_request_log.threshold_ms,
+        "requests": slow_request_log.recent(limit=limit, min_ms=min_ms)
+    })
+
+@app.route('/history')
+def history():
+    # Cursor-paginated transcript of the caller's session. Clients pass the last
+    # id they have as `cursor` to fetch only newer messages, and send the ETag
+    # back in If-None-Match to get a 304 when nothing changed.
+    cursor = max(0, request.args.get("cursor", default=0, type=int))
+    limit = min(max(1, request.args.get("limit", default=50, type=int)), 200)
+    memory = sessions.get(get_client_key())
+
+    page = memory.get_transcript_page(cursor=cursor, limit=limit)
+    etag = f"{page['epoch']}-{page['version']}-{cursor}-{limit}"
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+
+    # Rows instead of objects keeps long histories small on the wire
+    body = {
+        "fields": ["id", "role", "ts", "content"],
+        "messages": [[msg["id"], msg["role"], msg["ts"], msg["content"]] for msg in page["messages"]],
+        "next_cursor": page["next_cursor"],
+        "has_more": page["has_more"],
+        "truncated": page["truncated"]
+    }
+    response = Response(json.dumps(body, separators=(",", ":"), ensure_ascii=False), mimetype="application/json")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    return response
+
 @app.route('/chat', methods=['POST'])
+@profiled
 def chat():
     if not request.is_json:
         return jsonify({"reply": "Error: Request must be JSON", "error": "Invalid content type"}), 400
@@ -84,41 +337,83 @@ def chat():
         logger.warning("Received empty message.")
         return jsonify({"reply": "Please provide a message."}), 400
 
-    logger.info(f"Received message: {user_message}")
+    logger.info("Received message (%d chars)", len(user_message), extra={"content": user_message, "sample": True})
+    client_key = get_client_key()
+    memory = sessions.get(client_key)
+    priority = get_priority()
+
+    # In speculative mode the model call starts now and races NLU; it's
+    # charged to the model budget up front whether or not it gets used. Its
+    # tokens are only streamed to the client once the reply is used.
+    speculation = None
+    held_tokens = None
+    route = None
+    if SPECULATIVE_MODEL and ai_client:
+        route = model_router.route(user_message)
+    if route and route[0] != "simple":
+        allowed, retry_after = rate_limiter.check(client_key, "model", ip=request.remote_addr)
+        if not allowed:
+            return rate_limited_response(retry_after)
+        held_tokens = HeldTokens() if g.get("on_token") else None
+        speculation = speculative_calls.start(
+            call_model, history_with_message(memory, user_message, route[0]), client_key, priority,
+            g.trace, held_tokens, route[0]
+        )
 
     # First try specific intents
     try:
-        analysis = analyze_message(user_message)
+        with trace_span("nlu"):
+            analysis = nlu_batcher.analyze(user_message) if nlu_batcher else analyze_message(user_message)
         intent = analysis["intent"]
         entities = analysis["entities"]
         
         if intent != "general":
+            allowed, retry_after = rate_limiter.check(client_key, "simple", ip=request.remote_addr)
+            if not allowed:
+                if speculation:
+                    speculation.discard()
+                return rate_limited_response(retry_after)
             try:
-                custom_response = handle_intent(intent, entities)
+                with trace_span("intent"):
+                    custom_response = handle_intent(intent, entities)
                 if custom_response:
-                    logger.info(f"Handled intent '{intent}' with response: {custom_response}")
+                    if speculation:
+                        speculation.discard()
+                    logger.info("Handled intent '%s'", intent, extra={"content": custom_response, "sample": True})
                     memory.add_message("user", user_message)
                     memory.add_message("assistant", custom_response)
                     return jsonify({"reply": custom_response})
             except Exception as e:
-                logger.error(f"Intent handling failed: {e}")
+                logger.error("Intent handling failed: %s", e)
     except Exception as e:
-        logger.error(f"NLU analysis failed: {e}")
+        logger.error("NLU analysis failed: %s", e)
+
+    # Fall back to the language model or simple responses; trivial messages
+    # are routed to the rules even when the model is available
+    tier, reason = route or (model_router.route(user_message) if ai_client else ("simple", "no_model"))
+    if tier == "simple":
+        allowed, retry_after = rate_limiter.check(client_key, "simple", ip=request.remote_addr)
+        if not allowed:
+            return rate_limited_response(retry_after)
 
-    # Fall back to the language model or simple responses
-    if not ai_client:
         # Simple rule-based fallback responses
         memory.add_message("user", user_message)
-        simple_response = get_simple_response(user_message)
+        with trace_span("simple"):
+            simple_response = get_simple_response(user_message)
         memory.add_message("assistant", simple_response)
         return jsonify({"reply": simple_response})
 
+    if speculation is None:
+        allowed, retry_after = rate_limiter.check(client_key, "model", ip=request.remote_addr)
+        if not allowed:
+            return rate_limited_response(retry_after)
+
     try:
         # Add the user message to memory
         memory.add_message("user", user_message)
         
         # Get conversation history
-        history = memory.get_formatted_history_string(include_system_prompt=True)
+        history = history_for_tier(memory, tier)
         
         # Set up retry mechanism
         max_retries = 3
@@ -127,69 +422,91 @@ def chat():
 
         for attempt in range(max_retries):
             try:
-                # Use thread-safe timeout with concurrent.futures
-                import concurrent.futures
-                
-                def call_gemini_api():
-                    # Generate response using Google Gemini
-                    prompt = f"You are a helpful and friendly chatbot. Previous conversation:\n{history}\n\nRespond naturally and concisely to the user's message."
-                    response_obj = ai_client.generate_content(prompt)
-                    return response_obj.text
-                
-                try:
-                    # Execute with timeout
-                    with concurrent.futures.ThreadPoolExecutor() as executor:
-                        future = executor.submit(call_gemini_api)
-                        response = future.result(timeout=10)  # 10 second timeout
-                except concurrent.futures.TimeoutError:
-                    logger.warning(f"Gemini API timeout on attempt {attempt + 1}, falling back...")
-                    raise requests.exceptions.Timeout("Gemini API timeout")
-
-                # Clean up the response
-                reply = response.strip()
-                
-                # Remove any model-generated prefixes
-                if ":" in reply:
-                    reply = reply.split(":", 1)[-1].strip()
-                
-                # Take only the first paragraph
-                reply = reply.split('\n')[0].strip()
-                
-                # Fallback for empty or very short replies
-                if not reply or len(reply) < 2:
-                    reply = "I understand your message. Could you please provide more details?"
-                
+                # The first attempt reuses the speculative call when there is one
+                if speculation and attempt == 0:
+                    if held_tokens:
+                        held_tokens.release(g.on_token)
+                    response = speculation.take()
+                else:
+                    response = call_model(history, client_key, priority, g.trace, g.get("on_token"), tier)
+                reply = clean_model_reply(response)
+                reply_cache.put(client_key, user_message, reply)
+
                 # Add the response to memory and return
                 memory.add_message("assistant", reply)
                 return jsonify({"reply": reply})
 
+            except ModelOverloaded:
+                # Answer right away from the cache or the rules rather than queueing
+                cached_reply = reply_cache.get(client_key, user_message)
+                with trace_span("simple"):
+                    reply = cached_reply or get_simple_response(user_message)
+                memory.add_message("assistant", reply)
+                return jsonify({"reply": reply, "degraded": True, "degraded_source": "cache" if cached_reply else "simple"})
+
+            except QueueDeadlineExceeded as e:
+                # Too stale to be worth sending upstream; don't retry into the same queue
+                logger.warning("Dropping queued model request: %s", e)
+                return jsonify({
+                    "reply": "I'm handling a lot of conversations right now. Please try again in a moment.",
+                    "error": "Queue deadline exceeded"
+                }), 503
             except (requests.exceptions.Timeout, TimeoutError):
                 last_error = "Request timed out"
-                logger.warning(f"Attempt {attempt + 1}/{max_retries} timed out. Retrying...")
+                logger.warning("Attempt %d/%d timed out. Retrying...", attempt + 1, max_retries)
                 if attempt == max_retries - 1:  # Last attempt
                     # Use fallback response immediately
                     fallback_response = get_simple_response(user_message)
                     memory.add_message("assistant", fallback_response)
                     return jsonify({"reply": fallback_response})
-                time.sleep(retry_delay)
+                with trace_span("retry_sleep"):
+                    time.sleep(retry_delay)
             except Exception as e:
                 last_error = str(e)
-                logger.error(f"Error on attempt {attempt + 1}/{max_retries}: {e}")
-                time.sleep(retry_delay)
+                logger.error("Error on attempt %d/%d: %s", attempt + 1, max_retries, e)
+                with trace_span("retry_sleep"):
+                    time.sleep(retry_delay)
 
         # If we get here, all retries failed
-        logger.error(f"All retries failed. Last error: {last_error}")
+        logger.error("All retries failed. Last error: %s", last_error)
         return jsonify({
             "reply": "I apologize, but I'm having trouble connecting to my language model. Please try again in a moment.",
             "error": last_error
         }), 500
 
     except Exception as e:
-        logger.error(f"Error generating response: {e}", exc_info=True)
+        logger.error("Error generating response: %s", e, exc_info=True)
         return jsonify({
             "reply": "I apologize, but I'm having trouble processing your message. Please try again.",
             "error": str(e)
         }), 500
 
+def dispatch_channel_chat(message, session_id, on_token, remote_addr=None):
+    # Run a WebSocket chat message through the same pipeline as POST /chat
+    # (rate limits, tracing, shedding), streaming model tokens back as they arrive
+    with app.test_request_context('/chat', method='POST', json={"message": message},
+                                  headers={"X-Session-ID": session_id},
+                                  environ_base={"REMOTE_ADDR": remote_addr}):
+        g.on_token = on_token
+        response = app.full_dispatch_request()
+        return response.status_code, response.get_json(silent=True) or {}
+
+def channel_server_state():
+    # Load summary pushed with heartbeats so clients can show when we're degraded
+    shedding = concurrency_limit.stats()
+    return {
+        "in_flight": shedding["in_flight"],
+        "limit": shedding["limit"],
+        "degraded": SHED_ENABLED and shedding["in_flight"] >= int(shedding["limit"]),
+    }
+
+sock = Sock(app)
+channel_hub = create_channel_hub(dispatch_channel_chat, channel_server_state)
+
+@sock.route('/ws')
+def chat_channel(ws):
+    # Persistent channel for the GUI: chat, streamed tokens, heartbeats, resume
+    channel_hub.serve(ws, request.args.get("session_id"), request.remote_addr)
+
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=5003)
\ No newline at end of file
@@ -0,0 +1,73 @@
+import os
+import random
+import threading
+import time
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeModel:
+    # Stand-in for genai.GenerativeModel for load tests and benchmarks. Latency
+    # is log-normal around `median_ms`, and a `tail_probability` fraction of calls
+    # are slow (`tail_ms`), which is roughly what Gemini's latency looks like.
+    def __init__(self, median_ms=300, tail_ms=3000, tail_probability=0.05, seed=None):
+        self.median_ms = median_ms
+        self.tail_ms = tail_ms
+        self.tail_probability = tail_probability
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.calls = 0
+
+    def sample_latency(self):
+        # Seconds this call will take
+        with self.lock:
+            self.calls += 1
+            if self.random.random() < self.tail_probability:
+                ms = self.tail_ms * self.random.uniform(0.8, 1.5)
+            else:
+                ms = self.median_ms * self.random.lognormvariate(0, 0.3)
+        return ms / 1000.0
+
+    def reply_for(self, prompt):
+        # Echo the last user line so replies are deterministic per prompt
+        user_lines = [line for line in prompt.splitlines() if line.startswith("User: ")]
+        last = user_lines[-1][len("User: "):] if user_lines else "something"
+        return (
+            f"Chatbot: Thanks for your message about \"{last[:60]}\". Here's a short answer.\n"
+            "Here is a second paragraph that the backend should never show."
+        )
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        latency = self.sample_latency()
+        text = self.reply_for(prompt)
+        if stream:
+            return self._stream(text, latency)
+        time.sleep(latency)
+        return FakeResponse(text)
+
+    def _stream(self, text, latency):
+        # Like Gemini's stream=True: time to first chunk is most of the latency,
+        # then the rest of the text arrives a few words at a time
+        time.sleep(latency * 0.6)
+        words = text.split(" ")
+        chunks = [" ".join(words[i:i + 4]) + " " for i in range(0, len(words), 4)]
+        chunks[-1] = chunks[-1].rstrip(" ")
+        for chunk in chunks:
+            yield FakeResponse(chunk)
+            time.sleep(latency * 0.4 / len(chunks))
+
+
+def create_fake_model(tier="full"):
+    # Build the fake model from environment settings; the fast tier is quicker
+    if tier == "fast":
+        median_ms = float(os.getenv("FAKE_MODEL_FAST_MEDIAN_MS", "100"))
+    else:
+        median_ms = float(os.getenv("FAKE_MODEL_MEDIAN_MS", "300"))
+    return FakeModel(
+        median_ms=median_ms,
+        tail_ms=float(os.getenv("FAKE_MODEL_TAIL_MS", "3000")),
+        tail_probability=float(os.getenv("FAKE_MODEL_TAIL_PROBABILITY", "0.05")),
+    )
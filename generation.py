@@ -0,0 +1,105 @@
+import os
+import threading
+
+# Only the first paragraph of a reply is ever shown, so generation stops at a
+# paragraph break; streaming cuts it off even earlier, at the first line (or
+# at the end of a code block the reply opens with)
+STOP_SEQUENCES = ["\n\n"]
+
+
+class GenerationCancelled(Exception):
+    # Raised by a generation its caller stopped because the reply isn't needed
+    pass
+
+
+def create_generation_config():
+    # Output cap and stop sequences passed to every Gemini model
+    return {
+        "max_output_tokens": int(os.getenv("MODEL_MAX_OUTPUT_TOKENS", "256")),
+        "stop_sequences": STOP_SEQUENCES,
+    }
+
+
+def first_paragraph(text, final=False):
+    # The part of a reply the chatbot keeps: the first line after any
+    # "Chatbot:"-style prefix, or the whole code block if the reply opens with
+    # a ``` fence. None while that isn't complete yet; once the text is final
+    # an unclosed code block counts as complete.
+    reply = text.lstrip()
+    first_line, newline, rest = reply.partition("\n")
+    if not newline:
+        return None
+    if ":" in first_line and not first_line.lstrip().startswith("```"):
+        reply = (first_line.split(":", 1)[-1] + "\n" + rest).lstrip()
+        first_line, newline, rest = reply.partition("\n")
+        if not newline:
+            return None
+    if first_line.lstrip().startswith("```"):
+        lines = [first_line]
+        while True:
+            line, newline, rest = rest.partition("\n")
+            if not newline:
+                return "\n".join(lines).strip() if final else None
+            lines.append(line)
+            if line.strip().startswith("```"):
+                return "\n".join(lines).strip()
+    return first_line.strip()
+
+
+def cancel_stream(stream):
+    # Stop a streamed generation we no longer need. Generators (the fake model)
+    # close; a Gemini stream cancels its underlying gRPC call.
+    close = getattr(stream, "close", None)
+    if close is None:
+        close = getattr(getattr(stream, "_iterator", None), "cancel", None)
+    if close is not None:
+        try:
+            close()
+        except Exception:
+            pass
+
+
+class FirstParagraphStreamer:
+    # Streams a generation and cancels it as soon as the first paragraph is
+    # complete, so we neither wait nor pay for text that gets thrown away
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {"streams": 0, "early_stops": 0, "cancelled": 0, "chars_received": 0}
+
+    def generate(self, client, prompt, on_token=None, cancel=None):
+        # Text generated up to the end of the first paragraph, passing each
+        # chunk to on_token as it arrives. Setting the cancel event stops the
+        # stream at the next chunk with GenerationCancelled.
+        if cancel is not None and cancel.is_set():
+            raise GenerationCancelled()
+        stream = client.generate_content(prompt, stream=True)
+        parts = []
+        stopped = False
+        for chunk in stream:
+            if cancel is not None and cancel.is_set():
+                cancel_stream(stream)
+                with self.lock:
+                    self.counters["cancelled"] += 1
+                raise GenerationCancelled()
+            parts.append(chunk.text)
+            if on_token:
+                on_token(chunk.text)
+            if "\n" in chunk.text and first_paragraph("".join(parts)) is not None:
+                cancel_stream(stream)
+                stopped = True
+                break
+
+        text = "".join(parts)
+        with self.lock:
+            self.counters["streams"] += 1
+            self.counters["early_stops"] += 1 if stopped else 0
+            self.counters["chars_received"] += len(text)
+        return text
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            **counters,
+            "early_stop_rate": round(counters["early_stops"] / counters["streams"], 3) if counters["streams"] else 0.0,
+        }
@@ -0,0 +1,158 @@
+import concurrent.futures
+import threading
+import time
+from collections import deque
+
+
+class LatencyWindow:
+    # Rolling window of recent latencies (seconds) for percentile estimates
+    def __init__(self, size=200):
+        self.samples = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def add(self, seconds):
+        with self.lock:
+            self.samples.append(seconds)
+
+    def percentile(self, fraction, default=None):
+        with self.lock:
+            if not self.samples:
+                return default
+            ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+    def __len__(self):
+        return len(self.samples)
+
+
+class AttemptCancel:
+    # Cancel event for one attempt of a hedged call: set when the attempt loses
+    # or times out, and also reads as set once the caller's own event is
+    def __init__(self, parent=None):
+        self.event = threading.Event()
+        self.parent = parent
+
+    def set(self):
+        self.event.set()
+
+    def is_set(self):
+        return self.event.is_set() or (self.parent is not None and self.parent.is_set())
+
+
+class HedgedModelCaller:
+    # Runs model calls on a shared executor with a real timeout. With hedging on,
+    # a call still running after the `hedge_percentile` latency of recent calls
+    # gets a second identical request, and whichever finishes first wins.
+    # Hedges are paid for from a budget that grows by `max_hedge_ratio` per
+    # call, so at most that fraction of calls are ever duplicated.
+    def __init__(self, enabled=False, hedge_percentile=0.95, min_delay=0.2,
+                 max_hedge_ratio=0.1, window=200, max_workers=32):
+        self.enabled = enabled
+        self.hedge_percentile = hedge_percentile
+        self.min_delay = min_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="model")
+
+        # Latency of individual upstream attempts drives the hedge delay; the
+        # end-to-end latency is what callers see and what hedging should improve
+        self.attempt_latency = LatencyWindow(window)
+        self.call_latency = LatencyWindow(window)
+
+        self.lock = threading.Lock()
+        self.hedge_budget = 1.0
+        self.counters = {"calls": 0, "hedged": 0, "hedge_wins": 0, "budget_denied": 0}
+
+    def hedge_delay(self):
+        # Until there is enough history, only hedge calls that are clearly slow
+        if len(self.attempt_latency) < 20:
+            return None
+        return max(self.min_delay, self.attempt_latency.percentile(self.hedge_percentile))
+
+    def _submit(self, fn, cancel):
+        # A cancelled attempt stopped early, so its latency says nothing about the model
+        start = time.perf_counter()
+        future = self.executor.submit(fn, cancel=cancel)
+        future.add_done_callback(
+            lambda f: None if f.cancelled() or cancel.is_set() else self.attempt_latency.add(time.perf_counter() - start)
+        )
+        return future
+
+    def _take_hedge_budget(self):
+        with self.lock:
+            if self.hedge_budget >= 1.0:
+                self.hedge_budget -= 1.0
+                self.counters["hedged"] += 1
+                return True
+            self.counters["budget_denied"] += 1
+            return False
+
+    def call(self, fn, timeout, hedge=True, cancel=None):
+        # Run fn(cancel=...) and return its result, raising concurrent.futures.TimeoutError
+        # when nothing has finished within `timeout` seconds. Calls with side
+        # effects (streaming tokens to a client) pass hedge=False. Each attempt
+        # gets its own cancel event, set when it loses the race or times out and
+        # whenever the caller's `cancel` event is, so fn should stop early on it.
+        start = time.perf_counter()
+        deadline = start + timeout
+        with self.lock:
+            self.counters["calls"] += 1
+            self.hedge_budget = min(10.0, self.hedge_budget + self.max_hedge_ratio)
+
+        attempts = {}
+
+        def submit():
+            attempt = AttemptCancel(cancel)
+            future = self._submit(fn, attempt)
+            attempts[future] = attempt
+            return future
+
+        primary = submit()
+        pending = {primary}
+        delay = self.hedge_delay() if self.enabled and hedge else None
+        if delay is not None and delay < timeout:
+            done, _ = concurrent.futures.wait(pending, timeout=delay)
+            if not done and self._take_hedge_budget():
+                pending.add(submit())
+
+        first_error = None
+        while pending:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            done, pending = concurrent.futures.wait(
+                pending, timeout=remaining, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    for loser in pending:
+                        # A loser already running stops at its next check of the event
+                        loser.cancel()
+                        attempts[loser].set()
+                    if future is not primary:
+                        with self.lock:
+                            self.counters["hedge_wins"] += 1
+                    self.call_latency.add(time.perf_counter() - start)
+                    return future.result()
+                first_error = first_error or future.exception()
+
+        for future in pending:
+            future.cancel()
+            attempts[future].set()
+        if first_error is not None:
+            raise first_error
+        raise concurrent.futures.TimeoutError()
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        delay = self.hedge_delay()
+        return {
+            "enabled": self.enabled,
+            **counters,
+            "hedge_rate": round(counters["hedged"] / counters["calls"], 3) if counters["calls"] else 0.0,
+            "hedge_delay_ms": round(delay * 1000, 1) if delay is not None else None,
+            "latency_ms": {
+                name: round(self.call_latency.percentile(fraction, 0.0) * 1000, 1)
+                for name, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99))
+            },
+        }
@@ -0,0 +1,118 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+
+class ModelOverloaded(Exception):
+    # Raised instead of queueing when the model path is past its concurrency limit
+    pass
+
+
+class AdaptiveConcurrencyLimit:
+    # AIMD limit on model calls in flight (queued for a slot or running). Calls
+    # that finish within the latency target, without waiting too long for a slot,
+    # grow the limit by about one per limit's worth of calls; slow or failed calls
+    # cut it multiplicatively, at most once per cooldown so one burst of slow
+    # completions doesn't collapse it to the floor.
+    def __init__(self, initial_limit=8, min_limit=1, max_limit=64, target_latency=4.0,
+                 target_queue_wait=0.5, backoff=0.75, cooldown=1.0):
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.target_queue_wait = target_queue_wait
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.lock = threading.Lock()
+        self.counters = {"admitted": 0, "shed": 0, "decreases": 0}
+
+    def try_acquire(self):
+        with self.lock:
+            if self.in_flight >= int(self.limit):
+                self.counters["shed"] += 1
+                return False
+            self.in_flight += 1
+            self.counters["admitted"] += 1
+            return True
+
+    def release(self, latency, queue_wait, ok):
+        # ok is None for a call that was abandoned, which says nothing about
+        # how the model is coping
+        with self.lock:
+            self.in_flight -= 1
+            if ok is None:
+                return
+            congested = not ok or latency > self.target_latency or queue_wait > self.target_queue_wait
+            now = time.monotonic()
+            if congested:
+                if now - self.last_decrease >= self.cooldown:
+                    self.limit = max(self.min_limit, self.limit * self.backoff)
+                    self.last_decrease = now
+                    self.counters["decreases"] += 1
+            else:
+                self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+
+    def stats(self):
+        with self.lock:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                **self.counters,
+            }
+
+
+class ReplyCache:
+    # Recent model replies by session and normalized message, served when we're
+    # shedding load. Replies depend on the conversation so far, so one session's
+    # answer is never served to another.
+    def __init__(self, max_entries=1000):
+        self.entries = OrderedDict()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def normalize(message):
+        return re.sub(r"[^a-z0-9 ]+", "", message.lower()).strip()
+
+    def get(self, session_key, message):
+        key = (session_key, self.normalize(message))
+        with self.lock:
+            reply = self.entries.get(key)
+            if reply is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return reply
+
+    def put(self, session_key, message, reply):
+        text = self.normalize(message)
+        if not text:
+            return
+        key = (session_key, text)
+        with self.lock:
+            self.entries[key] = reply
+            self.entries.move_to_end(key)
+            if len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def stats(self):
+        with self.lock:
+            return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+
+def create_concurrency_limit():
+    # Build the adaptive limit from environment settings
+    return AdaptiveConcurrencyLimit(
+        initial_limit=int(os.getenv("SHED_INITIAL_LIMIT", "8")),
+        min_limit=int(os.getenv("SHED_MIN_LIMIT", "1")),
+        max_limit=int(os.getenv("SHED_MAX_LIMIT", "64")),
+        target_latency=float(os.getenv("SHED_TARGET_LATENCY_MS", "4000")) / 1000,
+        target_queue_wait=float(os.getenv("SHED_TARGET_QUEUE_WAIT_MS", "500")) / 1000,
+    )
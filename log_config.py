@@ -0,0 +1,150 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+from datetime import datetime, timezone
+
+# Attributes every LogRecord has; anything else came in through `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime"}
+
+_listener = None
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    # Hands records to the background writer without formatting them first.
+    # The stdlib QueueHandler formats in prepare(), which is exactly the work
+    # we want off the request thread. When the queue is full the record is
+    # dropped and counted rather than blocking the caller.
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class SamplingFilter(logging.Filter):
+    # Keeps only a fraction of high-volume records. A record opts in to
+    # sampling with extra={"sample": True}; warnings and errors always pass.
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+        self.sampled_out = 0
+
+    def filter(self, record):
+        if self.rate >= 1.0 or record.levelno >= logging.WARNING or not getattr(record, "sample", False):
+            return True
+        if random.random() < self.rate:
+            return True
+        self.sampled_out += 1
+        return False
+
+
+class StructuredFormatter(logging.Formatter):
+    # One JSON object per line. User content passed as extra={"content": ...}
+    # is truncated, or replaced by its length when redaction is on.
+    def __init__(self, max_content_chars=200, redact_content=False, as_json=True):
+        super().__init__("%(asctime)s - %(levelname)s - %(message)s")
+        self.max_content_chars = max_content_chars
+        self.redact_content = redact_content
+        self.as_json = as_json
+
+    def _clean_content(self, value):
+        value = str(value)
+        if self.redact_content:
+            return f"<redacted {len(value)} chars>"
+        if len(value) > self.max_content_chars:
+            return f"{value[:self.max_content_chars]}... <{len(value) - self.max_content_chars} more chars>"
+        return value
+
+    def format(self, record):
+        fields = {
+            key: value for key, value in vars(record).items()
+            if key not in _RECORD_ATTRS and key != "sample"
+        }
+        if "content" in fields:
+            fields["content"] = self._clean_content(fields["content"])
+
+        if not self.as_json:
+            line = super().format(record)
+            if fields:
+                line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+            return line
+
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+            **fields,
+        }
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+def setup_logging():
+    # Route all logging through a bounded queue drained by a background thread.
+    # Safe to call more than once; only the first call installs handlers.
+    global _listener
+    if _listener is not None:
+        return
+
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    formatter = StructuredFormatter(
+        max_content_chars=int(os.getenv("LOG_MAX_CONTENT_CHARS", "200")),
+        redact_content=os.getenv("LOG_REDACT_CONTENT", "false").lower() in ("1", "true", "yes"),
+        as_json=os.getenv("LOG_FORMAT", "json").lower() == "json",
+    )
+
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.Queue(maxsize=int(os.getenv("LOG_QUEUE_SIZE", "10000")))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(SamplingFilter(float(os.getenv("LOG_SAMPLE_RATE", "1.0"))))
+
+    root = logging.getLogger()
+    root.handlers[:] = [queue_handler]
+    root.setLevel(level)
+
+    _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    atexit.register(lambda: _listener.stop())
+    # The writer thread doesn't survive fork(), so pre-forked workers start their own
+    os.register_at_fork(after_in_child=_restart_listener)
+
+
+def _restart_listener():
+    global _listener
+    if _listener is None:
+        return
+    log_queue = queue.Queue(maxsize=_listener.queue.maxsize)
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            handler.queue = log_queue
+    _listener = logging.handlers.QueueListener(log_queue, *_listener.handlers, respect_handler_level=True)
+    _listener.start()
+
+
+def logging_stats():
+    # Drop and sampling counters for the metrics endpoint
+    stats = {"dropped": 0, "sampled_out": 0}
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, NonBlockingQueueHandler):
+            stats["dropped"] += handler.dropped
+            stats["queued"] = handler.queue.qsize()
+            for log_filter in handler.filters:
+                if isinstance(log_filter, SamplingFilter):
+                    stats["sampled_out"] += log_filter.sampled_out
+    return stats
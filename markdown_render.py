@@ -0,0 +1,90 @@
+import functools
+import html
+import re
+
+# A link runs to whitespace or a quote, minus trailing punctuation
+_URL = r"https?://[^\s<>\"'`]*[^\s<>\"'`.,;:!?)\]}*]"
+URL_PATTERN = re.compile(_URL)
+
+# Inline markup, none of which spans a line, as one alternation so each run of
+# text is scanned once, left to right. It runs on the already escaped message,
+# where the only entity a link may contain is &amp; (&lt; and &gt; end it).
+# Which alternative matched is told by how the match starts.
+_INLINE = re.compile(
+    r"`[^`\n]+`"
+    r"|https?://(?:[^\s\"'`&]|&amp;)*(?:[^\s\"'`&.,;:!?)\]}*]|&amp;)"
+    r"|\*\*[^\s*](?:[^\n]*?[^\s*])?\*\*"
+    r"|\*[^\s*](?:[^*\n]*?[^\s*])?\*"
+)
+# A fence opens with ``` and an optional language at the start of a line
+_FENCE_OPEN = re.compile(r"```[^\n`]*\n")
+
+
+def _inline_markup(match):
+    markup = match.group()
+    if markup.startswith("`"):
+        return f"<code>{markup[1:-1]}</code>"
+    if markup.startswith("**"):
+        return f"<b>{_inline(markup[2:-2])}</b>"
+    if markup.startswith("*"):
+        return f"<i>{_inline(markup[1:-1])}</i>"
+    return f'<a href="{markup}">{markup}</a>'
+
+
+def _inline(text):
+    # A run of escaped text without code blocks. re.sub keeps the scan and the
+    # joining in C, calling back into Python only for actual markup.
+    if "`" in text or "*" in text or "://" in text:
+        text = _INLINE.sub(_inline_markup, text)
+    return text.replace("\n", "<br>")
+
+
+def _fence_end(text, position):
+    # (end of the code, end of the block) for a block whose code starts at
+    # position: the first line that is just ``` closes it. An unterminated
+    # block (a reply still being streamed) runs to the end of the text.
+    start = text.find("```", position)
+    while start != -1:
+        line_start = text.rfind("\n", 0, start) + 1
+        line_end = text.find("\n", start)
+        if line_end == -1:
+            line_end = len(text)
+        if not text[line_start:start].strip(" \t") and not text[start + 3:line_end].strip(" \t"):
+            return line_start, min(line_end + 1, len(text))
+        start = text.find("```", start + 3)
+    return len(text), len(text)
+
+
+def _render(text):
+    # text is HTML-escaped already. Code blocks are rare, so they are found
+    # with str.find and everything between them goes through _inline.
+    parts = []
+    position = 0
+    start = text.find("```")
+    while start != -1:
+        line_start = text.rfind("\n", 0, start) + 1
+        opener = _FENCE_OPEN.match(text, start)
+        if opener is None or text[line_start:start].strip(" \t"):
+            # Backticks in the middle of a line, not a block
+            start = text.find("```", start + 1)
+            continue
+        # The line break before a block is the block's own
+        parts.append(_inline(text[position:max(position, line_start - 1)]))
+        code_end, position = _fence_end(text, opener.end())
+        parts.append(f"<pre>{text[opener.end():code_end].rstrip(chr(10))}</pre>")
+        start = text.find("```", position)
+    parts.append(_inline(text[position:]))
+    return "".join(parts)
+
+
+@functools.lru_cache(maxsize=1024)
+def render_html(text):
+    # Message text as Qt rich-text HTML: **bold**, *italic*, `code`, fenced
+    # ``` blocks and links, everything else escaped. Cached by text, since the
+    # same message is rendered again whenever its row is laid out anew.
+    return _render(html.escape(text, quote=False))
+
+
+def has_markup(text):
+    # Whether a message needs rich text at all; everything else is drawn plain
+    return "*" in text or "`" in text or ("://" in text and URL_PATTERN.search(text) is not None)
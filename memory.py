@@ -1,19 +1,40 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
 
 class ConversationMemory:
     # Manages conversation history to keep track of context
-    def __init__(self, max_history=10):
+    def __init__(self, max_history=10, max_transcript=500):
         # Set up the system prompt and conversation history
         self.system_prompt = "You are a helpful and friendly chatbot."
         self.conversation = []
         self.max_history = max_history
+        # Full (bounded) record of the session for the history API. Ids only ever
+        # increase, so a client can resume from the last id it has seen.
+        self.transcript = []
+        self.max_transcript = max_transcript
+        self.next_id = 1
+        self.version = 0
+        # Versions are only comparable within one memory; the epoch tells
+        # memories apart, including one recreated for the same session
+        self.epoch = uuid.uuid4().hex[:8]
+        self.lock = threading.Lock()
 
     def add_message(self, role, content):
         # Add a new message from either user or assistant to the conversation
-        self.conversation.append({"role": role, "content": content})
-        # Don't let the conversation history get too long
-        if len(self.conversation) > self.max_history * 2 : 
-             self.conversation.pop(0)
-             self.conversation.pop(0)
+        with self.lock:
+            self.conversation.append({"role": role, "content": content})
+            # Don't let the conversation history get too long
+            if len(self.conversation) > self.max_history * 2 : 
+                 self.conversation.pop(0)
+                 self.conversation.pop(0)
+
+            self.transcript.append({"id": self.next_id, "role": role, "content": content, "ts": round(time.time(), 3)})
+            self.next_id += 1
+            if len(self.transcript) > self.max_transcript:
+                del self.transcript[:len(self.transcript) - self.max_transcript]
+            self.version += 1
 
 
     def get_conversation_history(self):
@@ -21,17 +42,68 @@ class ConversationMemory:
         # Return a copy to prevent external modification
         return list(self.conversation)
 
-    def get_formatted_history_string(self, include_system_prompt=True):
-        # Convert conversation to a formatted string for models that need text input
+    def get_formatted_history_string(self, include_system_prompt=True, last=None):
+        # Convert conversation to a formatted string for models that need text input.
+        # `last` keeps only that many of the most recent messages.
         formatted = ""
         if include_system_prompt and self.system_prompt:
              formatted += f"System: {self.system_prompt}\n"
-        for msg in self.conversation:
+        messages = self.conversation[-last:] if last else self.conversation
+        for msg in messages:
             role = "User" if msg["role"] == "user" else "Chatbot"
             formatted += f"{role}: {msg['content']}\n"
         return formatted.strip() # Remove trailing newline
 
+    def get_transcript_page(self, cursor=0, limit=50):
+        # Messages with id greater than `cursor`, oldest first. Ids are contiguous
+        # so the start of the page is found by offset rather than by scanning.
+        with self.lock:
+            if not self.transcript:
+                return {"messages": [], "next_cursor": cursor, "has_more": False, "truncated": False,
+                        "version": self.version, "epoch": self.epoch}
+            first_id = self.transcript[0]["id"]
+            start = max(0, cursor - first_id + 1)
+            page = self.transcript[start:start + limit]
+            return {
+                "messages": [dict(msg) for msg in page],
+                "next_cursor": page[-1]["id"] if page else cursor,
+                "has_more": start + limit < len(self.transcript),
+                # Messages between the cursor and the oldest retained one were trimmed
+                "truncated": cursor < first_id - 1,
+                "version": self.version,
+                "epoch": self.epoch,
+            }
+
 
     def clear_memory(self):
         # Reset the conversation history
-        self.conversation = []
+        with self.lock:
+            self.conversation = []
+            self.transcript = []
+            self.version += 1
+
+
+class SessionStore:
+    # Keeps one ConversationMemory per session, dropping the least recently
+    # used session once there are too many
+    def __init__(self, max_sessions=1000, **memory_options):
+        self.sessions = OrderedDict()
+        self.max_sessions = max_sessions
+        self.memory_options = memory_options
+        self.lock = threading.Lock()
+
+    def get(self, session_key):
+        # Fetch the memory for a session, creating it on first use
+        with self.lock:
+            memory = self.sessions.get(session_key)
+            if memory is None:
+                memory = ConversationMemory(**self.memory_options)
+                self.sessions[session_key] = memory
+                if len(self.sessions) > self.max_sessions:
+                    self.sessions.popitem(last=False)
+            else:
+                self.sessions.move_to_end(session_key)
+            return memory
+
+    def __len__(self):
+        return len(self.sessions)
@@ -0,0 +1,163 @@
+import functools
+import os
+import re
+import threading
+from collections import deque
+
+from hedging import LatencyWindow
+
+TIERS = ("simple", "fast", "full")
+
+# Whole messages the rule-based responder answers as well as any model would
+SIMPLE_MESSAGES = {
+    "ok", "okay", "k", "cool", "great", "nice", "sure", "alright", "got it",
+    "thanks", "thank you", "thanks a lot", "thank you so much",
+    "hi", "hello", "hey", "hi there", "hello there",
+    "bye", "goodbye", "see you", "see you later",
+    "how are you", "how are you doing",
+}
+
+# Words that ask for reasoning or long output; these always get the full model
+COMPLEX_WORDS = {
+    "explain", "why", "compare", "difference", "write", "code", "analyze", "analyse",
+    "summarize", "summarise", "steps", "plan", "design", "debug", "translate", "essay",
+    "pros", "cons", "prove", "calculate", "recommend",
+}
+
+_PUNCTUATION = re.compile(r"[^\w\s']")
+
+
+@functools.lru_cache(maxsize=4096)
+def classify(message, fast_max_words=12):
+    # Preferred tier for a message and why, from its length and wording alone.
+    # Cached: chat traffic repeats the same short messages a lot.
+    normalized = " ".join(_PUNCTUATION.sub(" ", message.lower()).split())
+    if normalized in SIMPLE_MESSAGES:
+        return "simple", "keyword"
+    words = normalized.split()
+    if any(word in COMPLEX_WORDS for word in words):
+        return "full", "complex_keyword"
+    if len(words) > fast_max_words or "\n" in message.strip():
+        return "full", "long"
+    return "fast", "short"
+
+
+class TierStats:
+    # Rolling latency and error rate of recent model calls on one tier
+    def __init__(self, window=100):
+        self.latency = LatencyWindow(window)
+        self.outcomes = deque(maxlen=window)
+        self.calls = 0
+        self.errors = 0
+
+    def record(self, latency, ok):
+        self.latency.add(latency)
+        self.outcomes.append(ok)
+        self.calls += 1
+        self.errors += 0 if ok else 1
+
+    def error_rate(self):
+        if not self.outcomes:
+            return 0.0
+        return 1.0 - sum(self.outcomes) / len(self.outcomes)
+
+    def to_dict(self):
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "recent_error_rate": round(self.error_rate(), 3),
+            "p50_ms": round(self.latency.percentile(0.50, 0.0) * 1000, 1),
+            "p95_ms": round(self.latency.percentile(0.95, 0.0) * 1000, 1),
+        }
+
+
+class ModelRouter:
+    # Sends each general message to the cheapest tier likely to answer it well:
+    # the rule-based responder, a fast model with a short history, or the full
+    # model. The classifier's choice is then adjusted by how the model tiers are
+    # doing: a tier with a high recent error rate is avoided, and the fast tier
+    # is skipped when it isn't actually faster. Every `probe_every`-th message
+    # kept off a tier still goes there, so its stats can recover.
+    def __init__(self, enabled=True, fast_available=True, fast_max_words=12,
+                 max_error_rate=0.3, min_samples=10, probe_every=20, window=100):
+        self.enabled = enabled
+        self.fast_available = fast_available
+        self.fast_max_words = fast_max_words
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.probe_every = probe_every
+        self.tiers = {"fast": TierStats(window), "full": TierStats(window)}
+        self.lock = threading.Lock()
+        self.decisions = {tier: 0 for tier in TIERS}
+        self.reasons = {}
+        self.diverted = 0
+
+    def _unhealthy(self, tier):
+        stats = self.tiers[tier]
+        return len(stats.outcomes) >= self.min_samples and stats.error_rate() > self.max_error_rate
+
+    def _fast_is_slower(self):
+        fast, full = self.tiers["fast"].latency, self.tiers["full"].latency
+        if len(fast) < self.min_samples or len(full) < self.min_samples:
+            return False
+        return fast.percentile(0.95) >= full.percentile(0.95)
+
+    def _adjust(self, tier):
+        # Move a model message off a struggling tier, or None to keep it
+        if tier == "fast" and not self.fast_available:
+            return "full", "no_fast_tier"
+        if tier == "fast" and self._unhealthy("fast"):
+            return "full", "fast_unhealthy"
+        if tier == "fast" and self._fast_is_slower():
+            return "full", "fast_slower"
+        if tier == "full" and self.fast_available and self._unhealthy("full") and not self._unhealthy("fast"):
+            return "fast", "full_unhealthy"
+        return None
+
+    def route(self, message):
+        # (tier, reason) for one message
+        if not self.enabled:
+            tier, reason = "full", "disabled"
+        else:
+            tier, reason = classify(message, self.fast_max_words)
+            if tier != "simple":
+                with self.lock:
+                    adjusted = self._adjust(tier)
+                    if adjusted and adjusted[1] != "no_fast_tier":
+                        self.diverted += 1
+                        if self.diverted % self.probe_every == 0:
+                            adjusted, reason = None, "probe"
+                if adjusted:
+                    tier, reason = adjusted
+
+        with self.lock:
+            self.decisions[tier] += 1
+            self.reasons[reason] = self.reasons.get(reason, 0) + 1
+        return tier, reason
+
+    def record(self, tier, latency, ok):
+        # Outcome of one model call (seconds, success) on a model tier
+        with self.lock:
+            self.tiers[tier].record(latency, ok)
+
+    def stats(self):
+        cache = classify.cache_info()
+        with self.lock:
+            return {
+                "enabled": self.enabled,
+                "fast_tier": self.fast_available,
+                "decisions": dict(self.decisions),
+                "reasons": dict(self.reasons),
+                "tiers": {tier: stats.to_dict() for tier, stats in self.tiers.items()},
+                "classifier_cache": {"hits": cache.hits, "misses": cache.misses},
+            }
+
+
+def create_model_router(fast_available):
+    # Build the router from environment settings
+    return ModelRouter(
+        enabled=os.getenv("MODEL_ROUTING", "true").lower() in ("1", "true", "yes"),
+        fast_available=fast_available,
+        fast_max_words=int(os.getenv("ROUTER_FAST_MAX_WORDS", "12")),
+        max_error_rate=float(os.getenv("ROUTER_MAX_ERROR_RATE", "0.3")),
+    )
@@ -1,15 +1,17 @@
+import os
 import spacy
 import logging
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
 try:
-    nlp = spacy.load("en_core_web_sm")
-    logger.info("spaCy model 'en_core_web_sm' loaded successfully.")
+    nlp = spacy.load(SPACY_MODEL)
+    logger.info("spaCy model '%s' loaded successfully.", SPACY_MODEL)
 except OSError:
-    logger.error("spaCy model 'en_core_web_sm' not found.")
-    logger.error("Please run: python -m spacy download en_core_web_sm")
+    logger.error("spaCy model '%s' not found.", SPACY_MODEL)
+    logger.error("Please run: python -m spacy download %s", SPACY_MODEL)
     nlp = None 
 
 def analyze_message(message):
@@ -18,10 +20,19 @@ def analyze_message(message):
          logger.warning("spaCy model not loaded. Skipping NLU analysis.")
          return {"intent": "general", "entities": []}  # Just return general intent if NLU isn't working
 
-    doc = nlp(message)
+    return analyze_doc(nlp(message), message)
+
+def analyze_messages(messages):
+    # Batch version of analyze_message; nlp.pipe amortizes per-call overhead
+    if nlp is None:
+         return [{"intent": "general", "entities": []} for _ in messages]
+
+    return [analyze_doc(doc, message) for doc, message in zip(nlp.pipe(messages), messages)]
 
+def analyze_doc(doc, message):
+    # Pull entities and intent out of an already processed message
     entities = [(ent.label_, ent.text) for ent in doc.ents]
-    logger.debug(f"Entities found: {entities}")
+    logger.debug("Entities found: %s", entities)
 
     lower_message = message.lower()
     intent = "general" # Default intent
@@ -34,7 +45,7 @@ def analyze_message(message):
     elif any(word in lower_message for word in ["time", "hour", "clock"]):
         intent = "get_time"
 
-    logger.debug(f"Detected intent: {intent}")
+    logger.debug("Detected intent: %s", intent)
     return {"intent": intent, "entities": entities}
 
 def fetch_weather(entities):
@@ -0,0 +1,143 @@
+import concurrent.futures
+import multiprocessing
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures.process import BrokenProcessPool
+
+import nlu
+
+
+class NLUBatcher:
+    # Runs spaCy in a process pool so NLU isn't serialized on the GIL. Messages
+    # from concurrent requests are collected into micro-batches, flushed when
+    # `max_batch` messages are waiting or the oldest has waited `max_wait`
+    # seconds, and each batch goes through nlp.pipe in one worker. If a worker
+    # process dies the pool is replaced, so later messages are analyzed again.
+    def __init__(self, workers=2, max_batch=16, max_wait=0.005, analyze_batch=nlu.analyze_messages):
+        self.workers = workers
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        # Runs in the worker processes, so it must be a module-level function
+        self.analyze_batch = analyze_batch
+        self.pending = deque()
+        self.condition = threading.Condition()
+        self.lock = threading.Lock()
+        self.pool = None
+        self.pid = None
+        self.counters = {"batches": 0, "messages": 0, "errors": 0, "pool_restarts": 0}
+
+    def _ensure_started(self):
+        # Start the pool and dispatcher lazily, and again after fork(), so a
+        # pre-forked worker never inherits its parent's pool
+        with self.lock:
+            if self.pool is not None and self.pid == os.getpid():
+                return
+            self.pool = self._new_pool()
+            self.pid = os.getpid()
+            self.pending = deque()
+            # At most two batches per worker in flight; the rest keep batching up
+            self.slots = threading.BoundedSemaphore(self.workers * 2)
+            threading.Thread(target=self._dispatch_loop, name="nlu-batcher", daemon=True).start()
+
+    def _new_pool(self):
+        methods = multiprocessing.get_all_start_methods()
+        # Forked workers share the already loaded model copy-on-write
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        return concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+
+    def _replace_pool(self, broken):
+        # A worker died (OOM, a crash in spaCy) and took the executor with it;
+        # every later submit would fail, so start a fresh one
+        with self.lock:
+            if self.pool is not broken:
+                return
+            # Not shut down here: this can run on the broken executor's own
+            # management thread, which cleans it up as it exits
+            self.pool = self._new_pool()
+            self.counters["pool_restarts"] += 1
+
+    def analyze(self, message, timeout=5.0):
+        # Same result as nlu.analyze_message, computed in a worker process
+        self._ensure_started()
+        future = concurrent.futures.Future()
+        with self.condition:
+            self.pending.append((message, future, time.monotonic()))
+            self.condition.notify()
+        return future.result(timeout=timeout)
+
+    def _dispatch_loop(self):
+        while True:
+            with self.condition:
+                while not self.pending:
+                    self.condition.wait()
+                flush_at = self.pending[0][2] + self.max_wait
+                while len(self.pending) < self.max_batch:
+                    remaining = flush_at - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.condition.wait(remaining)
+                batch = [self.pending.popleft() for _ in range(min(self.max_batch, len(self.pending)))]
+
+            self.slots.acquire()
+            messages = [message for message, _, _ in batch]
+            pool = self.pool
+            try:
+                try:
+                    pool_future = pool.submit(self.analyze_batch, messages)
+                except BrokenProcessPool:
+                    # Broken by an earlier batch; this one never ran, so retry it
+                    self._replace_pool(pool)
+                    pool = self.pool
+                    pool_future = pool.submit(self.analyze_batch, messages)
+            except Exception as e:
+                self.slots.release()
+                self._fail(batch, e)
+                continue
+            pool_future.add_done_callback(lambda f, batch=batch, pool=pool: self._deliver(f, batch, pool))
+
+    def _deliver(self, pool_future, batch, pool):
+        self.slots.release()
+        try:
+            results = pool_future.result()
+        except Exception as e:
+            if isinstance(e, BrokenProcessPool):
+                # Not retried: this batch may be what killed the worker
+                self._replace_pool(pool)
+            self._fail(batch, e)
+            return
+        with self.lock:
+            self.counters["batches"] += 1
+            self.counters["messages"] += len(batch)
+        for (_, future, _), result in zip(batch, results):
+            future.set_result(result)
+
+    def _fail(self, batch, error):
+        with self.lock:
+            self.counters["errors"] += 1
+        for _, future, _ in batch:
+            future.set_exception(error)
+
+    def stats(self):
+        with self.lock:
+            counters = dict(self.counters)
+        return {
+            "workers": self.workers,
+            "max_batch": self.max_batch,
+            "max_wait_ms": self.max_wait * 1000,
+            **counters,
+            "avg_batch_size": round(counters["messages"] / counters["batches"], 2) if counters["batches"] else 0.0,
+        }
+
+
+def create_nlu_batcher():
+    # None unless NLU_WORKERS asks for a process pool
+    workers = int(os.getenv("NLU_WORKERS", "0"))
+    if workers <= 0:
+        return None
+    return NLUBatcher(
+        workers=workers,
+        max_batch=int(os.getenv("NLU_MAX_BATCH", "16")),
+        max_wait=float(os.getenv("NLU_MAX_WAIT_MS", "5")) / 1000,
+    )
@@ -0,0 +1,190 @@
+"""Pre-forking server for the chatbot backend.
+
+The master imports the app once, which loads spaCy's en_core_web_sm, the
+Gemini SDK and the module-level tables, then freezes the GC heap and forks
+workers that share those pages copy-on-write. Workers accept connections from
+one shared listening socket.
+
+Usage:
+    python prefork.py --workers 4 [--port 5003] [--report-after 30]
+
+Send SIGUSR1 to the master to print a per-worker memory report.
+
+Each worker keeps its own in-memory state: conversation memory, the reply
+cache, WebSocket sessions and (unless RATE_LIMIT_STORE=redis) rate-limit
+buckets. Connections go to whichever worker accepts them, so with more than
+one worker a session's requests are spread across those copies.
+"""
+import argparse
+import gc
+import logging
+import os
+import signal
+import socket
+import sys
+import time
+
+logger = logging.getLogger("prefork")
+
+
+def read_smaps_rollup(pid):
+    # Memory breakdown in kB from /proc/<pid>/smaps_rollup (Linux only)
+    values = {}
+    with open(f"/proc/{pid}/smaps_rollup", "r") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 3 and parts[1].isdigit():
+                values[parts[0].rstrip(":")] = int(parts[1])
+    return values
+
+
+def memory_report(master_pid, worker_pids):
+    # Unique (private) vs shared memory per process. Unique memory is what each
+    # extra worker really costs; shared pages are paid once across all of them.
+    rows = []
+    for role, pid in [("master", master_pid)] + [("worker", pid) for pid in worker_pids]:
+        try:
+            mem = read_smaps_rollup(pid)
+        except OSError:
+            continue
+        rows.append({
+            "role": role,
+            "pid": pid,
+            "rss_kb": mem.get("Rss", 0),
+            "pss_kb": mem.get("Pss", 0),
+            "unique_kb": mem.get("Private_Clean", 0) + mem.get("Private_Dirty", 0),
+            "shared_kb": mem.get("Shared_Clean", 0) + mem.get("Shared_Dirty", 0),
+        })
+    return rows
+
+
+def format_memory_report(rows):
+    lines = [f"{'role':<8}{'pid':>8}{'rss MB':>10}{'pss MB':>10}{'unique MB':>11}{'shared MB':>11}"]
+    for row in rows:
+        lines.append(
+            f"{row['role']:<8}{row['pid']:>8}{row['rss_kb'] / 1024:>10.1f}{row['pss_kb'] / 1024:>10.1f}"
+            f"{row['unique_kb'] / 1024:>11.1f}{row['shared_kb'] / 1024:>11.1f}"
+        )
+    workers = [row for row in rows if row["role"] == "worker"]
+    if workers:
+        total_rss = sum(row["rss_kb"] for row in workers) / 1024
+        total_pss = sum(row["pss_kb"] for row in workers) / 1024
+        lines.append(
+            f"{len(workers)} workers: sum of RSS {total_rss:.1f} MB, actual (PSS) {total_pss:.1f} MB, "
+            f"{total_pss / len(workers):.1f} MB per worker"
+        )
+    return "\n".join(lines)
+
+
+def preload():
+    # Import everything workers need while GC is off, then move the surviving
+    # objects into the permanent generation. Collections in the workers then
+    # never traverse (and so never write to) these shared pages.
+    gc.disable()
+    import chatbot
+    gc.collect()
+    gc.freeze()
+    return chatbot
+
+
+def per_worker_state(chatbot):
+    # Names of the stores that each worker keeps to itself
+    state = ["conversation memory", "reply cache", "WebSocket sessions"]
+    if type(chatbot.rate_limiter.store).__name__ == "InMemoryBucketStore":
+        state.append("rate-limit buckets")
+    return state
+
+
+def run_worker(chatbot, sock, host, port):
+    from werkzeug.serving import make_server
+
+    gc.enable()
+    # Network clients hold sockets and threads, so each worker makes its own
+    chatbot.ai_client = chatbot.init_gemini_client()
+    chatbot.fast_client = chatbot.init_gemini_client("fast") if chatbot.ai_client else None
+    server = make_server(host, port, chatbot.app, threaded=True, fd=sock.fileno())
+    signal.signal(signal.SIGTERM, lambda *_: os._exit(0))
+    logger.info("Worker %d serving on %s:%d", os.getpid(), host, port)
+    server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the chatbot backend with pre-forked workers.")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", "4")))
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=5003)
+    parser.add_argument("--report-after", type=float, default=0,
+                        help="Print a memory report this many seconds after start (0 to skip)")
+    args = parser.parse_args()
+
+    if not os.path.exists("/proc/self/smaps_rollup"):
+        print("Memory reports need Linux /proc; they will be skipped.", file=sys.stderr)
+
+    chatbot = preload()
+    if args.workers > 1:
+        state = per_worker_state(chatbot)
+        logger.warning(
+            "Running %d workers, each with its own %s. A session's requests can reach "
+            "different workers: its history is split between them, /history ETags change "
+            "from one request to the next and WebSocket resume only works on the same worker.%s",
+            args.workers, ", ".join(state),
+            " Rate limits apply per worker; set RATE_LIMIT_STORE=redis to share them."
+            if "rate-limit buckets" in state else "",
+        )
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(128)
+    sock.set_inheritable(True)
+
+    workers = set()
+
+    def spawn():
+        pid = os.fork()
+        if pid == 0:
+            try:
+                run_worker(chatbot, sock, args.host, args.port)
+            finally:
+                os._exit(1)
+        workers.add(pid)
+
+    def print_report(*_):
+        print(format_memory_report(memory_report(os.getpid(), sorted(workers))), flush=True)
+
+    def shutdown(*_):
+        for pid in list(workers):
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        sys.exit(0)
+
+    signal.signal(signal.SIGUSR1, print_report)
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    for _ in range(args.workers):
+        spawn()
+    logger.info("Master %d started %d workers on %s:%d", os.getpid(), args.workers, args.host, args.port)
+
+    report_at = time.monotonic() + args.report_after if args.report_after else None
+    while True:
+        # Replace workers that die; wake up now and then for the scheduled report
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            pid = 0
+        if pid:
+            workers.discard(pid)
+            logger.warning("Worker %d exited with status %d, restarting", pid, status)
+            spawn()
+            continue
+        if report_at and time.monotonic() >= report_at:
+            print_report()
+            report_at = None
+        time.sleep(0.5)
+
+
+if __name__ == "__main__":
+    main()
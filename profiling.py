@@ -0,0 +1,122 @@
+import cProfile
+import hmac
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+PROFILE_MODES = ("deterministic", "sampling")
+UNSAFE_NAME_CHARS = re.compile(r"[^A-Za-z0-9_-]")
+
+
+class StackSampler:
+    # Samples one thread's Python stack at a fixed interval from a background
+    # thread and counts identical stacks, i.e. flamegraph "collapsed" format
+    def __init__(self, thread_id, interval=0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def write_collapsed(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+class RequestProfiler:
+    # Profiles individual requests on demand. A request asks for a profile with
+    # an X-Profile header (deterministic or sampling), which only counts when it
+    # also carries the admin token; otherwise `sample_rate` of requests are
+    # profiled at random. Profiles only cover the request thread.
+    def __init__(self, directory="profiles", admin_token=None, sample_rate=0.0,
+                 default_mode="deterministic", sampling_interval=0.005):
+        self.directory = directory
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.default_mode = default_mode if default_mode in PROFILE_MODES else "deterministic"
+        self.sampling_interval = sampling_interval
+        # cProfile can't run in two threads at once, so concurrent requests
+        # asking for a deterministic profile just run unprofiled
+        self._deterministic_lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return bool(self.admin_token) or self.sample_rate > 0
+
+    def mode_for(self, headers):
+        # Which profiler to run for a request with these headers, or None
+        requested = headers.get("X-Profile")
+        if requested and self.admin_token and hmac.compare_digest(
+            headers.get("X-Admin-Token", ""), self.admin_token
+        ):
+            return requested if requested in PROFILE_MODES else self.default_mode
+        if self.sample_rate > 0 and random.random() < self.sample_rate:
+            return self.default_mode
+        return None
+
+    def run(self, mode, trace_id, fn, *args, **kwargs):
+        # Call fn under the profiler; returns (result, path of the written profile),
+        # with no path when the profiler was busy
+        os.makedirs(self.directory, exist_ok=True)
+        # The trace id can come from a client header; never let it pick the path
+        name = UNSAFE_NAME_CHARS.sub("_", str(trace_id))[:64] or "request"
+        stamp = f"{time.strftime('%Y%m%d-%H%M%S')}-{name}"
+
+        if mode == "sampling":
+            sampler = StackSampler(threading.get_ident(), self.sampling_interval)
+            sampler.start()
+            try:
+                result = fn(*args, **kwargs)
+            finally:
+                sampler.stop()
+                path = os.path.join(self.directory, f"{stamp}.folded")
+                sampler.write_collapsed(path)
+            return result, path
+
+        if not self._deterministic_lock.acquire(blocking=False):
+            return fn(*args, **kwargs), None
+        try:
+            profiler = cProfile.Profile()
+            try:
+                result = profiler.runcall(fn, *args, **kwargs)
+            finally:
+                path = os.path.join(self.directory, f"{stamp}.pstats")
+                profiler.dump_stats(path)
+        finally:
+            self._deterministic_lock.release()
+        return result, path
+
+
+def create_request_profiler():
+    # Build the profiler from environment settings
+    return RequestProfiler(
+        directory=os.getenv("PROFILE_DIR", "profiles"),
+        admin_token=os.getenv("PROFILE_ADMIN_TOKEN") or None,
+        sample_rate=float(os.getenv("PROFILE_SAMPLE_RATE", "0")),
+        default_mode=os.getenv("PROFILE_MODE", "deterministic"),
+        sampling_interval=float(os.getenv("PROFILE_SAMPLING_INTERVAL_MS", "5")) / 1000,
+    )
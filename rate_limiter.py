@@ -0,0 +1,159 @@
+import math
+import os
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+
+def budgets_from_env():
+    # Budgets are (capacity, refill rate in tokens per second). Model calls cost
+    # quota and seconds of latency, so they get a much smaller budget than the
+    # intent handlers and rule-based replies.
+    return {
+        "model": (
+            float(os.getenv("RATE_LIMIT_MODEL_BURST", "5")),
+            float(os.getenv("RATE_LIMIT_MODEL_PER_MINUTE", "10")) / 60.0,
+        ),
+        "simple": (
+            float(os.getenv("RATE_LIMIT_SIMPLE_BURST", "20")),
+            float(os.getenv("RATE_LIMIT_SIMPLE_PER_MINUTE", "60")) / 60.0,
+        ),
+    }
+
+
+class InMemoryBucketStore:
+    # Keeps token buckets in a bounded LRU dict, each check is O(1)
+    def __init__(self, max_keys=10000):
+        self.buckets = OrderedDict()
+        self.max_keys = max_keys
+        self.lock = threading.Lock()
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        # Refill the bucket for the elapsed time and try to take `cost` tokens.
+        # Returns (allowed, remaining tokens, seconds until enough tokens).
+        now = time.monotonic()
+        with self.lock:
+            tokens, last = self.buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - last) * rate)
+            if tokens >= cost:
+                tokens -= cost
+                allowed, retry_after = True, 0.0
+            else:
+                allowed, retry_after = False, (cost - tokens) / rate
+            self.buckets[key] = (tokens, now)
+            self.buckets.move_to_end(key)
+            if len(self.buckets) > self.max_keys:
+                # Oldest bucket is idle long enough to be full again anyway
+                self.buckets.popitem(last=False)
+        return allowed, tokens, retry_after
+
+
+class RedisBucketStore:
+    # Shares buckets between worker processes through Redis. The refill and
+    # take happen in one Lua script so concurrent workers can't double-spend.
+    SCRIPT = """
+    local capacity = tonumber(ARGV[1])
+    local rate = tonumber(ARGV[2])
+    local now = tonumber(ARGV[3])
+    local cost = tonumber(ARGV[4])
+    local data = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    local tokens = tonumber(data[1]) or capacity
+    local ts = tonumber(data[2]) or now
+    tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+    local allowed = 0
+    local retry_after = 0
+    if tokens >= cost then
+        tokens = tokens - cost
+        allowed = 1
+    else
+        retry_after = (cost - tokens) / rate
+    end
+    redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+    redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+    return {allowed, tostring(tokens), tostring(retry_after)}
+    """
+
+    def __init__(self, url, prefix="ratelimit:"):
+        if redis is None:
+            raise RuntimeError("RATE_LIMIT_STORE=redis requires the 'redis' package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+        self.script = self.client.register_script(self.SCRIPT)
+        self.prefix = prefix
+
+    def consume(self, key, capacity, rate, cost=1.0):
+        allowed, tokens, retry_after = self.script(
+            keys=[self.prefix + key],
+            args=[capacity, rate, time.time(), cost],
+        )
+        return bool(allowed), float(tokens), float(retry_after)
+
+
+class RateLimiter:
+    # Per-client token-bucket limiter with a separate budget per request class.
+    # Session ids are chosen by the client, so a request is also charged to its
+    # IP's bucket, ip_multiplier times as large (several users can share an IP).
+    def __init__(self, store=None, budgets=None, enabled=True, ip_multiplier=4.0):
+        self.store = store or InMemoryBucketStore()
+        self.budgets = budgets or budgets_from_env()
+        self.enabled = enabled
+        self.ip_multiplier = ip_multiplier
+        self.counters = {name: {"allowed": 0, "limited": 0} for name in self.budgets}
+        self.counter_lock = threading.Lock()
+
+    def check(self, client_key, budget, cost=1.0, ip=None):
+        # Returns (allowed, retry_after_seconds) for this client and budget
+        if not self.enabled:
+            return True, 0
+        capacity, rate = self.budgets[budget]
+        buckets = [(f"{budget}:{client_key}", capacity, rate)]
+        if ip and client_key != f"ip:{ip}":
+            buckets.append((f"{budget}:ip:{ip}", capacity * self.ip_multiplier, rate * self.ip_multiplier))
+        try:
+            # A request the session bucket refuses isn't charged to the IP
+            for key, capacity, rate in buckets:
+                allowed, _, retry_after = self.store.consume(key, capacity, rate, cost)
+                if not allowed:
+                    break
+        except Exception as e:
+            # A broken shared store shouldn't take the chat endpoint down with it
+            logger.error("Rate limit store failed, allowing request: %s", e)
+            return True, 0
+
+        with self.counter_lock:
+            self.counters[budget]["allowed" if allowed else "limited"] += 1
+        return allowed, math.ceil(retry_after)
+
+    def stats(self):
+        # Snapshot of allowed/limited counts per budget
+        with self.counter_lock:
+            counters = {name: dict(values) for name, values in self.counters.items()}
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "ip_multiplier": self.ip_multiplier,
+            "budgets": {
+                name: {"burst": capacity, "per_minute": rate * 60}
+                for name, (capacity, rate) in self.budgets.items()
+            },
+            "counters": counters,
+        }
+
+
+def create_rate_limiter():
+    # Build the limiter from environment settings
+    enabled = os.getenv("RATE_LIMIT_ENABLED", "true").lower() not in ("0", "false", "no")
+    store_type = os.getenv("RATE_LIMIT_STORE", "memory").lower()
+    if store_type == "redis":
+        store = RedisBucketStore(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+    else:
+        store = InMemoryBucketStore()
+    ip_multiplier = float(os.getenv("RATE_LIMIT_IP_MULTIPLIER", "4"))
+    return RateLimiter(store=store, enabled=enabled, ip_multiplier=ip_multiplier)
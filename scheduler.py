@@ -0,0 +1,205 @@
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+PRIORITY_CLASSES = ("interactive", "batch")
+
+
+class QueueDeadlineExceeded(Exception):
+    # Raised when a request waited longer than its deadline for a model slot
+    pass
+
+
+class _Waiter:
+    # One request waiting for a model slot
+    def __init__(self, session_id, priority, cost, deadline):
+        self.session_id = session_id
+        self.priority = priority
+        self.cost = cost
+        self.deadline = deadline
+        self.enqueued_at = time.monotonic()
+        self.event = threading.Event()
+        self.granted = False
+        self.expired = False
+
+
+class _FairQueue:
+    # Deficit round robin across sessions within one priority class. Each
+    # session gets `quantum` units of credit per turn, so a session sending
+    # many (or large) requests can't push everyone else to the back.
+    def __init__(self, quantum):
+        self.quantum = quantum
+        self.sessions = OrderedDict()  # session id -> deque of waiters, in round order
+        self.deficits = {}
+
+    def __len__(self):
+        return sum(len(waiters) for waiters in self.sessions.values())
+
+    def push(self, waiter):
+        if waiter.session_id not in self.sessions:
+            self.sessions[waiter.session_id] = deque()
+            self.deficits[waiter.session_id] = 0
+        self.sessions[waiter.session_id].append(waiter)
+
+    def remove(self, waiter):
+        waiters = self.sessions.get(waiter.session_id)
+        if waiters and waiter in waiters:
+            waiters.remove(waiter)
+            if not waiters:
+                self._drop_session(waiter.session_id)
+
+    def pop(self):
+        # Return the next waiter in DRR order, or None when empty
+        while self.sessions:
+            session_id, waiters = next(iter(self.sessions.items()))
+            head = waiters[0]
+            if self.deficits[session_id] < head.cost:
+                self.deficits[session_id] += self.quantum
+                if self.deficits[session_id] < head.cost:
+                    self.sessions.move_to_end(session_id)
+                    continue
+
+            waiters.popleft()
+            self.deficits[session_id] -= head.cost
+            if not waiters:
+                self._drop_session(session_id)
+            elif self.deficits[session_id] < waiters[0].cost:
+                # Turn is over, next session goes first
+                self.sessions.move_to_end(session_id)
+            return head
+        return None
+
+    def _drop_session(self, session_id):
+        # Idle sessions don't keep credit, as in standard DRR
+        del self.sessions[session_id]
+        del self.deficits[session_id]
+
+
+class ModelScheduler:
+    # Limits concurrent model calls and decides who goes next when saturated.
+    # Interactive traffic is preferred over batch by weighted round robin between
+    # the classes, and sessions share each class fairly through DRR.
+    def __init__(self, max_concurrency=4, deadlines=None, weights=None, quantum=1000):
+        self.max_concurrency = max_concurrency
+        self.deadlines = deadlines or {"interactive": 15.0, "batch": 60.0}
+        self.weights = weights or {"interactive": 4, "batch": 1}
+        self.queues = {priority: _FairQueue(quantum) for priority in PRIORITY_CLASSES}
+        self.in_flight = 0
+        self.lock = threading.Lock()
+        self._class_turns = deque()
+
+        self.wait_samples = {priority: deque(maxlen=1000) for priority in PRIORITY_CLASSES}
+        self.counters = {priority: {"granted": 0, "dropped": 0} for priority in PRIORITY_CLASSES}
+
+    @contextmanager
+    def slot(self, session_id, priority="interactive", cost=1):
+        # Hold a model slot for the duration of the with-block
+        self.acquire(session_id, priority, cost)
+        try:
+            yield
+        finally:
+            self.release()
+
+    def acquire(self, session_id, priority="interactive", cost=1):
+        if priority not in self.queues:
+            priority = "interactive"
+        deadline = time.monotonic() + self.deadlines[priority]
+        waiter = _Waiter(session_id, priority, max(1, cost), deadline)
+
+        with self.lock:
+            self.queues[priority].push(waiter)
+            self._dispatch()
+
+        waiter.event.wait(max(0.0, deadline - time.monotonic()))
+
+        with self.lock:
+            if not waiter.granted:
+                # Timed out in the queue, or dropped during dispatch
+                if not waiter.expired:
+                    self.queues[priority].remove(waiter)
+                    self._record_drop(waiter)
+                raise QueueDeadlineExceeded(
+                    f"Waited {time.monotonic() - waiter.enqueued_at:.1f}s for a model slot"
+                )
+
+    def release(self):
+        with self.lock:
+            self.in_flight -= 1
+            self._dispatch()
+
+    def _next_class(self):
+        # Weighted round robin over classes that have someone waiting
+        for _ in range(2):
+            if not self._class_turns:
+                for priority in PRIORITY_CLASSES:
+                    self._class_turns.extend([priority] * self.weights.get(priority, 1))
+            while self._class_turns:
+                priority = self._class_turns.popleft()
+                if len(self.queues[priority]):
+                    return priority
+        return None
+
+    def _dispatch(self):
+        # Hand free slots to waiters, dropping any whose deadline already passed
+        # so stale requests never reach the model. Caller holds the lock.
+        now = time.monotonic()
+        while self.in_flight < self.max_concurrency:
+            priority = self._next_class()
+            if priority is None:
+                return
+            waiter = self.queues[priority].pop()
+            if waiter.deadline <= now:
+                waiter.expired = True
+                self._record_drop(waiter)
+                waiter.event.set()
+                continue
+
+            waiter.granted = True
+            self.in_flight += 1
+            self.counters[priority]["granted"] += 1
+            self.wait_samples[priority].append(now - waiter.enqueued_at)
+            waiter.event.set()
+
+    def _record_drop(self, waiter):
+        self.counters[waiter.priority]["dropped"] += 1
+
+    def stats(self):
+        # Queue depth, counters and queue-wait percentiles per priority class
+        with self.lock:
+            result = {
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "classes": {},
+            }
+            for priority in PRIORITY_CLASSES:
+                samples = sorted(self.wait_samples[priority])
+                result["classes"][priority] = {
+                    "queued": len(self.queues[priority]),
+                    **self.counters[priority],
+                    "queue_wait_ms": {
+                        "p50": round(_percentile(samples, 0.50) * 1000, 1),
+                        "p95": round(_percentile(samples, 0.95) * 1000, 1),
+                        "max": round((samples[-1] if samples else 0.0) * 1000, 1),
+                    },
+                }
+        return result
+
+
+def _percentile(sorted_samples, fraction):
+    if not sorted_samples:
+        return 0.0
+    index = min(len(sorted_samples) - 1, int(fraction * len(sorted_samples)))
+    return sorted_samples[index]
+
+
+def create_model_scheduler():
+    # Build the scheduler from environment settings
+    return ModelScheduler(
+        max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", "4")),
+        deadlines={
+            "interactive": float(os.getenv("QUEUE_DEADLINE_INTERACTIVE", "15")),
+            "batch": float(os.getenv("QUEUE_DEADLINE_BATCH", "60")),
+        },
+    )
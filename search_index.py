@@ -0,0 +1,288 @@
+import bisect
+import heapq
+import itertools
+import json
+import operator
+import os
+import re
+import struct
+import threading
+import zlib
+from array import array
+
+_WORD = re.compile(r"\w+")
+
+# File layout: MAGIC, then two zlib blocks each prefixed with its length
+# (4 bytes, little endian): a JSON header (sources, tokens, posting lengths)
+# and the posting data as unsigned 32-bit ints: each document's source and
+# row, then every token's postings delta-encoded, in header order.
+MAGIC = b"CHATIDX1"
+
+
+def tokenize(text):
+    # Lowercased words of a message or query
+    return _WORD.findall(text.lower())
+
+
+def _deltas(postings):
+    return array("I", itertools.chain(postings[:1], map(operator.sub, postings[1:], postings[:-1])))
+
+
+class SearchIndex:
+    # Inverted index over chat messages: token -> ascending array of document
+    # ids, where a document is one message, (source, row). A source is a
+    # transcript file (or the live session) and is replaced as a whole when it
+    # is indexed again; its old documents are skipped by searches and dropped
+    # on save. Thread-safe: a background indexer can add while the UI searches.
+    def __init__(self, max_expansions=50):
+        self.max_expansions = max_expansions
+        self.lock = threading.RLock()
+        self.postings = {}
+        self.vocabulary = []           # sorted tokens, for prefix lookups
+        self.new_tokens = []           # not merged into vocabulary yet
+        self.doc_source = array("I")
+        self.doc_row = array("I")
+        self.sources = []              # {"name", "mtime", "size", "live"}
+        self.live = {}                 # source name -> id
+
+    def __len__(self):
+        return len(self.doc_source)
+
+    def _source_id(self, name, mtime=None, size=None):
+        source_id = self.live.get(name)
+        if source_id is None:
+            source_id = len(self.sources)
+            self.sources.append({"name": name, "mtime": mtime, "size": size, "live": True})
+            self.live[name] = source_id
+        return source_id
+
+    def _postings_for(self, token):
+        postings = self.postings.get(token)
+        if postings is None:
+            postings = self.postings[token] = array("I")
+            self.new_tokens.append(token)
+        return postings
+
+    def _add_postings(self, doc_id, text):
+        for token in set(tokenize(text)):
+            self._postings_for(token).append(doc_id)
+
+    def _merge_vocabulary(self):
+        # Fold new tokens into the sorted vocabulary once there are enough of
+        # them to slow down prefix lookups; timsort merges the sorted runs in
+        # linear time
+        if len(self.new_tokens) > 1000:
+            self.new_tokens.sort()
+            self.vocabulary += self.new_tokens
+            self.vocabulary.sort()
+            self.new_tokens = []
+
+    def add(self, source, row, text):
+        # Index one message as it's added to a transcript
+        with self.lock:
+            doc_id = len(self.doc_source)
+            self.doc_source.append(self._source_id(source))
+            self.doc_row.append(row)
+            self._add_postings(doc_id, text)
+            self._merge_vocabulary()
+
+    def add_many(self, source, first_row, texts):
+        # Index consecutive messages of one transcript
+        with self.lock:
+            source_id = self._source_id(source)
+            for row, text in enumerate(texts, first_row):
+                doc_id = len(self.doc_source)
+                self.doc_source.append(source_id)
+                self.doc_row.append(row)
+                self._add_postings(doc_id, text)
+            self._merge_vocabulary()
+
+    def drop(self, source):
+        # Forget a source; its documents no longer match
+        with self.lock:
+            source_id = self.live.pop(source, None)
+            if source_id is not None:
+                self.sources[source_id]["live"] = False
+
+    def index_source(self, source, texts, mtime=None, size=None, cancelled=None):
+        # (Re)index a whole transcript file. Tokenizing happens before taking
+        # the lock, so searches only wait for the merge. If cancelled() turns
+        # true while tokenizing, the index is left as it was and this returns
+        # False.
+        rows = []
+        for text in texts:
+            if cancelled is not None and len(rows) % 1000 == 0 and cancelled():
+                return False
+            rows.append(set(tokenize(text)))
+        with self.lock:
+            self.drop(source)
+            source_id = self._source_id(source, mtime, size)
+            first_doc = len(self.doc_source)
+            self.doc_source.extend(itertools.repeat(source_id, len(rows)))
+            self.doc_row.extend(range(len(rows)))
+            for offset, tokens in enumerate(rows):
+                for token in tokens:
+                    self._postings_for(token).append(first_doc + offset)
+            self._merge_vocabulary()
+        return True
+
+    def source_names(self):
+        # Names of the sources currently indexed
+        with self.lock:
+            return list(self.live)
+
+    def is_current(self, source, mtime, size):
+        # Whether source is indexed as of this modification time and size
+        with self.lock:
+            source_id = self.live.get(source)
+            return source_id is not None and (self.sources[source_id]["mtime"], self.sources[source_id]["size"]) == (mtime, size)
+
+    def _expand(self, prefix):
+        # Postings of the tokens starting with prefix; past max_expansions,
+        # only the most frequent ones (as search-as-you-type engines do)
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        end = bisect.bisect_left(self.vocabulary, prefix + "\U0010ffff", start)
+        tokens = self.vocabulary[start:end] + [token for token in self.new_tokens if token.startswith(prefix)]
+        lists = [self.postings[token] for token in tokens]
+        if len(lists) > self.max_expansions:
+            lists = heapq.nlargest(self.max_expansions, lists, key=len)
+        return lists
+
+    @staticmethod
+    def _window(lists, lo, hi):
+        # The part of each postings list with document ids in [lo, hi)
+        return [postings[bisect.bisect_left(postings, lo):bisect.bisect_left(postings, hi)] for postings in lists]
+
+    @staticmethod
+    def _intersect(matches, lists):
+        # Documents of matches that appear in any of lists. Each list is either
+        # scanned by set.intersection (C speed per posting) or probed with a
+        # binary search per match, whichever touches fewer items.
+        found = set()
+        for postings in lists:
+            if len(postings) < 20 * len(matches):
+                found.update(matches.intersection(postings))
+                continue
+            for doc_id in matches:
+                i = bisect.bisect_left(postings, doc_id)
+                if i < len(postings) and postings[i] == doc_id:
+                    found.add(doc_id)
+        return found
+
+    def search(self, query, limit=50):
+        # (source, row) of messages containing every word of the query, most
+        # recently indexed first. The last word matches as a prefix unless the
+        # query ends with a space, so results follow the user as they type.
+        words = tokenize(query)
+        if not words:
+            return []
+        prefix = words.pop() if _WORD.match(query[-1]) else None
+
+        with self.lock:
+            groups = [[self.postings[word]] if word in self.postings else [] for word in dict.fromkeys(words)]
+            if prefix is not None:
+                groups.append(self._expand(prefix))
+            if not all(groups):
+                return []
+            groups.sort(key=lambda lists: sum(map(len, lists)))
+            # Intersect newest documents first, in windows that double in size,
+            # so common words stop after a small window and rare ones still
+            # get an exhaustive search. Within a window the rarest term is
+            # narrowed down by the others.
+            results = []
+            hi, size = len(self.doc_source), 4096
+            while hi > 0 and len(results) < limit:
+                lo = max(0, hi - size)
+                matches = set().union(*self._window(groups[0], lo, hi))
+                for lists in groups[1:]:
+                    if not matches:
+                        break
+                    matches = self._intersect(matches, self._window(lists, lo, hi))
+                for doc_id in sorted(matches, reverse=True):
+                    source = self.sources[self.doc_source[doc_id]]
+                    if source["live"]:
+                        results.append((source["name"], self.doc_row[doc_id]))
+                        if len(results) == limit:
+                            break
+                hi, size = lo, size * 2
+            return results
+
+    def stats(self):
+        with self.lock:
+            return {
+                "messages": len(self.doc_source),
+                "tokens": len(self.postings),
+                "sources": len(self.live),
+            }
+
+    def save(self, path):
+        # Write the live part of the index to path (atomically)
+        with self.lock:
+            sources = [dict(source) for source in self.sources]
+            doc_source = array("I", self.doc_source)
+            doc_row = array("I", self.doc_row)
+            postings = {token: array("I", ids) for token, ids in self.postings.items()}
+
+        # Renumber sources and documents so dropped ones take no space
+        kept = [source_id for source_id, source in enumerate(sources) if source["live"]]
+        if len(kept) < len(sources):
+            source_map = {old: new for new, old in enumerate(kept)}
+            doc_map, new_source, new_row = {}, array("I"), array("I")
+            for doc_id, (source_id, row) in enumerate(zip(doc_source, doc_row)):
+                if source_id in source_map:
+                    doc_map[doc_id] = len(new_source)
+                    new_source.append(source_map[source_id])
+                    new_row.append(row)
+            doc_source, doc_row = new_source, new_row
+            postings = {
+                token: array("I", (doc_map[doc_id] for doc_id in ids if doc_id in doc_map))
+                for token, ids in postings.items()
+            }
+            postings = {token: ids for token, ids in postings.items() if ids}
+            sources = [sources[source_id] for source_id in kept]
+
+        tokens = sorted(postings)
+        header = {
+            "sources": [{key: source[key] for key in ("name", "mtime", "size")} for source in sources],
+            "tokens": tokens,
+            "lengths": [len(postings[token]) for token in tokens],
+        }
+        body = zlib.compressobj(6)
+        chunks = [body.compress(doc_source.tobytes()), body.compress(doc_row.tobytes())]
+        for token in tokens:
+            chunks.append(body.compress(_deltas(postings[token]).tobytes()))
+        chunks.append(body.flush())
+        header_block = zlib.compress(json.dumps(header, ensure_ascii=False).encode("utf-8"))
+        body_block = b"".join(chunks)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC)
+            f.write(struct.pack("<I", len(header_block)))
+            f.write(header_block)
+            f.write(struct.pack("<I", len(body_block)))
+            f.write(body_block)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, **kwargs):
+        # An index saved with save()
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a search index")
+            header = json.loads(zlib.decompress(f.read(struct.unpack("<I", f.read(4))[0])))
+            data = array("I")
+            data.frombytes(zlib.decompress(f.read(struct.unpack("<I", f.read(4))[0])))
+
+        index = cls(**kwargs)
+        for source in header["sources"]:
+            index._source_id(source["name"], source["mtime"], source["size"])
+        docs = (len(data) - sum(header["lengths"])) // 2
+        index.doc_source = data[:docs]
+        index.doc_row = data[docs:2 * docs]
+        offset = 2 * docs
+        for token, length in zip(header["tokens"], header["lengths"]):
+            index.postings[token] = array("I", itertools.accumulate(data[offset:offset + length]))
+            offset += length
+        index.vocabulary = list(header["tokens"])
+        return index
@@ -0,0 +1,263 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# One GUI session on disk, in a single directory:
+#   <session id>.jsonl          append-only journal, one operation per line
+#                                 {"seq": n, "op": "add", "messages": [...]}
+#                                 {"seq": n, "op": "clear"}
+#   <session id>.snapshot.json  the transcript up to journal entry "seq", in the
+#                               same format as a saved conversation
+# Recovery loads the snapshot and replays journal entries with a higher seq, so
+# a crash between writing a snapshot and truncating the journal loses nothing
+# and duplicates nothing.
+
+JOURNAL_SUFFIX = ".jsonl"
+SNAPSHOT_SUFFIX = ".snapshot.json"
+
+
+def read_session(directory, session_id):
+    # (messages, last seq) for a session, from its snapshot plus its journal
+    messages, seq = [], 0
+    try:
+        with open(os.path.join(directory, session_id + SNAPSHOT_SUFFIX), encoding="utf-8") as f:
+            snapshot = json.load(f)
+        messages, seq = snapshot["messages"], snapshot["metadata"]["seq"]
+    except FileNotFoundError:
+        pass
+
+    try:
+        with open(os.path.join(directory, session_id + JOURNAL_SUFFIX), encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # Torn final write of a session that crashed
+                    continue
+                if entry["seq"] <= seq:
+                    continue
+                seq = entry["seq"]
+                if entry["op"] == "clear":
+                    messages = []
+                elif entry["op"] == "add":
+                    messages.extend(entry["messages"])
+    except FileNotFoundError:
+        pass
+    return messages, seq
+
+
+def _session_files(directory):
+    # session id -> newest modification time of its files
+    sessions = {}
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return sessions
+    for name in names:
+        for suffix in (SNAPSHOT_SUFFIX, JOURNAL_SUFFIX):
+            if name.endswith(suffix):
+                session_id = name[:-len(suffix)]
+                mtime = os.path.getmtime(os.path.join(directory, name))
+                sessions[session_id] = max(mtime, sessions.get(session_id, 0))
+                break
+    return sessions
+
+
+def latest_session(directory):
+    # Id of the most recently written session in directory, or None
+    sessions = _session_files(directory)
+    return max(sessions, key=sessions.get) if sessions else None
+
+
+class SessionJournal:
+    # Durable autosave for one session. The UI thread only enqueues; a
+    # background writer appends to the journal and fsyncs at most once per
+    # fsync_interval, so a burst of messages costs one disk flush. Every
+    # compact_every entries (and on close) the journal is folded into the
+    # snapshot and truncated. The writer keeps its own copy of the transcript,
+    # which is what exports are written from, off the UI thread. Messages shown
+    # but not persisted (a conversation opened from a file) only go into that
+    # copy.
+    def __init__(self, directory, session_id, fsync_interval=1.0, compact_every=1000, keep_sessions=20):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.session_id = session_id
+        self.journal_path = os.path.join(directory, session_id + JOURNAL_SUFFIX)
+        self.snapshot_path = os.path.join(directory, session_id + SNAPSHOT_SUFFIX)
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.keep_sessions = keep_sessions
+
+        self.messages, self.seq = read_session(directory, session_id)
+        self.recovered = list(self.messages)
+        self.transcript = list(self.messages)
+        self.since_compaction = 0
+        self.queue = queue.Queue()
+        self.thread = threading.Thread(target=self._run, name="session-journal", daemon=True)
+        self.thread.start()
+
+    def append(self, messages, persist=True):
+        # Record messages added to the transcript. Without persist they are
+        # only included in exports (they are already saved elsewhere).
+        self.queue.put(("add" if persist else "show", list(messages)))
+
+    def clear(self):
+        # Record that the transcript was cleared
+        self.queue.put(("clear", None))
+
+    def archive(self, session_id, done=None):
+        # Move the persisted transcript into a past session with this id and
+        # start over empty. done(error) is called on the writer thread.
+        self.queue.put(("archive", (session_id, done)))
+
+    def export(self, path, write, done=None):
+        # Write the transcript as of now to path with write(f, messages), on the
+        # writer thread. done(error) is called there afterwards (None on success).
+        self.queue.put(("export", (path, write, done)))
+
+    def close(self, timeout=5.0):
+        # Finish pending work, compact, and stop the writer
+        self.queue.put(("close", None))
+        self.thread.join(timeout)
+
+    def _prune(self):
+        # Drop the files of all but the newest keep_sessions sessions
+        sessions = _session_files(self.directory)
+        sessions.pop(self.session_id, None)
+        for session_id in sorted(sessions, key=sessions.get)[:max(0, len(sessions) - self.keep_sessions + 1)]:
+            for suffix in (SNAPSHOT_SUFFIX, JOURNAL_SUFFIX):
+                try:
+                    os.remove(os.path.join(self.directory, session_id + suffix))
+                except FileNotFoundError:
+                    pass
+
+    def _record(self, journal, op, messages):
+        self.seq += 1
+        entry = {"seq": self.seq, "op": op}
+        if op == "add":
+            entry["messages"] = messages
+            self.messages.extend(messages)
+            self.transcript.extend(messages)
+        else:
+            self.messages = []
+            self.transcript = []
+        journal.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.since_compaction += 1
+
+    def _write_atomically(self, path, write, messages):
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            write(f, messages)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def _compact(self, journal):
+        # Fold the journal into the snapshot; returns the (now empty) journal
+        journal.flush()
+        os.fsync(journal.fileno())
+        self._write_snapshot(self.snapshot_path, self.session_id)
+        journal.close()
+        self.since_compaction = 0
+        return open(self.journal_path, "w", encoding="utf-8")
+
+    def _reopen(self, journal):
+        # A compaction that failed after closing the journal leaves it closed.
+        # Append to whatever is on disk: replay skips entries the snapshot covers.
+        if not journal.closed:
+            return journal
+        try:
+            return open(self.journal_path, "a", encoding="utf-8")
+        except OSError as e:
+            logger.warning("Session journal reopen failed: %s", e)
+            return journal
+
+    def _write_snapshot(self, path, session_id):
+        metadata = {
+            "session_id": session_id,
+            "seq": self.seq,
+            "saved_at": datetime.now().isoformat(),
+            "message_count": len(self.messages),
+        }
+        self._write_atomically(
+            path,
+            lambda f, messages: json.dump({"metadata": metadata, "messages": messages}, f, ensure_ascii=False),
+            self.messages,
+        )
+
+    def _run(self):
+        self._prune()
+        journal = open(self.journal_path, "a", encoding="utf-8")
+        if journal.tell():
+            # Left over from a session that didn't close cleanly; start from a
+            # fresh snapshot rather than appending after a possibly torn line
+            journal = self._compact(journal)
+        unsynced = False
+        last_sync = time.monotonic()
+        closing = False
+        while not closing:
+            try:
+                ops = [self.queue.get(timeout=self.fsync_interval if unsynced else None)]
+            except queue.Empty:
+                ops = []
+            while True:
+                try:
+                    ops.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            journal = self._reopen(journal)
+            try:
+                for op, arg in ops:
+                    if op == "close":
+                        closing = True
+                    elif op == "export":
+                        path, write, done = arg
+                        try:
+                            journal = self._compact(journal)
+                            unsynced = False
+                            self._write_atomically(path, write, self.transcript)
+                            error = None
+                        except Exception as e:
+                            error = str(e)
+                        if done:
+                            done(error)
+                    elif op == "archive":
+                        session_id, done = arg
+                        try:
+                            self._write_snapshot(os.path.join(self.directory, session_id + SNAPSHOT_SUFFIX), session_id)
+                            # Recorded after the archive is written, so this
+                            # session stays the most recently written one
+                            self._record(journal, "clear", None)
+                            unsynced = True
+                            error = None
+                        except Exception as e:
+                            error = str(e)
+                        if done:
+                            done(error)
+                    elif op == "show":
+                        self.transcript.extend(arg)
+                    else:
+                        self._record(journal, op, arg)
+                        unsynced = True
+
+                journal.flush()
+                if unsynced and (closing or time.monotonic() - last_sync >= self.fsync_interval):
+                    os.fsync(journal.fileno())
+                    unsynced = False
+                    last_sync = time.monotonic()
+                if self.since_compaction >= self.compact_every or (closing and self.since_compaction):
+                    journal = self._compact(journal)
+            except (OSError, ValueError) as e:
+                # ValueError: writing to a journal left closed by a failed compaction
+                logger.warning("Session journal write failed: %s", e)
+        journal.close()
+        if self.seq == 0:
+            # Nothing was ever recorded; don't leave an empty session behind
+            os.remove(self.journal_path)
@@ -0,0 +1,97 @@
+import concurrent.futures
+import threading
+import time
+
+
+class Speculation:
+    # A model call started before we know whether it's needed
+    def __init__(self, owner, future, timings, cancel):
+        self.owner = owner
+        self.future = future
+        self.timings = timings
+        self.cancel = cancel
+
+    def take(self):
+        # The request needs the model after all: wait for the head-started call.
+        # Latency saved is however much of the call ran before we'd have started it.
+        needed_at = time.perf_counter()
+        try:
+            return self.future.result()
+        finally:
+            started = self.timings.get("start", needed_at)
+            ended = self.timings.get("end", needed_at)
+            saved = max(0.0, min(needed_at, ended) - started)
+            self.owner._record("used", saved)
+
+    def discard(self):
+        # An intent handler answered; drop the model call if it hasn't started,
+        # otherwise tell it to stop (it gives up its model slot and stops
+        # generating at the next chunk) and ignore the result
+        if self.future.cancel():
+            self.owner._record("cancelled")
+        else:
+            self.cancel.set()
+            self.owner._record("wasted")
+
+
+class HeldTokens:
+    # on_token for a speculative call: streamed text is held back until the
+    # request takes the result, so a discarded call never reaches the client
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.held = []
+        self.target = None
+
+    def __call__(self, text):
+        with self.lock:
+            if self.target is None:
+                self.held.append(text)
+            else:
+                self.target(text)
+
+    def release(self, target):
+        # Forward everything held so far, in order, and pass the rest straight on
+        with self.lock:
+            for text in self.held:
+                target(text)
+            self.held = []
+            self.target = target
+
+
+class SpeculativeModelCalls:
+    # Runs model calls concurrently with NLU/intent handling and keeps score
+    # of how much latency that saves versus how many upstream calls it wastes
+    def __init__(self, max_workers=8):
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="speculative")
+        self.lock = threading.Lock()
+        self.counters = {"started": 0, "used": 0, "cancelled": 0, "wasted": 0}
+        self.saved_ms_total = 0.0
+
+    def start(self, fn, *args, **kwargs):
+        # fn also gets a `cancel` event, set when the call is discarded
+        timings = {}
+        cancel = threading.Event()
+
+        def run():
+            timings["start"] = time.perf_counter()
+            try:
+                return fn(*args, cancel=cancel, **kwargs)
+            finally:
+                timings["end"] = time.perf_counter()
+
+        self._record("started")
+        return Speculation(self, self.executor.submit(run), timings, cancel)
+
+    def _record(self, outcome, saved_seconds=0.0):
+        with self.lock:
+            self.counters[outcome] += 1
+            self.saved_ms_total += saved_seconds * 1000
+
+    def stats(self):
+        with self.lock:
+            used = self.counters["used"]
+            return {
+                **self.counters,
+                "saved_ms_total": round(self.saved_ms_total, 1),
+                "saved_ms_avg": round(self.saved_ms_total / used, 1) if used else 0.0,
+            }
@@ -0,0 +1,102 @@
+import threading
+import unittest
+from types import SimpleNamespace
+
+from generation import FirstParagraphStreamer, GenerationCancelled, first_paragraph
+
+
+class ChunkedModel:
+    # Streams the given chunks and records how far the consumer read
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.sent = 0
+        self.closed = False
+
+    def generate_content(self, prompt, stream=True):
+        def chunks():
+            try:
+                for text in self.chunks:
+                    self.sent += 1
+                    yield SimpleNamespace(text=text)
+            finally:
+                self.closed = True
+        return chunks()
+
+
+class FirstParagraphTest(unittest.TestCase):
+    def test_first_line(self):
+        self.assertEqual(first_paragraph("Hello there.\n\nMore text"), "Hello there.")
+        self.assertEqual(first_paragraph("  \nHi!\n"), "Hi!")
+
+    def test_no_paragraph_break_yet(self):
+        self.assertIsNone(first_paragraph("Hello there, how"))
+        self.assertIsNone(first_paragraph(""))
+
+    def test_prefix_is_removed(self):
+        self.assertEqual(first_paragraph("Chatbot: Sure thing.\nNext"), "Sure thing.")
+        self.assertEqual(first_paragraph("Chatbot:\nOn the next line\n"), "On the next line")
+        self.assertIsNone(first_paragraph("Chatbot: still typ"))
+
+    def test_break_inside_a_code_fence(self):
+        text = "```python\nx = 1\n\ny = 2\n```\nExplanation\n"
+        self.assertEqual(first_paragraph(text), "```python\nx = 1\n\ny = 2\n```")
+        self.assertIsNone(first_paragraph("```python\nx = 1\n\ny = 2\n"))
+        self.assertEqual(first_paragraph("Chatbot: ```\nkey: value\n```\n"), "```\nkey: value\n```")
+
+    def test_unclosed_fence_at_the_end(self):
+        self.assertEqual(first_paragraph("```\nx = 1\n", final=True), "```\nx = 1")
+
+
+class FirstParagraphStreamerTest(unittest.TestCase):
+    def setUp(self):
+        self.streamer = FirstParagraphStreamer()
+
+    def test_stops_after_the_first_paragraph(self):
+        model = ChunkedModel(["Hello ", "there.\n", "Second ", "paragraph\n", "never read"])
+        tokens = []
+        self.assertEqual(self.streamer.generate(model, "prompt", tokens.append), "Hello there.\n")
+        self.assertEqual(tokens, ["Hello ", "there.\n"])
+        self.assertEqual(model.sent, 2)
+        self.assertTrue(model.closed)
+        self.assertEqual(self.streamer.stats()["early_stops"], 1)
+
+    def test_stream_without_a_paragraph_break(self):
+        model = ChunkedModel(["One ", "long ", "line"])
+        self.assertEqual(self.streamer.generate(model, "prompt"), "One long line")
+        self.assertEqual(model.sent, 3)
+        stats = self.streamer.stats()
+        self.assertEqual((stats["streams"], stats["early_stops"], stats["early_stop_rate"]), (1, 0, 0.0))
+
+    def test_stream_ending_mid_paragraph(self):
+        model = ChunkedModel(["Chatbot: ", "cut off in the mid"])
+        text = self.streamer.generate(model, "prompt")
+        self.assertEqual(text, "Chatbot: cut off in the mid")
+        self.assertIsNone(first_paragraph(text))
+        self.assertEqual(first_paragraph(text + "\n", final=True), "cut off in the mid")
+
+    def test_keeps_streaming_through_a_code_fence(self):
+        model = ChunkedModel(["```py\n", "x = 1\n", "\n", "y = 2\n", "```\n", "Explanation\n"])
+        text = self.streamer.generate(model, "prompt")
+        self.assertEqual(text, "```py\nx = 1\n\ny = 2\n```\n")
+        self.assertEqual(model.sent, 5)
+
+    def test_cancelled(self):
+        cancel = threading.Event()
+        model = ChunkedModel(["a ", "b ", "c\n"])
+
+        def on_token(text):
+            cancel.set()
+
+        with self.assertRaises(GenerationCancelled):
+            self.streamer.generate(model, "prompt", on_token, cancel)
+        self.assertEqual(model.sent, 2)
+        self.assertTrue(model.closed)
+        self.assertEqual(self.streamer.stats()["cancelled"], 1)
+
+        with self.assertRaises(GenerationCancelled):
+            self.streamer.generate(ChunkedModel(["never"]), "prompt", cancel=cancel)
+        self.assertEqual(self.streamer.stats()["streams"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
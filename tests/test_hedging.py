@@ -0,0 +1,146 @@
+import concurrent.futures
+import threading
+import time
+import unittest
+
+from hedging import HedgedModelCaller, LatencyWindow
+
+
+def warm(caller, seconds, count=20):
+    # Fill the attempt history so the caller starts hedging
+    for _ in range(count):
+        caller.attempt_latency.add(seconds)
+
+
+class LatencyWindowTest(unittest.TestCase):
+    def test_percentile(self):
+        window = LatencyWindow(size=100)
+        self.assertEqual(window.percentile(0.95, default=1.5), 1.5)
+        for ms in range(1, 101):
+            window.add(ms / 1000)
+        self.assertEqual(window.percentile(0.50), 0.051)
+        self.assertEqual(window.percentile(0.95), 0.096)
+        self.assertEqual(window.percentile(1.0), 0.1)
+
+    def test_window_keeps_recent_samples(self):
+        window = LatencyWindow(size=10)
+        for _ in range(10):
+            window.add(5.0)
+        for _ in range(10):
+            window.add(0.1)
+        self.assertEqual(len(window), 10)
+        self.assertEqual(window.percentile(0.99), 0.1)
+
+
+class HedgeDelayTest(unittest.TestCase):
+    def test_no_delay_without_history(self):
+        caller = HedgedModelCaller(enabled=True)
+        warm(caller, 0.5, count=19)
+        self.assertIsNone(caller.hedge_delay())
+        caller.attempt_latency.add(0.5)
+        self.assertEqual(caller.hedge_delay(), 0.5)
+
+    def test_delay_follows_percentile_with_floor(self):
+        caller = HedgedModelCaller(enabled=True, hedge_percentile=0.9, min_delay=0.2)
+        for ms in range(10, 1010, 10):
+            caller.attempt_latency.add(ms / 1000)
+        self.assertEqual(caller.hedge_delay(), 0.91)
+
+        fast = HedgedModelCaller(enabled=True, min_delay=0.2)
+        warm(fast, 0.01)
+        self.assertEqual(fast.hedge_delay(), 0.2)
+
+
+class HedgeBudgetTest(unittest.TestCase):
+    def test_budget_caps_hedged_fraction(self):
+        caller = HedgedModelCaller(enabled=True, max_hedge_ratio=0.125)
+        caller.hedge_budget = 0.0
+        taken = 0
+        for _ in range(40):
+            with caller.lock:
+                caller.hedge_budget = min(10.0, caller.hedge_budget + caller.max_hedge_ratio)
+            taken += caller._take_hedge_budget()
+        self.assertEqual(taken, 5)
+        self.assertEqual(caller.counters["hedged"], 5)
+        self.assertEqual(caller.counters["budget_denied"], 35)
+
+    def test_slow_calls_hedged_only_within_budget(self):
+        caller = HedgedModelCaller(enabled=True, hedge_percentile=0.5, min_delay=0.01, max_hedge_ratio=0.25)
+        warm(caller, 0.01, count=100)
+        caller.hedge_budget = 0.0
+
+        def slow(cancel):
+            cancel.event.wait(0.05)
+            return "ok"
+
+        for _ in range(8):
+            self.assertEqual(caller.call(slow, timeout=2), "ok")
+        stats = caller.stats()
+        self.assertEqual(stats["calls"], 8)
+        self.assertEqual(stats["hedged"], 2)
+        self.assertEqual(stats["hedge_rate"], 0.25)
+
+    def test_unhedged_calls(self):
+        caller = HedgedModelCaller(enabled=True, min_delay=0.01)
+        warm(caller, 0.01)
+        caller.call(lambda cancel: time.sleep(0.05), timeout=2, hedge=False)
+        self.assertEqual(caller.counters["hedged"], 0)
+
+
+class HedgeCancelTest(unittest.TestCase):
+    def setUp(self):
+        self.caller = HedgedModelCaller(enabled=True, min_delay=0.02)
+        warm(self.caller, 0.02)
+
+    def test_losing_attempt_is_cancelled(self):
+        attempts = []
+        stopped = threading.Event()
+
+        def fn(cancel):
+            attempts.append(cancel)
+            if len(attempts) == 1:
+                # The primary hangs until told to stop
+                self.assertTrue(cancel.event.wait(2))
+                stopped.set()
+                return "primary"
+            return "hedge"
+
+        self.assertEqual(self.caller.call(fn, timeout=2), "hedge")
+        self.assertTrue(stopped.wait(2))
+        self.assertTrue(attempts[0].is_set())
+        self.assertFalse(attempts[1].is_set())
+        self.assertEqual(self.caller.counters["hedge_wins"], 1)
+
+    def test_timed_out_attempts_are_cancelled(self):
+        attempts = []
+
+        def fn(cancel):
+            attempts.append(cancel)
+            cancel.event.wait(2)
+
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            self.caller.call(fn, timeout=0.1)
+        self.assertEqual(len(attempts), 2)
+        self.assertTrue(all(attempt.is_set() for attempt in attempts))
+
+    def test_caller_cancel_reaches_attempts(self):
+        outer = threading.Event()
+        seen = []
+
+        def fn(cancel):
+            outer.set()
+            seen.append(cancel.is_set())
+            return "done"
+
+        self.caller.call(fn, timeout=2, hedge=False, cancel=outer)
+        self.assertEqual(seen, [True])
+
+    def test_cancelled_attempts_do_not_skew_the_delay(self):
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            self.caller.call(lambda cancel: cancel.event.wait(2), timeout=0.1, hedge=False)
+        time.sleep(0.05)
+        self.assertEqual(len(self.caller.attempt_latency), 20)
+
+
+if __name__ == "__main__":
+    unittest.main()
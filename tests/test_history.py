@@ -0,0 +1,45 @@
+import unittest
+
+import chatbot
+
+
+class HistoryETagTest(unittest.TestCase):
+    def setUp(self):
+        self.client = chatbot.app.test_client()
+
+    def get_history(self, session_id, etag=None):
+        headers = {"X-Session-ID": session_id}
+        if etag:
+            headers["If-None-Match"] = etag
+        return self.client.get("/history", headers=headers)
+
+    def test_unchanged_history_is_not_modified(self):
+        chatbot.sessions.get("session:etag-same").add_message("user", "hello")
+        first = self.get_history("etag-same")
+        self.assertEqual(first.status_code, 200)
+        again = self.get_history("etag-same", first.headers["ETag"])
+        self.assertEqual(again.status_code, 304)
+
+    def test_etag_of_another_session_does_not_match(self):
+        # Same version, cursor and limit, different conversation
+        chatbot.sessions.get("session:etag-a").add_message("user", "my name is Alice")
+        chatbot.sessions.get("session:etag-b").add_message("user", "my name is Bob")
+        etag_a = self.get_history("etag-a").headers["ETag"]
+        response = self.get_history("etag-b", etag_a)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["messages"][0][3], "my name is Bob")
+
+    def test_etag_does_not_survive_eviction(self):
+        chatbot.sessions.get("session:etag-evicted").add_message("user", "first life")
+        etag = self.get_history("etag-evicted").headers["ETag"]
+        # Dropped as least recently used, then recreated at the same version
+        with chatbot.sessions.lock:
+            del chatbot.sessions.sessions["session:etag-evicted"]
+        chatbot.sessions.get("session:etag-evicted").add_message("user", "second life")
+        response = self.get_history("etag-evicted", etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["messages"][0][3], "second life")
+
+
+if __name__ == "__main__":
+    unittest.main()
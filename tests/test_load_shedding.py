@@ -0,0 +1,50 @@
+import unittest
+from types import SimpleNamespace
+
+import chatbot
+from load_shedding import ReplyCache
+
+QUESTION = "Could you remind me what name I gave you earlier in our conversation?"
+
+
+class NameModel:
+    # Answers every prompt with the same session-specific fact
+    def generate_content(self, prompt, stream=True):
+        return iter([SimpleNamespace(text="Your name is Alice.")])
+
+
+class ReplyCacheTest(unittest.TestCase):
+    def test_replies_are_kept_per_session(self):
+        cache = ReplyCache()
+        cache.put("session:alice", "What is my name?", "Your name is Alice.")
+        self.assertEqual(cache.get("session:alice", "what is my name"), "Your name is Alice.")
+        self.assertIsNone(cache.get("session:bob", "what is my name"))
+
+
+class DegradedReplyIsolationTest(unittest.TestCase):
+    def setUp(self):
+        self.client = chatbot.app.test_client()
+        self.saved = (chatbot.ai_client, chatbot.SHED_ENABLED, chatbot.concurrency_limit.limit)
+        chatbot.ai_client = NameModel()
+        chatbot.SHED_ENABLED = True
+
+    def tearDown(self):
+        chatbot.ai_client, chatbot.SHED_ENABLED, chatbot.concurrency_limit.limit = self.saved
+
+    def chat(self, session_id):
+        return self.client.post("/chat", json={"message": QUESTION}, headers={"X-Session-ID": session_id}).get_json()
+
+    def test_cached_reply_is_not_served_to_another_session(self):
+        self.assertEqual(self.chat("shed-alice")["reply"], "Your name is Alice.")
+
+        # Overloaded: every model call is shed
+        chatbot.concurrency_limit.limit = 0
+        alice = self.chat("shed-alice")
+        self.assertEqual((alice["reply"], alice["degraded_source"]), ("Your name is Alice.", "cache"))
+        bob = self.chat("shed-bob")
+        self.assertEqual(bob["degraded_source"], "simple")
+        self.assertNotIn("Alice", bob["reply"])
+
+
+if __name__ == "__main__":
+    unittest.main()
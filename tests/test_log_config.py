@@ -0,0 +1,102 @@
+import itertools
+import json
+import logging
+import sys
+import unittest
+from unittest import mock
+
+from log_config import SamplingFilter, StructuredFormatter
+
+
+def make_record(level=logging.INFO, msg="hello %s", args=("world",), **extra):
+    record = logging.LogRecord("chatbot", level, __file__, 10, msg, args, None)
+    record.created = 0.0
+    record.threadName = "worker-1"
+    for key, value in extra.items():
+        setattr(record, key, value)
+    return record
+
+
+class SamplingFilterTest(unittest.TestCase):
+    def run_filter(self, log_filter, count=1000, **extra):
+        return sum(log_filter.filter(make_record(**extra)) for _ in range(count))
+
+    def test_keeps_the_configured_fraction(self):
+        # random() walks evenly through [0, 1), so exactly rate of them pass
+        draws = itertools.cycle([n / 100 for n in range(100)])
+        with mock.patch("log_config.random.random", lambda: next(draws)):
+            log_filter = SamplingFilter(0.25)
+            self.assertEqual(self.run_filter(log_filter, sample=True), 250)
+        self.assertEqual(log_filter.sampled_out, 750)
+
+    def test_rate_with_real_randomness(self):
+        log_filter = SamplingFilter(0.1)
+        kept = self.run_filter(log_filter, count=10000, sample=True)
+        self.assertGreater(kept, 800)
+        self.assertLess(kept, 1200)
+        self.assertEqual(kept + log_filter.sampled_out, 10000)
+
+    def test_only_opted_in_records_are_sampled(self):
+        log_filter = SamplingFilter(0.0)
+        self.assertEqual(self.run_filter(log_filter), 1000)
+        self.assertEqual(self.run_filter(log_filter, sample=False), 1000)
+        self.assertEqual(self.run_filter(log_filter, sample=True), 0)
+
+    def test_warnings_always_pass(self):
+        log_filter = SamplingFilter(0.0)
+        self.assertEqual(self.run_filter(log_filter, level=logging.WARNING, sample=True), 1000)
+        self.assertEqual(self.run_filter(log_filter, level=logging.ERROR, sample=True), 1000)
+        self.assertEqual(log_filter.sampled_out, 0)
+
+    def test_full_rate_keeps_everything(self):
+        log_filter = SamplingFilter(1.0)
+        self.assertEqual(self.run_filter(log_filter, sample=True), 1000)
+
+
+class StructuredFormatterTest(unittest.TestCase):
+    def test_json_layout(self):
+        entry = json.loads(StructuredFormatter().format(make_record(session_id="abc", latency_ms=12.5, sample=True)))
+        self.assertEqual(entry, {
+            "ts": "1970-01-01T00:00:00+00:00",
+            "level": "INFO",
+            "logger": "chatbot",
+            "thread": "worker-1",
+            "msg": "hello world",
+            "session_id": "abc",
+            "latency_ms": 12.5,
+        })
+        self.assertEqual(list(entry)[:5], ["ts", "level", "logger", "thread", "msg"])
+
+    def test_exception_is_included(self):
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            record = make_record(level=logging.ERROR)
+            record.exc_info = sys.exc_info()
+        entry = json.loads(StructuredFormatter().format(record))
+        self.assertIn("ValueError: boom", entry["exc"])
+
+    def test_unserializable_fields_become_strings(self):
+        entry = json.loads(StructuredFormatter().format(make_record(path=object)))
+        self.assertEqual(entry["path"], str(object))
+
+    def test_content_is_truncated(self):
+        formatter = StructuredFormatter(max_content_chars=5)
+        entry = json.loads(formatter.format(make_record(content="abcdefghij")))
+        self.assertEqual(entry["content"], "abcde... <5 more chars>")
+        entry = json.loads(formatter.format(make_record(content="short")))
+        self.assertEqual(entry["content"], "short")
+
+    def test_content_is_redacted(self):
+        formatter = StructuredFormatter(redact_content=True)
+        entry = json.loads(formatter.format(make_record(content="secret message")))
+        self.assertEqual(entry["content"], "<redacted 14 chars>")
+
+    def test_plain_text_layout(self):
+        formatter = StructuredFormatter(as_json=False)
+        line = formatter.format(make_record(session_id="abc", content="hi"))
+        self.assertTrue(line.endswith(" - INFO - hello world session_id=abc content=hi"), line)
+
+
+if __name__ == "__main__":
+    unittest.main()
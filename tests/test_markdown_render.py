@@ -0,0 +1,56 @@
+import unittest
+
+from markdown_render import has_markup, render_html
+
+
+def render(text):
+    return render_html.__wrapped__(text)
+
+
+class EscapingTest(unittest.TestCase):
+    def test_plain_text_is_escaped(self):
+        self.assertEqual(render("a < b & <b>c</b>"), "a &lt; b &amp; &lt;b&gt;c&lt;/b&gt;")
+
+    def test_nested_spans_are_escaped_once(self):
+        self.assertEqual(render("**a <b> & *c<i>* d**"), "<b>a &lt;b&gt; &amp; <i>c&lt;i&gt;</i> d</b>")
+
+    def test_code_is_escaped_once(self):
+        self.assertEqual(render("`<b>&amp;</b>`"), "<code>&lt;b&gt;&amp;amp;&lt;/b&gt;</code>")
+        self.assertEqual(render("**see `x < y`**"), "<b>see <code>x &lt; y</code></b>")
+        self.assertEqual(render("*`a&b`*"), "<i><code>a&amp;b</code></i>")
+
+    def test_code_block_is_escaped_once(self):
+        self.assertEqual(render("```html\n<p>&amp;</p>\n```"), "<pre>&lt;p&gt;&amp;amp;&lt;/p&gt;</pre>")
+
+    def test_links_are_escaped_once(self):
+        link = '<a href="https://e.com/?a=1&amp;b=2">https://e.com/?a=1&amp;b=2</a>'
+        self.assertEqual(render("https://e.com/?a=1&b=2"), link)
+        self.assertEqual(render("**see https://e.com/?a=1&b=2**"), f"<b>see {link}</b>")
+        self.assertEqual(render("*https://e.com/?a=1&b=2*"), f"<i>{link}</i>")
+
+    def test_link_stops_at_markup_characters(self):
+        self.assertEqual(render('"https://e.com/x">'),
+                         '"<a href="https://e.com/x">https://e.com/x</a>"&gt;')
+
+
+class MarkupTest(unittest.TestCase):
+    def test_line_breaks_outside_code_blocks(self):
+        self.assertEqual(render("one\ntwo\n```\na\nb\n```\nthree"), "one<br>two<pre>a\nb</pre>three")
+
+    def test_fence_in_the_middle_of_a_line_is_text(self):
+        self.assertEqual(render("say ```py\nx"), "say ```py<br>x")
+
+    def test_unterminated_block_runs_to_the_end(self):
+        self.assertEqual(render("text\n```py\nprint(1)\n"), "text<pre>print(1)</pre>")
+
+    def test_stray_asterisks_are_kept(self):
+        self.assertEqual(render("2 * 3 * 4"), "2 * 3 * 4")
+
+    def test_has_markup(self):
+        self.assertFalse(has_markup("plain words"))
+        self.assertTrue(has_markup("see https://e.com"))
+        self.assertTrue(has_markup("**bold**"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+
+from model_router import ModelRouter, TierStats, classify
+
+
+def record_many(router, tier, count, latency=0.1, ok=True):
+    for _ in range(count):
+        router.record(tier, latency, ok)
+
+
+class ClassifyTest(unittest.TestCase):
+    def test_simple_messages(self):
+        for message in ("Thanks!", "  hello there ", "OK.", "How are you?"):
+            self.assertEqual(classify(message), ("simple", "keyword"), message)
+
+    def test_short_messages_go_to_the_fast_tier(self):
+        self.assertEqual(classify("what's the capital of France?"), ("fast", "short"))
+        self.assertEqual(classify("hello how is the weather"), ("fast", "short"))
+
+    def test_complex_wording_goes_to_the_full_model(self):
+        self.assertEqual(classify("why is the sky blue"), ("full", "complex_keyword"))
+        self.assertEqual(classify("Can you EXPLAIN this?"), ("full", "complex_keyword"))
+
+    def test_long_messages_go_to_the_full_model(self):
+        self.assertEqual(classify("one two three four five"), ("fast", "short"))
+        self.assertEqual(classify("one two three four five", fast_max_words=4), ("full", "long"))
+        self.assertEqual(classify("first line\nsecond line"), ("full", "long"))
+
+
+class TierStatsTest(unittest.TestCase):
+    def test_error_rate_covers_the_recent_window(self):
+        stats = TierStats(window=4)
+        self.assertEqual(stats.error_rate(), 0.0)
+        for ok in (False, False, True, True, True, True):
+            stats.record(0.1, ok)
+        self.assertEqual(stats.error_rate(), 0.0)
+        stats.record(0.1, False)
+        self.assertEqual(stats.error_rate(), 0.25)
+        self.assertEqual((stats.calls, stats.errors), (7, 3))
+
+    def test_to_dict(self):
+        stats = TierStats()
+        for seconds in (0.1, 0.2, 0.3, 0.4):
+            stats.record(seconds, True)
+        stats.record(1.0, False)
+        self.assertEqual(stats.to_dict(), {
+            "calls": 5,
+            "errors": 1,
+            "recent_error_rate": 0.2,
+            "p50_ms": 300.0,
+            "p95_ms": 1000.0,
+        })
+
+
+class ModelRouterTest(unittest.TestCase):
+    def test_routes_by_classifier(self):
+        router = ModelRouter()
+        self.assertEqual(router.route("thanks"), ("simple", "keyword"))
+        self.assertEqual(router.route("what time is it"), ("fast", "short"))
+        self.assertEqual(router.route("explain recursion"), ("full", "complex_keyword"))
+        self.assertEqual(router.stats()["decisions"], {"simple": 1, "fast": 1, "full": 1})
+
+    def test_disabled_router_uses_the_full_model(self):
+        router = ModelRouter(enabled=False)
+        self.assertEqual(router.route("thanks"), ("full", "disabled"))
+
+    def test_without_fast_tier(self):
+        router = ModelRouter(fast_available=False)
+        self.assertEqual(router.route("what time is it"), ("full", "no_fast_tier"))
+        self.assertEqual(router.diverted, 0)
+
+    def test_unhealthy_fast_tier_is_avoided(self):
+        router = ModelRouter(min_samples=10)
+        record_many(router, "fast", 6)
+        record_many(router, "fast", 4, ok=False)
+        self.assertEqual(router.route("what time is it"), ("full", "fast_unhealthy"))
+
+    def test_slower_fast_tier_is_skipped(self):
+        router = ModelRouter(min_samples=10)
+        record_many(router, "fast", 10, latency=2.0)
+        record_many(router, "full", 10, latency=1.0)
+        self.assertEqual(router.route("what time is it"), ("full", "fast_slower"))
+
+    def test_unhealthy_full_tier_falls_back_to_fast(self):
+        router = ModelRouter(min_samples=10)
+        record_many(router, "full", 10, ok=False)
+        self.assertEqual(router.route("explain recursion"), ("fast", "full_unhealthy"))
+        record_many(router, "fast", 10, ok=False)
+        self.assertEqual(router.route("explain recursion"), ("full", "complex_keyword"))
+
+    def test_diverted_tier_is_probed(self):
+        router = ModelRouter(min_samples=10, probe_every=5)
+        record_many(router, "fast", 10, ok=False)
+        routes = [router.route("what time is it") for _ in range(10)]
+        self.assertEqual(routes.count(("fast", "probe")), 2)
+        self.assertEqual(routes[4], ("fast", "probe"))
+        self.assertEqual(router.stats()["reasons"], {"fast_unhealthy": 8, "probe": 2})
+
+
+if __name__ == "__main__":
+    unittest.main()
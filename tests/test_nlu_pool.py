@@ -0,0 +1,72 @@
+import concurrent.futures
+import os
+import threading
+import time
+import unittest
+
+from nlu_pool import NLUBatcher
+
+
+# Batch functions run in the pool's worker processes, so they live at module level
+
+def echo_batch(messages):
+    return [{"intent": "general", "entities": [], "text": message, "pid": os.getpid()} for message in messages]
+
+
+def slow_batch(messages):
+    time.sleep(0.5)
+    return echo_batch(messages)
+
+
+def crashing_batch(messages):
+    if "crash" in messages:
+        os._exit(1)
+    return echo_batch(messages)
+
+
+class NLUBatcherTest(unittest.TestCase):
+    def batcher(self, analyze_batch, **kwargs):
+        batcher = NLUBatcher(workers=1, analyze_batch=analyze_batch, **kwargs)
+        self.addCleanup(lambda: batcher.pool.shutdown(wait=True, cancel_futures=True))
+        return batcher
+
+    def test_results_match_their_messages(self):
+        batcher = self.batcher(echo_batch)
+        self.assertEqual(batcher.analyze("hello")["text"], "hello")
+        self.assertNotEqual(batcher.analyze("again")["pid"], os.getpid())
+
+    def test_concurrent_messages_are_batched(self):
+        batcher = self.batcher(echo_batch, max_batch=4, max_wait=1.0)
+        results = {}
+
+        def analyze(message):
+            results[message] = batcher.analyze(message)["text"]
+
+        threads = [threading.Thread(target=analyze, args=(f"m{i}",)) for i in range(4)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # A full batch goes out without waiting for max_wait
+        self.assertLess(time.monotonic() - start, 1.0)
+        self.assertEqual(results, {f"m{i}": f"m{i}" for i in range(4)})
+        stats = batcher.stats()
+        self.assertEqual((stats["batches"], stats["messages"]), (1, 4))
+
+    def test_timeout(self):
+        batcher = self.batcher(slow_batch)
+        with self.assertRaises(concurrent.futures.TimeoutError):
+            batcher.analyze("slow", timeout=0.05)
+
+    def test_recovers_after_a_worker_dies(self):
+        batcher = self.batcher(crashing_batch)
+        with self.assertRaises(concurrent.futures.process.BrokenProcessPool):
+            batcher.analyze("crash")
+        self.assertEqual(batcher.analyze("hello")["text"], "hello")
+        self.assertEqual(batcher.stats()["pool_restarts"], 1)
+        self.assertEqual(batcher.stats()["errors"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
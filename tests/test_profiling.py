@@ -0,0 +1,27 @@
+import os
+import tempfile
+import unittest
+
+from profiling import RequestProfiler
+
+
+class ProfileFilenameTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "profiles")
+        self.profiler = RequestProfiler(directory=self.directory, admin_token="token")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_trace_id_cannot_leave_the_profile_directory(self):
+        for mode in ("deterministic", "sampling"):
+            result, path = self.profiler.run(mode, "../../escape/a b", sum, [1, 2])
+            self.assertEqual(result, 3)
+            self.assertEqual(os.path.dirname(path), self.directory)
+            self.assertTrue(os.path.isfile(path))
+            self.assertEqual(os.listdir(self.tmp.name), ["profiles"])
+
+
+if __name__ == "__main__":
+    unittest.main()
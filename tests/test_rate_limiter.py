@@ -0,0 +1,77 @@
+import unittest
+from unittest import mock
+
+from rate_limiter import InMemoryBucketStore, RateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class RateLimiterTest(unittest.TestCase):
+    def setUp(self):
+        self.clock = Clock()
+        patcher = mock.patch("rate_limiter.time.monotonic", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        # model: burst of 2, one token every 2 seconds; simple: burst of 5
+        self.limiter = RateLimiter(budgets={"model": (2, 0.5), "simple": (5, 1.0)}, ip_multiplier=2)
+
+    def test_burst_then_limited_with_retry_after(self):
+        self.assertEqual(self.limiter.check("session:a", "model"), (True, 0))
+        self.assertEqual(self.limiter.check("session:a", "model"), (True, 0))
+        self.assertEqual(self.limiter.check("session:a", "model"), (False, 2))
+        self.assertEqual(self.limiter.stats()["counters"]["model"], {"allowed": 2, "limited": 1})
+
+    def test_refill(self):
+        for _ in range(2):
+            self.limiter.check("session:a", "model")
+        self.clock.now += 1.0
+        self.assertEqual(self.limiter.check("session:a", "model"), (False, 1))
+        self.clock.now += 1.0
+        self.assertEqual(self.limiter.check("session:a", "model"), (True, 0))
+        # Never refills past the burst size
+        self.clock.now += 3600
+        results = [self.limiter.check("session:a", "model")[0] for _ in range(3)]
+        self.assertEqual(results, [True, True, False])
+
+    def test_budgets_are_separate(self):
+        for _ in range(2):
+            self.limiter.check("session:a", "model")
+        self.assertFalse(self.limiter.check("session:a", "model")[0])
+        self.assertTrue(self.limiter.check("session:a", "simple")[0])
+        self.assertTrue(self.limiter.check("session:b", "model")[0])
+
+    def test_new_session_ids_share_the_ip_bucket(self):
+        # The IP bucket holds ip_multiplier x 2 = 4 model tokens
+        results = [self.limiter.check(f"session:{i}", "model", ip="10.0.0.1")[0] for i in range(5)]
+        self.assertEqual(results, [True, True, True, True, False])
+        self.assertTrue(self.limiter.check("session:other", "model", ip="10.0.0.2")[0])
+
+    def test_ip_is_not_charged_for_refused_requests(self):
+        for _ in range(5):
+            self.limiter.check("session:a", "model", ip="10.0.0.1")
+        self.assertTrue(self.limiter.check("session:b", "model", ip="10.0.0.1")[0])
+        self.assertTrue(self.limiter.check("session:c", "model", ip="10.0.0.1")[0])
+
+    def test_disabled(self):
+        limiter = RateLimiter(budgets={"model": (0, 0.1)}, enabled=False)
+        self.assertEqual(limiter.check("session:a", "model"), (True, 0))
+
+
+class InMemoryBucketStoreTest(unittest.TestCase):
+    def test_least_recently_used_bucket_is_evicted(self):
+        store = InMemoryBucketStore(max_keys=2)
+        store.consume("a", 5, 1)
+        store.consume("b", 5, 1)
+        store.consume("a", 5, 1)
+        store.consume("c", 5, 1)
+        self.assertEqual(list(store.buckets), ["a", "c"])
+
+
+if __name__ == "__main__":
+    unittest.main()
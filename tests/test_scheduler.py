@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from scheduler import ModelScheduler, QueueDeadlineExceeded, _FairQueue, _Waiter
+
+
+def waiter(session_id, cost=1, priority="interactive"):
+    return _Waiter(session_id, priority, cost, deadline=time.monotonic() + 60)
+
+
+class FairQueueTest(unittest.TestCase):
+    def test_heavy_session_does_not_starve_a_light_one(self):
+        queue = _FairQueue(quantum=1)
+        for _ in range(10):
+            queue.push(waiter("heavy"))
+        queue.push(waiter("light"))
+        order = [queue.pop().session_id for _ in range(3)]
+        self.assertIn("light", order[:2])
+        self.assertEqual(len(queue), 8)
+
+    def test_sessions_share_by_cost(self):
+        # Same credit per turn: the session with 4x cheaper requests gets 4x as many
+        queue = _FairQueue(quantum=400)
+        for _ in range(20):
+            queue.push(waiter("long-prompts", cost=400))
+            queue.push(waiter("short-prompts", cost=100))
+        order = [queue.pop().session_id for _ in range(10)]
+        self.assertEqual(order.count("short-prompts"), 8)
+        self.assertEqual(order.count("long-prompts"), 2)
+
+    def test_empty(self):
+        queue = _FairQueue(quantum=1)
+        self.assertIsNone(queue.pop())
+        queued = waiter("a")
+        queue.push(queued)
+        queue.remove(queued)
+        self.assertEqual(len(queue), 0)
+        self.assertIsNone(queue.pop())
+
+
+class ModelSchedulerTest(unittest.TestCase):
+    def queue_up(self, scheduler, requests):
+        # Queue one thread per (session, priority), each fully queued before the next
+        # starts; returns the list that grants are appended to, in order
+        granted = []
+        for count, (session_id, priority) in enumerate(requests, 1):
+            def run(session_id=session_id, priority=priority):
+                scheduler.acquire(session_id, priority)
+                granted.append(session_id)
+            threading.Thread(target=run, daemon=True).start()
+            deadline = time.monotonic() + 2
+            while self.queued(scheduler) < count and time.monotonic() < deadline:
+                time.sleep(0.001)
+        return granted
+
+    def queued(self, scheduler):
+        with scheduler.lock:
+            return sum(len(queue) for queue in scheduler.queues.values())
+
+    def grant_all(self, scheduler, granted, count):
+        for expected in range(1, count + 1):
+            scheduler.release()
+            deadline = time.monotonic() + 2
+            while len(granted) < expected and time.monotonic() < deadline:
+                time.sleep(0.001)
+        return list(granted)
+
+    def test_heavy_client_cannot_starve_another(self):
+        scheduler = ModelScheduler(max_concurrency=1, quantum=1)
+        scheduler.acquire("holder")
+        granted = self.queue_up(scheduler, [("heavy", "interactive")] * 5 + [("light", "interactive")])
+        order = self.grant_all(scheduler, granted, 6)
+        self.assertIn("light", order[:2])
+
+    def test_interactive_preferred_over_batch(self):
+        scheduler = ModelScheduler(max_concurrency=1, weights={"interactive": 4, "batch": 1})
+        scheduler.acquire("holder")
+        granted = self.queue_up(scheduler, [("b", "batch")] * 3 + [("i", "interactive")] * 6)
+        order = self.grant_all(scheduler, granted, 9)
+        # Batch still gets a turn, but interactive gets most of them
+        self.assertEqual(order[:5].count("i"), 4)
+        self.assertIn("b", order[:5])
+
+    def test_request_past_its_deadline_is_rejected(self):
+        scheduler = ModelScheduler(max_concurrency=1, deadlines={"interactive": 0.05, "batch": 0.05})
+        scheduler.acquire("holder")
+        start = time.monotonic()
+        with self.assertRaises(QueueDeadlineExceeded):
+            scheduler.acquire("late")
+        self.assertLess(time.monotonic() - start, 1.0)
+        stats = scheduler.stats()
+        self.assertEqual(stats["classes"]["interactive"]["dropped"], 1)
+        self.assertEqual(stats["classes"]["interactive"]["queued"], 0)
+        # The rejected request never held a slot
+        self.assertEqual(stats["in_flight"], 1)
+        scheduler.release()
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+    def test_stale_waiter_is_dropped_at_dispatch(self):
+        scheduler = ModelScheduler(max_concurrency=1)
+        scheduler.acquire("holder")
+        stale = waiter("stale")
+        stale.deadline = time.monotonic() - 1
+        with scheduler.lock:
+            scheduler.queues["interactive"].push(stale)
+        scheduler.release()
+        self.assertTrue(stale.expired)
+        self.assertFalse(stale.granted)
+        self.assertEqual(scheduler.stats()["in_flight"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import tempfile
+import unittest
+
+from search_index import SearchIndex, tokenize
+
+
+class PrefixSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.index = SearchIndex()
+        self.index.index_source("a.json", ["hello world", "help me please", "say hello"])
+
+    def test_last_word_matches_as_prefix(self):
+        self.assertEqual(self.index.search("hel"), [("a.json", 2), ("a.json", 1), ("a.json", 0)])
+        self.assertEqual(self.index.search("hello wor"), [("a.json", 0)])
+
+    def test_trailing_space_matches_whole_words(self):
+        self.assertEqual(self.index.search("hel "), [])
+        self.assertEqual(self.index.search("hello "), [("a.json", 2), ("a.json", 0)])
+
+    def test_prefix_covers_merged_and_new_tokens(self):
+        # Over 1000 new tokens are merged into the sorted vocabulary; later
+        # ones are still found before the next merge
+        index = SearchIndex(max_expansions=2000)
+        index.index_source("b.json", [f"word{n}" for n in range(1200)])
+        self.assertEqual(index.new_tokens, [])
+        index.add("live", 0, "wordy")
+        self.assertEqual(index.new_tokens, ["wordy"])
+        self.assertEqual(len(index.search("word", limit=2000)), 1201)
+        self.assertEqual(index.search("wordy"), [("live", 0)])
+
+    def test_expansion_keeps_most_frequent_tokens(self):
+        index = SearchIndex(max_expansions=2)
+        index.index_source("a.json", ["cat", "cat", "cat", "car", "car", "cab"])
+        self.assertEqual(sorted(row for _, row in index.search("ca")), [0, 1, 2, 3, 4])
+
+    def test_results_are_newest_first_and_limited(self):
+        self.index.add_many("live", 0, ["hello again"] * 5)
+        self.assertEqual(self.index.search("hello", limit=3), [("live", 4), ("live", 3), ("live", 2)])
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize("Hello, World! it's"), ["hello", "world", "it", "s"])
+        self.assertEqual(self.index.search("  ,"), [])
+
+
+class DropTest(unittest.TestCase):
+    def test_dropped_source_no_longer_matches(self):
+        index = SearchIndex()
+        index.index_source("a.json", ["apple pie"])
+        index.index_source("b.json", ["apple tart"])
+        index.drop("a.json")
+        self.assertEqual(index.search("apple"), [("b.json", 0)])
+        self.assertEqual(index.source_names(), ["b.json"])
+
+    def test_reindexing_replaces_a_source(self):
+        index = SearchIndex()
+        index.index_source("a.json", ["old text"], mtime=1.0, size=8)
+        index.index_source("a.json", ["new text", "more text"], mtime=2.0, size=17)
+        self.assertEqual(index.search("old"), [])
+        self.assertEqual(index.search("text"), [("a.json", 1), ("a.json", 0)])
+        self.assertTrue(index.is_current("a.json", 2.0, 17))
+        self.assertFalse(index.is_current("a.json", 1.0, 8))
+
+    def test_cancelled_indexing_leaves_the_index_unchanged(self):
+        index = SearchIndex()
+        index.index_source("a.json", ["kept"])
+        self.assertFalse(index.index_source("a.json", ["replaced"], cancelled=lambda: True))
+        self.assertEqual(index.search("kept"), [("a.json", 0)])
+        self.assertEqual(len(index), 1)
+
+
+class SaveLoadTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.path = os.path.join(self.tmp.name, "index.bin")
+
+    def test_round_trip(self):
+        index = SearchIndex()
+        index.index_source("a.json", ["alpha beta", "beta gamma", "gamma"], mtime=1.5, size=30)
+        index.add_many("b.json", 0, ["beta ünïcode", "alphabet"])
+        index.save(self.path)
+
+        loaded = SearchIndex.load(self.path)
+        self.assertEqual(loaded.postings, index.postings)
+        self.assertEqual(list(loaded.doc_source), list(index.doc_source))
+        self.assertEqual(list(loaded.doc_row), list(index.doc_row))
+        for query in ("beta", "alpha", "gam", "ünï", "alphabet "):
+            self.assertEqual(loaded.search(query), index.search(query))
+        self.assertTrue(loaded.is_current("a.json", 1.5, 30))
+
+    def test_dropped_sources_are_left_out(self):
+        index = SearchIndex()
+        index.index_source("a.json", ["shared only-a"])
+        index.index_source("b.json", ["shared", "also shared"])
+        index.index_source("a.json", ["shared again"])
+        index.drop("b.json")
+        index.save(self.path)
+
+        loaded = SearchIndex.load(self.path)
+        self.assertEqual(len(loaded), 1)
+        self.assertEqual(loaded.source_names(), ["a.json"])
+        self.assertNotIn("only", loaded.postings)
+        self.assertEqual(loaded.search("shared"), [("a.json", 0)])
+
+        # New documents after loading get fresh ids
+        loaded.add("live", 0, "shared")
+        self.assertEqual(loaded.search("shared"), [("live", 0), ("a.json", 0)])
+
+    def test_rejects_other_files(self):
+        with open(self.path, "wb") as f:
+            f.write(b"not an index")
+        with self.assertRaises(ValueError):
+            SearchIndex.load(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
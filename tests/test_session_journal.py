@@ -0,0 +1,170 @@
+import json
+import os
+import tempfile
+import threading
+import unittest
+
+import session_journal
+from session_journal import JOURNAL_SUFFIX, SNAPSHOT_SUFFIX, SessionJournal, latest_session, read_session
+
+
+def message(text):
+    return {"sender": "You", "message": text, "timestamp": "12:00:00", "is_user": True, "is_error": False}
+
+
+def texts(messages):
+    return [m["message"] for m in messages]
+
+
+class JournalTestCase(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.directory = self.tmp.name
+
+    def journal(self, session_id="live", **kwargs):
+        journal = SessionJournal(self.directory, session_id, fsync_interval=0.01, **kwargs)
+        self.addCleanup(journal.close)
+        return journal
+
+    def export(self, journal):
+        # The transcript as the journal's writer sees it, after pending work
+        finished = threading.Event()
+        path = os.path.join(self.directory, "export.json")
+        journal.export(path, lambda f, messages: json.dump(messages, f), lambda error: finished.set())
+        self.assertTrue(finished.wait(5))
+        with open(path, encoding="utf-8") as f:
+            return texts(json.load(f))
+
+
+    def write_snapshot(self, session_id, seq, messages):
+        with open(os.path.join(self.directory, session_id + SNAPSHOT_SUFFIX), "w", encoding="utf-8") as f:
+            json.dump({"metadata": {"session_id": session_id, "seq": seq}, "messages": messages}, f)
+
+    def write_journal(self, session_id, entries, tail=""):
+        with open(os.path.join(self.directory, session_id + JOURNAL_SUFFIX), "w", encoding="utf-8") as f:
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+            f.write(tail)
+
+
+class RecoveryTest(JournalTestCase):
+    def test_journal_replays_after_the_snapshot_seq(self):
+        self.write_snapshot("s", 2, [message("one"), message("two")])
+        self.write_journal("s", [
+            {"seq": 3, "op": "add", "messages": [message("three")]},
+            {"seq": 4, "op": "clear"},
+            {"seq": 5, "op": "add", "messages": [message("five")]},
+        ])
+        messages, seq = read_session(self.directory, "s")
+        self.assertEqual(texts(messages), ["five"])
+        self.assertEqual(seq, 5)
+
+    def test_torn_last_line_is_ignored(self):
+        self.write_journal("s", [
+            {"seq": 1, "op": "add", "messages": [message("kept")]},
+        ], tail='{"seq": 2, "op": "add", "messages": [{"sender": "Yo')
+        messages, seq = read_session(self.directory, "s")
+        self.assertEqual(texts(messages), ["kept"])
+        self.assertEqual(seq, 1)
+
+    def test_crash_between_snapshot_and_truncation(self):
+        # The snapshot covers seq 1-2 but the journal was never truncated
+        self.write_snapshot("s", 2, [message("one"), message("two")])
+        self.write_journal("s", [
+            {"seq": 1, "op": "add", "messages": [message("one")]},
+            {"seq": 2, "op": "add", "messages": [message("two")]},
+            {"seq": 3, "op": "add", "messages": [message("three")]},
+        ])
+        self.assertEqual(texts(read_session(self.directory, "s")[0]), ["one", "two", "three"])
+
+    def test_crash_while_writing_the_snapshot(self):
+        # A half-written temporary snapshot is never read
+        self.write_snapshot("s", 1, [message("one")])
+        with open(os.path.join(self.directory, "s" + SNAPSHOT_SUFFIX + ".tmp"), "w", encoding="utf-8") as f:
+            f.write('{"metadata": {"seq": 9')
+        self.write_journal("s", [{"seq": 2, "op": "add", "messages": [message("two")]}])
+        self.assertEqual(texts(read_session(self.directory, "s")[0]), ["one", "two"])
+
+    def test_reopening_compacts_a_leftover_journal(self):
+        self.write_snapshot("s", 1, [message("one")])
+        self.write_journal("s", [
+            {"seq": 1, "op": "add", "messages": [message("one")]},
+            {"seq": 2, "op": "add", "messages": [message("two")]},
+        ], tail='{"seq": 3')
+        journal = self.journal("s")
+        self.assertEqual(texts(journal.recovered), ["one", "two"])
+        journal.append([message("three")])
+        journal.close()
+
+        self.assertEqual(os.path.getsize(os.path.join(self.directory, "s" + JOURNAL_SUFFIX)), 0)
+        self.assertEqual(texts(read_session(self.directory, "s")[0]), ["one", "two", "three"])
+
+
+class WriteFailureTest(JournalTestCase):
+    def test_export_error_is_reported(self):
+        journal = self.journal()
+        journal.append([message("hello")])
+        errors = []
+        finished = threading.Event()
+        path = os.path.join(self.directory, "missing", "export.json")
+        journal.export(path, lambda f, messages: json.dump(messages, f), lambda error: (errors.append(error), finished.set()))
+        self.assertTrue(finished.wait(5))
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], str)
+        # The journal keeps working afterwards
+        self.assertEqual(self.export(journal), ["hello"])
+
+    def test_writer_survives_a_failed_compaction(self):
+        journal = self.journal(compact_every=2)
+        failed = threading.Event()
+
+        def failing_open(path, mode="r", **kwargs):
+            # Truncating the journal fails once, after it has been closed
+            if path == journal.journal_path and mode == "w" and not failed.is_set():
+                failed.set()
+                raise OSError("disk full")
+            return open(path, mode, **kwargs)
+
+        session_journal.open = failing_open
+        self.addCleanup(delattr, session_journal, "open")
+        with self.assertLogs("session_journal", "WARNING"):
+            journal.append([message("one")])
+            journal.append([message("two")])
+            self.assertTrue(failed.wait(5))
+            self.assertEqual(self.export(journal), ["one", "two"])
+
+        journal.append([message("three")])
+        self.assertEqual(self.export(journal), ["one", "two", "three"])
+        self.assertTrue(journal.thread.is_alive())
+        journal.close()
+        self.assertEqual(texts(read_session(self.directory, "live")[0]), ["one", "two", "three"])
+
+
+class ArchiveTest(JournalTestCase):
+    def test_archive_moves_persisted_messages_to_a_past_session(self):
+        journal = self.journal()
+        journal.append([message("hello"), message("there")])
+        finished = threading.Event()
+        journal.archive("past", lambda error: finished.set())
+        self.assertTrue(finished.wait(5))
+        journal.append([message("after")])
+        journal.close()
+
+        self.assertEqual(texts(read_session(self.directory, "past")[0]), ["hello", "there"])
+        self.assertEqual(texts(read_session(self.directory, "live")[0]), ["after"])
+        self.assertEqual(latest_session(self.directory), "live")
+
+    def test_shown_messages_are_exported_but_not_persisted(self):
+        journal = self.journal()
+        journal.append([message("greeting")])
+        journal.append([message("from a file")], persist=False)
+        journal.append([message("typed")])
+        self.assertEqual(self.export(journal), ["greeting", "from a file", "typed"])
+        journal.close()
+        self.assertEqual(texts(read_session(self.directory, "live")[0]), ["greeting", "typed"])
+        self.assertFalse(os.path.exists(os.path.join(self.directory, "past" + SNAPSHOT_SUFFIX)))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,55 @@
+import threading
+import time
+import unittest
+from types import SimpleNamespace
+
+import chatbot
+from generation import GenerationCancelled
+from tracing import Trace
+
+
+class EndlessModel:
+    # Streams a never-ending first paragraph, one word every few milliseconds
+    def __init__(self):
+        self.streaming = threading.Event()
+        self.closed = threading.Event()
+
+    def generate_content(self, prompt, stream=True):
+        def chunks():
+            try:
+                while True:
+                    time.sleep(0.005)
+                    self.streaming.set()
+                    yield SimpleNamespace(text="word ")
+            finally:
+                self.closed.set()
+        return chunks()
+
+
+class DiscardedSpeculationTest(unittest.TestCase):
+    def setUp(self):
+        self.model = EndlessModel()
+        self.saved_client = chatbot.ai_client
+        chatbot.ai_client = self.model
+
+    def tearDown(self):
+        chatbot.ai_client = self.saved_client
+
+    def test_discarded_call_stops_and_releases_its_slots(self):
+        speculation = chatbot.speculative_calls.start(
+            chatbot.call_model, "User: hi", "session:spec", "interactive", Trace(), None, "full"
+        )
+        self.assertTrue(self.model.streaming.wait(2))
+        self.assertEqual(chatbot.model_scheduler.in_flight, 1)
+
+        speculation.discard()
+
+        with self.assertRaises(GenerationCancelled):
+            speculation.future.result(timeout=2)
+        self.assertTrue(self.model.closed.is_set())
+        self.assertEqual(chatbot.model_scheduler.in_flight, 0)
+        self.assertEqual(chatbot.concurrency_limit.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,69 @@
+import json
+import threading
+import unittest
+
+from speculation import HeldTokens
+from ws_channel import ChannelHub
+
+
+class ScriptedSocket:
+    # Delivers the given frames, then behaves like a closed connection
+    def __init__(self, *frames):
+        self.incoming = [json.dumps(frame) for frame in frames]
+        self.sent = []
+
+    def receive(self, timeout=None):
+        if not self.incoming:
+            raise ConnectionError("closed")
+        return self.incoming.pop(0)
+
+    def send(self, data):
+        self.sent.append(json.loads(data))
+
+
+class ChannelHubTest(unittest.TestCase):
+    def test_disconnected_sessions_expire(self):
+        hub = ChannelHub(lambda message, session_id, on_token, remote_addr: (200, {}), session_ttl=0)
+        hub.serve(ScriptedSocket(), "first")
+        self.assertIn("first", hub.sessions)
+        hub.serve(ScriptedSocket(), "second")
+        self.assertEqual(list(hub.sessions), ["second"])
+
+    def test_least_recently_used_sessions_are_dropped_past_the_cap(self):
+        hub = ChannelHub(lambda message, session_id, on_token, remote_addr: (200, {}), max_sessions=2)
+        for session_id in ("a", "b", "a", "c"):
+            hub.serve(ScriptedSocket(), session_id)
+        self.assertEqual(list(hub.sessions), ["a", "c"])
+
+    def test_chats_past_the_pending_limit_are_refused(self):
+        release = threading.Event()
+
+        def dispatch(message, session_id, on_token, remote_addr):
+            release.wait(5)
+            return 200, {"reply": message}
+
+        hub = ChannelHub(dispatch, chat_workers=1, max_pending=2)
+        ws = ScriptedSocket(*({"type": "chat", "id": str(i), "message": "hi"} for i in range(3)))
+        hub.serve(ws, "busy")
+        self.assertEqual(ws.sent[-1]["id"], "2")
+        self.assertEqual(ws.sent[-1]["status"], 503)
+        self.assertEqual(hub.stats()["pending"], 2)
+        release.set()
+        hub.executor.shutdown(wait=True)
+        self.assertEqual(hub.stats()["pending"], 0)
+
+
+class HeldTokensTest(unittest.TestCase):
+    def test_tokens_are_held_until_released(self):
+        received = []
+        tokens = HeldTokens()
+        tokens("one ")
+        tokens("two ")
+        self.assertEqual(received, [])
+        tokens.release(received.append)
+        tokens("three")
+        self.assertEqual(received, ["one ", "two ", "three"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+import os
+import re
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# Trace ids end up in log records, response headers and profile file names,
+# so one sent by a client is only reused if it's this safe
+TRACE_ID_PATTERN = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class Trace:
+    # Span timings for one request. Spans are recorded in the order they
+    # finish; repeated stages (retries) appear once per attempt.
+    def __init__(self, trace_id=None):
+        # A missing or unsafe trace_id gets a fresh one
+        if not trace_id or not TRACE_ID_PATTERN.fullmatch(trace_id):
+            trace_id = uuid.uuid4().hex[:16]
+        self.trace_id = trace_id
+        self.started_at = datetime.now().isoformat()
+        self.start = time.perf_counter()
+        self.end = None
+        self.spans = []
+
+    @contextmanager
+    def span(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_span(name, start, time.perf_counter())
+
+    def add_span(self, name, start, end):
+        self.spans.append({
+            "name": name,
+            "offset_ms": round((start - self.start) * 1000, 2),
+            "ms": round((end - start) * 1000, 2),
+        })
+
+    def finish(self):
+        if self.end is None:
+            self.end = time.perf_counter()
+        return self
+
+    @property
+    def total_ms(self):
+        end = self.end if self.end is not None else time.perf_counter()
+        return round((end - self.start) * 1000, 2)
+
+    def totals(self):
+        # Duration per stage name, summed over repeats, in first-seen order
+        totals = {}
+        for span in self.spans:
+            totals[span["name"]] = round(totals.get(span["name"], 0) + span["ms"], 2)
+        return totals
+
+    def server_timing_header(self):
+        parts = [f"{name};dur={ms}" for name, ms in self.totals().items()]
+        parts.append(f"total;dur={self.total_ms}")
+        return ", ".join(parts)
+
+    def to_dict(self):
+        return {
+            "trace_id": self.trace_id,
+            "total_ms": self.total_ms,
+            "stages": self.totals(),
+        }
+
+    def to_full_dict(self):
+        return {
+            **self.to_dict(),
+            "started_at": self.started_at,
+            "spans": list(self.spans),
+        }
+
+
+class SlowRequestLog:
+    # Ring buffer keeping the full span breakdown of requests over a threshold
+    def __init__(self, threshold_ms=2000, size=100):
+        self.threshold_ms = threshold_ms
+        self.entries = deque(maxlen=size)
+        self.lock = threading.Lock()
+
+    def record(self, trace, **details):
+        if trace.total_ms < self.threshold_ms:
+            return False
+        with self.lock:
+            self.entries.append({**trace.to_full_dict(), **details})
+        return True
+
+    def recent(self, limit=None, min_ms=0):
+        # Newest first
+        with self.lock:
+            entries = [entry for entry in reversed(self.entries) if entry["total_ms"] >= min_ms]
+        return entries[:limit] if limit else entries
+
+
+def create_slow_request_log():
+    # Build the slow-request log from environment settings
+    return SlowRequestLog(
+        threshold_ms=float(os.getenv("SLOW_REQUEST_MS", "2000")),
+        size=int(os.getenv("SLOW_REQUEST_LOG_SIZE", "100")),
+    )
@@ -1,9 +1,13 @@
 import sys
-import requests
+import argparse
 import threading
+import codecs
 import json
 import os
-import re
+import string
+import time
+import uuid
+from collections import OrderedDict, deque
 from datetime import datetime
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QTextEdit, QLineEdit, QPushButton,
@@ -12,12 +16,32 @@ from PySide6.QtWidgets import (
     QComboBox, QCheckBox, QSlider, QTabWidget, QTextBrowser,
     QFileDialog, QDialog, QDialogButtonBox, QFormLayout, QSpinBox,
     QSystemTrayIcon, QStyle, QProgressBar, QToolBar,
-    QSizePolicy, QGridLayout, QButtonGroup, QRadioButton
+    QSizePolicy, QGridLayout, QButtonGroup, QRadioButton,
+    QListView, QAbstractItemView, QStyledItemDelegate, QProgressDialog,
+    QListWidget, QListWidgetItem
 )
-from PySide6.QtCore import Qt, Signal, QObject, QThread, QTimer, QPropertyAnimation, QEasingCurve, QSize
-from PySide6.QtGui import QFont, QPixmap, QIcon, QAction, QPalette, QColor, QTextCursor, QKeySequence, QShortcut
+from PySide6.QtCore import (
+    Qt, Signal, QObject, QThread, QTimer, QPropertyAnimation, QEasingCurve, QSize,
+    QAbstractListModel, QModelIndex, QRect, QRectF, QPointF, QUrl, QElapsedTimer
+)
+from PySide6.QtGui import (
+    QFont, QPixmap, QIcon, QAction, QPalette, QColor, QTextCursor, QKeySequence, QShortcut,
+    QFontMetrics, QTextDocument, QAbstractTextDocumentLayout, QPainter, QPen, QLinearGradient,
+    QDesktopServices
+)
+from PySide6.QtNetwork import QAbstractSocket
+from PySide6.QtWebSockets import QWebSocket
+
+from markdown_render import has_markup, render_html
+from search_index import SearchIndex
+from session_journal import SessionJournal, latest_session
 
 CHATBOT_API_URL = "http://127.0.0.1:5003/chat"
+CHATBOT_WS_URL = "ws://127.0.0.1:5003/ws"
+# Autosave journals and snapshots, one pair per session
+SESSIONS_DIR = "sessions"
+# Search index over saved conversations (past sessions and indexed folders)
+SEARCH_INDEX_PATH = os.path.join(SESSIONS_DIR, "search.idx")
 
 # Enhanced color scheme with more variants
 class Colors:
@@ -51,191 +75,939 @@ class Colors:
     WARNING = "#ffc107"
     INFO = "#17a2b8"
 
+# Theme palettes: stylesheet colors plus the (start, end) gradients the
+# transcript delegate paints bubbles with
+THEMES = {
+    "Dark": {
+        "bg": Colors.DARK_BG, "surface": Colors.DARK_SURFACE, "card": Colors.DARK_CARD,
+        "text": Colors.DARK_TEXT, "text_secondary": Colors.DARK_TEXT_SECONDARY,
+        "border": Colors.DARK_BORDER, "primary": Colors.DARK_PRIMARY, "accent": "#007acc",
+        "hover": "#4a4a4a", "pressed": "#2a2a2a", "focus_bg": "#333333",
+        "scroll_track": "#404040", "scroll_handle": "#666666", "scroll_handle_hover": "#888888",
+        "bubbles": {
+            "user": (Colors.USER_BUBBLE_DARK, "#0056b3"),
+            "bot": (Colors.BOT_BUBBLE_DARK, "#1e7e34"),
+            "error": (Colors.ERROR, Colors.ERROR),
+        },
+    },
+    "Light": {
+        "bg": Colors.LIGHT_BG, "surface": Colors.LIGHT_SURFACE, "card": Colors.LIGHT_CARD,
+        "text": Colors.LIGHT_TEXT, "text_secondary": Colors.LIGHT_TEXT_SECONDARY,
+        "border": Colors.LIGHT_BORDER, "primary": Colors.LIGHT_PRIMARY, "accent": "#007acc",
+        "hover": "#e9ecef", "pressed": "#dee2e6", "focus_bg": "#ffffff",
+        "scroll_track": "#e9ecef", "scroll_handle": "#adb5bd", "scroll_handle_hover": "#868e96",
+        "bubbles": {
+            "user": (Colors.USER_BUBBLE_LIGHT, "#0056b3"),
+            "bot": (Colors.BOT_BUBBLE_LIGHT, "#1e7e34"),
+            "error": (Colors.ERROR, Colors.ERROR),
+        },
+    },
+}
+
+# One application-wide stylesheet. Widgets are matched by object name, and
+# state that changes at runtime is a dynamic property, so nothing ever needs
+# a stylesheet of its own.
+STYLESHEET_TEMPLATE = string.Template("""
+QMainWindow { background-color: $bg; color: $text; }
+QMenuBar { background-color: $surface; color: $text; border-bottom: 1px solid $border; }
+QMenuBar::item { background-color: transparent; padding: 4px 8px; }
+QMenuBar::item:selected { background-color: $primary; color: white; }
+QToolBar { background-color: $surface; border: none; }
+QToolBar QToolButton { color: $text; }
+QStatusBar { color: $text; }
+QRadioButton { color: $text; }
+
+#transcript { border: 1px solid $border; border-radius: 10px; background-color: $surface; }
+#transcript QScrollBar:vertical { background: $scroll_track; width: 8px; border-radius: 4px; }
+#transcript QScrollBar::handle:vertical { background: $scroll_handle; border-radius: 4px; min-height: 20px; }
+#transcript QScrollBar::handle:vertical:hover { background: $scroll_handle_hover; }
+
+#requestProgress { border: 1px solid $border; border-radius: 10px; text-align: center; height: 20px; }
+#requestProgress::chunk { background-color: $accent; border-radius: 9px; }
+
+#typingIndicator {
+    color: #6c757d; font-style: italic; padding: 8px 15px;
+    background-color: rgba(108, 117, 125, 0.1); border-radius: 10px; margin: 5px;
+}
+
+#connectionStatus QLabel[state="connected"] { color: $success; }
+#connectionStatus QLabel[state="disconnected"] { color: $error; }
+#connectionStatus QLabel[state="error"] { color: $warning; }
+
+#inputContainer { background-color: $card; border: 1px solid $border; border-radius: 15px; padding: 5px; }
+#messageInput {
+    border: 2px solid $border; border-radius: 20px; padding: 10px 15px;
+    font-size: 13px; background-color: $surface; color: $text;
+}
+#messageInput:focus { border-color: $accent; background-color: $focus_bg; }
+
+#sendButton {
+    background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #007acc, stop:1 #0056b3);
+    color: white; border: none; border-radius: 20px; padding: 10px 20px;
+    font-weight: bold; font-size: 12px; min-width: 80px;
+}
+#sendButton:hover { background: qlineargradient(x1:0, y1:0, x2:0, y2:1, stop:0 #0056b3, stop:1 #004494); }
+#sendButton:disabled { background-color: #cccccc; }
+
+#quickResponse {
+    border: 1px solid $accent; border-radius: 15px; padding: 6px 12px;
+    background-color: rgba(0, 122, 204, 0.1); color: $accent; font-size: 11px;
+}
+#quickResponse:hover { background-color: rgba(0, 122, 204, 0.2); }
+#quickResponse:pressed { background-color: rgba(0, 122, 204, 0.3); }
+
+#emojiButton {
+    border: 1px solid $border; border-radius: 5px; font-size: 12px;
+    background-color: $card; color: $text;
+}
+#emojiButton:hover { background-color: $hover; border-color: $accent; }
+
+#actionButton {
+    background-color: $card; border: 1px solid $border; border-radius: 8px;
+    padding: 8px 15px; font-size: 11px; color: $text;
+}
+#actionButton:hover { background-color: $hover; border-color: $accent; }
+#actionButton:pressed { background-color: $pressed; }
+
+#statsLabel { color: #6c757d; font-size: 10px; }
+
+#searchInput {
+    border: 1px solid $border; border-radius: 12px; padding: 6px 12px;
+    background-color: $surface; color: $text;
+}
+#searchInput:focus { border-color: $accent; }
+#searchResults { border: 1px solid $border; border-radius: 8px; background-color: $surface; color: $text; }
+#searchResults::item:selected { background-color: $accent; color: white; }
+""")
+
+class ThemeEngine:
+    """Compiles each theme once and applies it as the application stylesheet.
+
+    A theme switch is then a single setStyleSheet on the QApplication, i.e. one
+    re-polish, however many messages are in the transcript. Bubble colors are
+    precompiled to QColors for the delegate.
+    """
+
+    def __init__(self, themes=THEMES):
+        self.themes = themes
+        self.compiled = {}
+        self.current = None
+
+    def compile(self, name):
+        """(stylesheet, bubble colors) for a theme, built on first use"""
+        if name not in self.compiled:
+            theme = self.themes[name]
+            stylesheet = STYLESHEET_TEMPLATE.substitute(
+                {key: value for key, value in theme.items() if key != "bubbles"},
+                success=Colors.SUCCESS, error=Colors.ERROR, warning=Colors.WARNING,
+            )
+            bubbles = {
+                role: (QColor(start), QColor(end)) for role, (start, end) in theme["bubbles"].items()
+            }
+            self.compiled[name] = (stylesheet, bubbles)
+        return self.compiled[name]
+
+    def apply(self, name):
+        """Switch the whole application to a theme"""
+        stylesheet, _ = self.compile(name)
+        self.current = name
+        QApplication.instance().setStyleSheet(stylesheet)
+
+    def bubble_colors(self, role):
+        """(start, end) gradient colors for a user, bot or error bubble"""
+        return self.compile(self.current or "Dark")[1][role]
+
 class WorkerSignals(QObject):
-    finished = Signal()
-    error = Signal(str)
-    result = Signal(str, str)
-    typing = Signal(bool)
-    progress = Signal(int)
+    result = Signal(str, dict)  # request id, the /chat JSON body (with "status")
+    error = Signal(str, str)    # request id, error message
+    heartbeat = Signal(object)  # network round trip in ms (None if unknown) after any reply
 
 class ChatbotWorker(QObject):
-    def __init__(self, message):
+    """Long-lived HTTP worker for the chat endpoint.
+
+    Lives on its own thread for the whole session and handles one request at
+    a time over a keep-alive connection, so neither a thread nor a TCP
+    connection is set up per message.
+    """
+    # (connect, read) timeouts in seconds for one request
+    TIMEOUT = (5, 30)
+    
+    def __init__(self, session_id=None):
         super().__init__()
         self.signals = WorkerSignals()
-        self.user_message = message
-        self._is_running = True
+        self.session_id = session_id
+        self.http = None
 
-    def run(self):
-        if not self._is_running:
-            return
+    def process(self, request_id, message):
+        """Send one message; the result or error carries its request id"""
+        # Imported on the worker thread, off the startup path (it's one of
+        # the slowest imports here)
+        import requests
+        if self.http is None:
+            # Created on first use so it belongs to the worker thread
+            self.http = requests.Session()
+            if self.session_id:
+                self.http.headers["X-Session-ID"] = self.session_id
 
         try:
-            # Emit typing indicator and progress
-            self.signals.typing.emit(True)
-            self.signals.progress.emit(25)
-            
-            response = requests.post(CHATBOT_API_URL, json={"message": self.user_message}, timeout=30)
-            self.signals.progress.emit(75)
-            
-            response.raise_for_status()
-            self.signals.progress.emit(90)
-
-            data = response.json()
-            bot_reply = data.get("reply", "Sorry, I received an unexpected response.")
-            
-            if self._is_running:
-                self.signals.progress.emit(100)
-                self.signals.result.emit(bot_reply, "chatbot")
+            start = time.perf_counter()
+            response = self.http.post(CHATBOT_API_URL, json={"message": message}, timeout=self.TIMEOUT)
+            try:
+                data = response.json()
+            except ValueError:
+                # Not one of ours (e.g. a proxy error page)
+                response.raise_for_status()
+                raise
+            # Error statuses carry a reply too (429 says when to retry), and
+            # are delivered like a reply frame with the same status
+            data = {"status": response.status_code, **data}
+            if response.status_code >= 400 and "retry_after" not in data and response.headers.get("Retry-After"):
+                data["retry_after"] = response.headers["Retry-After"]
+            self.signals.result.emit(request_id, data)
+            # The round trip minus the server's own time is the network RTT
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            server_ms = (data.get("timing") or {}).get("total_ms")
+            self.signals.heartbeat.emit(max(0.0, elapsed_ms - server_ms) if server_ms is not None else None)
 
         except requests.exceptions.Timeout:
-            error_msg = "⏰ Request timed out. The server might be busy."
-            if self._is_running: 
-                self.signals.error.emit(error_msg)
+            self.signals.error.emit(request_id, "⏰ Request timed out. The server might be busy.")
         except requests.exceptions.ConnectionError:
-            error_msg = "Cannot connect to chatbot server. Please ensure it's running on port 5003."
-            if self._is_running: 
-                self.signals.error.emit(error_msg)
+            self.signals.error.emit(request_id, "Cannot connect to chatbot server. Please ensure it's running on port 5003.")
         except requests.exceptions.RequestException as e:
-            error_msg = f"Network error: {str(e)}"
-            if self._is_running: 
-                self.signals.error.emit(error_msg)
+            self.signals.error.emit(request_id, f"Network error: {str(e)}")
         except Exception as e:
-            error_msg = f"Unexpected error: {str(e)}"
-            if self._is_running: 
-                self.signals.error.emit(error_msg)
-        finally:
-            self.signals.typing.emit(False)
-            self.signals.progress.emit(0)
-            if self._is_running:
-                self.signals.finished.emit()
+            self.signals.error.emit(request_id, f"Unexpected error: {str(e)}")
+
+    def close(self):
+        if self.http is not None:
+            self.http.close()
+
+class ChatSocketClient(QObject):
+    """Persistent WebSocket to the backend's /ws channel.
+
+    Messages are multiplexed over one connection by request id. The client
+    reconnects with exponential backoff, and on reconnect asks the server to
+    resume requests that were sent but not answered, so replies that finished
+    while it was offline still arrive. Heartbeats from the server double as
+    the liveness check; a silent connection is dropped and reopened.
+    """
+    reply = Signal(str, dict)       # request id, reply frame (the /chat JSON body)
+    token = Signal(str, str)        # request id, streamed text
+    state_changed = Signal(str)     # "connected", "reconnecting" or "disconnected"
+    server_state = Signal(dict)     # load summary from heartbeats
+    rtt = Signal(float)             # ping round trip in ms
+
+    def __init__(self, session_id, url=CHATBOT_WS_URL, parent=None):
+        super().__init__(parent)
+        self.session_id = session_id
+        self.url = f"{url}?session_id={session_id}"
+        self.pending = OrderedDict()  # request id -> message, until the reply arrives
+        self.sent = set()             # pending ids the server has seen
+        self.heartbeat_interval = 15.0
+        self.backoff = 0.5
+        self.closing = False
+        self.last_frame = None
+        self.socket = None  # created by the first open()
+
+        self.reconnect_timer = QTimer(self)
+        self.reconnect_timer.setSingleShot(True)
+        self.reconnect_timer.timeout.connect(self.open)
+
+        self.watchdog = QTimer(self)
+        self.watchdog.timeout.connect(self._check_alive)
+        self.rtt_clock = QElapsedTimer()
+        self.rtt_clock.start()
+
+    @property
+    def is_connected(self):
+        return self.socket is not None and self.socket.state() == QAbstractSocket.SocketState.ConnectedState
+
+    def open(self):
+        """Connect, or reconnect after a drop"""
+        self.closing = False
+        if self.socket is None:
+            # Constructing a QWebSocket loads the TLS backend, which takes
+            # longer than building the whole window, so it waits until here
+            self.socket = QWebSocket()
+            self.socket.connected.connect(self._on_connected)
+            self.socket.disconnected.connect(self._on_disconnected)
+            self.socket.textMessageReceived.connect(self._on_text)
+        self.socket.open(self.url)
+
+    def close(self):
+        """Disconnect for good; no more reconnect attempts"""
+        self.closing = True
+        self.reconnect_timer.stop()
+        self.watchdog.stop()
+        if self.socket is not None:
+            self.socket.close()
+
+    def send_chat(self, message, request_id=None):
+        """Queue a chat message and return its request id"""
+        request_id = request_id or uuid.uuid4().hex
+        self.pending[request_id] = message
+        if self.is_connected:
+            self._send_chat_frame(request_id)
+        return request_id
+
+    def discard(self, request_id):
+        """Stop waiting for a reply; it's dropped if it still arrives"""
+        self.pending.pop(request_id, None)
+        self.sent.discard(request_id)
+
+    def _send_frame(self, frame):
+        self.socket.sendTextMessage(json.dumps(frame))
+
+    def _ping(self):
+        self._send_frame({"type": "ping", "sent": self.rtt_clock.elapsed()})
+
+    def _send_chat_frame(self, request_id):
+        self.sent.add(request_id)
+        self._send_frame({"type": "chat", "id": request_id, "message": self.pending[request_id]})
+
+    def _on_connected(self):
+        self.backoff = 0.5
+        self.last_frame = datetime.now()
+        self.watchdog.start(1000)
+        self.state_changed.emit("connected")
+        self._ping()
+        # Replies may have finished while we were away; anything else goes out now
+        resumable = [request_id for request_id in self.pending if request_id in self.sent]
+        if resumable:
+            self._send_frame({"type": "resume", "pending": resumable})
+        for request_id in self.pending:
+            if request_id not in self.sent:
+                self._send_chat_frame(request_id)
+
+    def _on_disconnected(self):
+        self.watchdog.stop()
+        if self.closing:
+            self.state_changed.emit("disconnected")
+            return
+        self.state_changed.emit("reconnecting")
+        self.reconnect_timer.start(int(self.backoff * 1000))
+        self.backoff = min(self.backoff * 2, 30.0)
+
+    def _check_alive(self):
+        # The server sends a heartbeat whenever it's idle, so a long silence means
+        # the connection is dead even if the OS hasn't noticed yet
+        silent = (datetime.now() - self.last_frame).total_seconds()
+        if silent > self.heartbeat_interval * 2 + 5:
+            self.socket.abort()
+        elif silent > self.heartbeat_interval + 2:
+            self._ping()
+
+    def _on_text(self, text):
+        self.last_frame = datetime.now()
+        try:
+            frame = json.loads(text)
+        except ValueError:
+            return
+
+        kind = frame.get("type")
+        request_id = frame.get("id")
+        if kind == "hello":
+            self.heartbeat_interval = float(frame.get("heartbeat_interval", self.heartbeat_interval))
+        elif kind == "token" and request_id in self.pending:
+            self.token.emit(request_id, frame.get("text", ""))
+        elif kind == "reply" and request_id in self.pending:
+            del self.pending[request_id]
+            self.sent.discard(request_id)
+            self.reply.emit(request_id, frame)
+        elif kind == "unknown" and request_id in self.pending:
+            # Lost before the server saw it; send it again
+            self._send_chat_frame(request_id)
+        elif kind == "heartbeat":
+            self.server_state.emit(frame.get("state", {}))
+            # Measure the round trip on the back of the server's heartbeat
+            self._ping()
+        elif kind == "pong" and isinstance(frame.get("sent"), (int, float)):
+            self.rtt.emit(float(self.rtt_clock.elapsed() - frame["sent"]))
+
+class ChatRequestQueue(QObject):
+    """Outbound chat messages for one session, sent strictly in order.
+
+    The user can keep typing while a reply is on its way: messages wait here
+    and go out one at a time, so the backend adds them to the conversation in
+    the order they were written. Each goes over the WebSocket channel when it
+    is up, otherwise to one long-lived HTTP worker thread. Messages that
+    haven't gone out yet can be cancelled, and every reply, token and error is
+    tagged with the id of the request it answers.
+    """
+    reply = Signal(str, dict)       # request id, the /chat JSON body (with "status")
+    error = Signal(str, str)        # request id, error message
+    token = Signal(str, str)        # request id, streamed text
+    started = Signal(str)           # request id, when it goes out
+    queue_changed = Signal(int)     # messages queued or in flight
+    _http_request = Signal(str, str)
+
+    # A socket request that hears nothing for this long (no tokens, no reply,
+    # e.g. the backend restarted and lost it) is given up on
+    REPLY_TIMEOUT_MS = 60000
+
+    def __init__(self, session_id, chat_socket, parent=None):
+        super().__init__(parent)
+        self.chat_socket = chat_socket
+        self.queued = OrderedDict()   # request id -> message, not sent yet
+        self.in_flight = None         # (request id, "socket" or "http")
+
+        self.thread = QThread()
+        self.worker = ChatbotWorker(session_id)
+        self.worker.moveToThread(self.thread)
+        self._http_request.connect(self.worker.process)
+        self.worker.signals.result.connect(self._on_http_result)
+        self.worker.signals.error.connect(self._on_http_error)
+        self.heartbeat = self.worker.signals.heartbeat
+        # finished is emitted on the worker thread, so the session closes there
+        self.thread.finished.connect(self.worker.close)
+        self.thread.start()
+
+        chat_socket.reply.connect(self._on_socket_reply)
+        chat_socket.token.connect(self._on_socket_token)
+
+        self.reply_timer = QTimer(self)
+        self.reply_timer.setSingleShot(True)
+        self.reply_timer.timeout.connect(self._on_socket_timeout)
+
+    def __len__(self):
+        return len(self.queued) + (1 if self.in_flight else 0)
+
+    def submit(self, message):
+        """Queue a message and return its request id"""
+        request_id = uuid.uuid4().hex
+        self.queued[request_id] = message
+        self._dispatch()
+        self.queue_changed.emit(len(self))
+        return request_id
+
+    def cancel(self, request_id):
+        """Drop a message that hasn't been sent; False if it already went out"""
+        if self.queued.pop(request_id, None) is None:
+            return False
+        self.queue_changed.emit(len(self))
+        return True
+
+    def cancel_pending(self):
+        """Drop every message that hasn't been sent and return their ids"""
+        cancelled = list(self.queued)
+        self.queued.clear()
+        if cancelled:
+            self.queue_changed.emit(len(self))
+        return cancelled
 
     def stop(self):
-        self._is_running = False
+        """Abandon queued messages and shut the worker thread down"""
+        self.queued.clear()
+        self.reply_timer.stop()
+        self.thread.quit()
+        # A request in flight can't be interrupted, but it gives up by itself
+        # within the worker's timeouts; wait that long rather than destroy a
+        # running thread (which aborts the process)
+        self.thread.wait((sum(ChatbotWorker.TIMEOUT) + 5) * 1000)
 
-class AnimatedMessageBubble(QFrame):
-    def __init__(self, sender, message, timestamp, is_user=False, is_error=False):
-        super().__init__()
-        self.setFrameStyle(QFrame.NoFrame)
-        self.message_text = message
-        
-        # Animation setup
-        self.opacity_effect = None
-        self.setup_animation()
-        
-        layout = QVBoxLayout()
-        layout.setContentsMargins(15, 10, 15, 10)
-        layout.setSpacing(5)
-        
-        # Message content with rich text support
-        self.content_label = QLabel()
-        self.content_label.setWordWrap(True)
-        self.content_label.setTextInteractionFlags(Qt.TextSelectableByMouse | Qt.LinksAccessibleByMouse)
-        self.content_label.setFont(QFont("Segoe UI", 11))
-        self.content_label.setOpenExternalLinks(True)
-        
-        # Process message for links, formatting, etc.
-        processed_message = self.process_message(message)
-        self.content_label.setText(processed_message)
-        
-        # Metadata (sender and timestamp)
-        meta_label = QLabel(f"{sender} • {timestamp}")
-        meta_label.setFont(QFont("Segoe UI", 9))
-        meta_label.setStyleSheet("color: rgba(255, 255, 255, 0.9);")
-        
-        # Styling with improved contrast
-        if is_error:
-            self.setStyleSheet(f"""
-                QFrame {{
-                    background-color: {Colors.ERROR};
-                    border-radius: 15px;
-                    margin: 3px;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }}
-                QLabel {{ 
-                    color: white; 
-                    font-weight: 500;
-                }}
-            """)
-        elif is_user:
-            self.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {Colors.USER_BUBBLE_LIGHT}, stop:1 #0056b3);
-                    border-radius: 15px;
-                    margin: 3px;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }}
-                QLabel {{ 
-                    color: white; 
-                    font-weight: 500;
-                }}
-            """)
+    def _dispatch(self):
+        if self.in_flight or not self.queued:
+            return
+        request_id, message = self.queued.popitem(last=False)
+        if self.chat_socket.is_connected:
+            self.in_flight = (request_id, "socket")
+            self.chat_socket.send_chat(message, request_id)
+            self.reply_timer.start(self.REPLY_TIMEOUT_MS)
         else:
-            self.setStyleSheet(f"""
-                QFrame {{
-                    background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
-                        stop:0 {Colors.BOT_BUBBLE_LIGHT}, stop:1 #1e7e34);
-                    border-radius: 15px;
-                    margin: 3px;
-                    border: 1px solid rgba(255, 255, 255, 0.2);
-                }}
-                QLabel {{ 
-                    color: white; 
-                    font-weight: 500;
-                }}
-            """)
-        
-        layout.addWidget(self.content_label)
-        layout.addWidget(meta_label)
-        self.setLayout(layout)
-        
-        # Animate in
-        self.animate_in()
-    
-    def process_message(self, message):
-        # Handle special formatting in messages like links and expressions
-        # Convert URLs to clickable links
-        url_pattern = r'http[s]?://(?:[a-zA-Z]|[0-9]|[$-_@.&+]|[!*\\(\\),]|(?:%[0-9a-fA-F][0-9a-fA-F]))+'
-        message = re.sub(url_pattern, r'<a href="\g<0>">\g<0></a>', message)
-        
-        # Convert newlines to HTML breaks
-        message = message.replace('\n', '<br>')
-        
-        # Bold text with **text**
-        message = re.sub(r'\*\*(.*?)\*\*', r'<b>\1</b>', message)
-        
-        # Italic text with *text*
-        message = re.sub(r'\*(.*?)\*', r'<i>\1</i>', message)
-        
-        return message
-    
-    def setup_animation(self):
-        # Initialize the fade-in animation for message bubbles
-        pass
-    
-    def animate_in(self):
-        # Start the fade-in animation when a new message appears
-        # Start with 0 opacity and animate to full
-        self.setStyleSheet(self.styleSheet() + "QFrame { opacity: 0; }")
-        
-        # Simple fade-in effect using timer
-        self.opacity = 0
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.fade_step)
-        self.timer.start(30)  # 30ms intervals
-    
-    def fade_step(self):
-        # Update opacity during animation
-        self.opacity += 0.1
-        if self.opacity >= 1:
-            self.opacity = 1
+            self.in_flight = (request_id, "http")
+            self._http_request.emit(request_id, message)
+        self.started.emit(request_id)
+
+    def _finish(self, request_id, signal, payload):
+        # Deliver the outcome of the request in flight, then send the next one.
+        # Anything else (e.g. a reply we stopped waiting for) is dropped.
+        if not self.in_flight or self.in_flight[0] != request_id:
+            return
+        self.in_flight = None
+        self.reply_timer.stop()
+        signal.emit(request_id, payload)
+        self._dispatch()
+        self.queue_changed.emit(len(self))
+
+    def _on_http_result(self, request_id, data):
+        self._finish(request_id, self.reply, data)
+
+    def _on_http_error(self, request_id, message):
+        self._finish(request_id, self.error, message)
+
+    def _on_socket_reply(self, request_id, frame):
+        self._finish(request_id, self.reply, frame)
+
+    def _on_socket_token(self, request_id, text):
+        if self.in_flight and self.in_flight[0] == request_id:
+            self.reply_timer.start(self.REPLY_TIMEOUT_MS)
+            self.token.emit(request_id, text)
+
+    def _on_socket_timeout(self):
+        request_id = self.in_flight[0]
+        self.chat_socket.discard(request_id)
+        self._finish(request_id, self.error, "⏰ No reply from the server. Please try again.")
+
+class TranscriptModel(QAbstractListModel):
+    """List model over the conversation's message dicts.
+
+    The window's conversation_history list is the backing store, so saving
+    and exporting work on exactly what the view shows.
+    """
+    MessageRole = Qt.UserRole + 1
+
+    def __init__(self, messages, parent=None):
+        super().__init__(parent)
+        self.messages = messages
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.messages)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        message = self.messages[index.row()]
+        if role == Qt.DisplayRole:
+            return message["message"]
+        if role == self.MessageRole:
+            return message
+        return None
+
+    def append_messages(self, entries):
+        """Append several messages with a single row insertion"""
+        if not entries:
+            return
+        first = len(self.messages)
+        self.beginInsertRows(QModelIndex(), first, first + len(entries) - 1)
+        self.messages.extend(entries)
+        self.endInsertRows()
+
+    def clear(self):
+        self.beginResetModel()
+        self.messages.clear()
+        self.endResetModel()
+
+class _JsonReader:
+    """Just enough of a streaming JSON reader to walk a transcript file.
+
+    Reads a binary file a chunk at a time and decodes one value at a time,
+    so only the current chunk and the value being decoded are held in memory.
+    """
+    def __init__(self, f, chunk_size=1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.bytes_read = 0
+
+    def _fill(self):
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        self.bytes_read += len(chunk)
+        self.eof = not chunk
+        self.buf = self.buf[self.pos:] + self.utf8.decode(chunk, final=self.eof)
+        self.pos = 0
+        return not self.eof
+
+    def peek(self):
+        """The next non-whitespace character, or "" at the end of the file"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} after byte {self.bytes_read}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # Most likely cut off at the end of the chunk
+                if not self._fill():
+                    raise
+                continue
+            # A number ending the buffer may go on in the next chunk
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return value
+
+def iter_transcript_messages(reader):
+    """Yield the messages of a saved transcript as they are read.
+
+    Takes both the saved format ({"metadata": ..., "messages": [...]}) and a
+    bare list of messages.
+    """
+    def iter_array():
+        reader.expect("[")
+        while reader.peek() != "]":
+            yield reader.value()
+            if reader.peek() != "]":
+                reader.expect(",")
+        reader.expect("]")
+
+    if reader.peek() != "{":
+        yield from iter_array()
+        return
+    reader.expect("{")
+    while reader.peek() != "}":
+        key = reader.value()
+        reader.expect(":")
+        if key == "messages" and reader.peek() == "[":
+            yield from iter_array()
+        else:
+            reader.value()
+        if reader.peek() != "}":
+            reader.expect(",")
+
+class TranscriptLoader(QObject):
+    """Parses a saved transcript on a worker thread and hands it over in batches.
+
+    The UI thread only ever inserts ready-made message dicts, a batch at a
+    time, so loading a long conversation neither freezes the window nor builds
+    anything for rows that aren't on screen.
+    """
+    batch = Signal(list)      # message dicts, in order
+    progress = Signal(int)    # percent of the file read
+    finished = Signal(int)    # messages handed over, also after a cancel
+    failed = Signal(str)
+
+    def __init__(self, filename, batch_size=1000):
+        super().__init__()
+        self.filename = filename
+        self.batch_size = batch_size
+        self.cancelled = False
+
+    def cancel(self):
+        self.cancelled = True
+
+    def run(self):
+        loaded = 0
+        entries = []
+        try:
+            size = max(1, os.path.getsize(self.filename))
+            with open(self.filename, 'rb') as f:
+                reader = _JsonReader(f)
+                for msg in iter_transcript_messages(reader):
+                    if self.cancelled:
+                        break
+                    entries.append({
+                        "sender": msg['sender'],
+                        "message": msg['message'],
+                        "timestamp": msg.get('timestamp', ""),
+                        "is_user": msg['is_user'],
+                        "is_error": msg.get('is_error', False)
+                    })
+                    if len(entries) >= self.batch_size:
+                        self.batch.emit(entries)
+                        loaded += len(entries)
+                        entries = []
+                        self.progress.emit(min(99, reader.bytes_read * 100 // size))
+            if entries and not self.cancelled:
+                self.batch.emit(entries)
+                loaded += len(entries)
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+        self.progress.emit(100)
+        self.finished.emit(loaded)
+
+class AnimationClock(QObject):
+    """One timer driving every running fade-in.
+
+    Each tick advances all active fades at once and reports which keys
+    changed, so the view repaints just those rows. The timer only runs while
+    something is fading. New fades are refused when animations are off, or
+    when more than `burst_limit` start within `burst_window` seconds (bulk
+    loads): those bubbles simply appear.
+    """
+    tick = Signal(list)  # keys whose opacity changed this tick
+
+    def __init__(self, interval_ms=16, duration=0.3, burst_limit=5, burst_window=0.5, parent=None):
+        super().__init__(parent)
+        self.enabled = True
+        self.duration = duration
+        self.burst_limit = burst_limit
+        self.burst_window = burst_window
+        self.fades = {}              # key -> start time in seconds
+        self.recent_starts = deque()
+        self.easing = QEasingCurve(QEasingCurve.OutCubic)
+        self.clock = QElapsedTimer()
+        self.clock.start()
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.advance)
+
+    def now(self):
+        return self.clock.elapsed() / 1000.0
+
+    def start_fade(self, key):
+        """Fade key in from transparent; returns False when it should just appear"""
+        if not self.enabled:
+            return False
+        now = self.now()
+        while self.recent_starts and now - self.recent_starts[0] > self.burst_window:
+            self.recent_starts.popleft()
+        self.recent_starts.append(now)
+        if len(self.recent_starts) > self.burst_limit:
+            return False
+        self.fades[key] = now
+        if not self.timer.isActive():
+            self.timer.start()
+        return True
+
+    def opacity(self, key):
+        start = self.fades.get(key)
+        if start is None:
+            return 1.0
+        progress = min(1.0, (self.now() - start) / self.duration)
+        return self.easing.valueForProgress(progress)
+
+    def advance(self):
+        """Move every fade forward one frame and retire finished ones"""
+        now = self.now()
+        changed = list(self.fades)
+        for key in changed:
+            if now - self.fades[key] >= self.duration:
+                del self.fades[key]
+        if not self.fades:
             self.timer.stop()
-        
-        # Update stylesheet with opacity
-        current_style = self.styleSheet()
-        # Remove old opacity and add new one
-        current_style = re.sub(r'opacity: [0-9.]+;', '', current_style)
-        self.setStyleSheet(current_style + f"QFrame {{ opacity: {self.opacity}; }}")
+        self.tick.emit(changed)
+
+    def clear(self):
+        self.fades.clear()
+        self.timer.stop()
+
+class MessageBubbleDelegate(QStyledItemDelegate):
+    """Paints chat bubbles straight onto the transcript view.
+
+    Nothing is instantiated per message. Row heights are cached per view
+    width, and the text layout (a QTextDocument, only for messages with links
+    or emphasis) is cached for recently painted rows. Scrolling therefore
+    only lays out rows coming into view, and a resize lays out each row once.
+    """
+    ROW_SPACING = 10
+    MARGIN = 10
+    PADDING_X = 15
+    PADDING_Y = 10
+    META_SPACING = 5
+    MAX_WIDTH_RATIO = 0.75
+    DOCUMENT_CACHE_SIZE = 300
+
+    def __init__(self, view):
+        super().__init__(view)
+        self.view = view
+        self.content_font = QFont("Segoe UI", 11)
+        self.content_metrics = QFontMetrics(self.content_font)
+        self.meta_font = QFont("Segoe UI", 9)
+        self.meta_metrics = QFontMetrics(self.meta_font)
+        self.heights = {}               # row -> (view width, row height)
+        self.documents = OrderedDict()  # row -> (text width, QTextDocument), most recent last
+
+    def invalidate(self, row=None):
+        """Forget cached layout for one row, or for all rows"""
+        if row is None:
+            self.heights.clear()
+            self.documents.clear()
+        else:
+            self.heights.pop(row, None)
+            self.documents.pop(row, None)
+
+    def _text_width(self, view_width):
+        return max(50, int(view_width * self.MAX_WIDTH_RATIO) - 2 * self.PADDING_X)
+
+    def _document(self, row, message, text_width):
+        cached = self.documents.get(row)
+        if cached and cached[0] == text_width:
+            self.documents.move_to_end(row)
+            return cached[1]
+        document = QTextDocument()
+        document.setDefaultFont(self.content_font)
+        document.setDocumentMargin(0)
+        document.setDefaultStyleSheet("a { color: white; } code, pre { font-family: monospace; }")
+        document.setHtml(render_html(message))
+        document.setTextWidth(text_width)
+        self.documents[row] = (text_width, document)
+        if len(self.documents) > self.DOCUMENT_CACHE_SIZE:
+            self.documents.popitem(last=False)
+        return document
+
+    def _text_size(self, row, message, text_width):
+        # (width, height, rich-text document or None) of the laid-out message text
+        if has_markup(message):
+            document = self._document(row, message, text_width)
+            return document.idealWidth(), document.size().height(), document
+        if "\n" not in message:
+            # Most messages fit on one line, which needs no wrapping pass
+            width = self.content_metrics.horizontalAdvance(message)
+            if width <= text_width:
+                return width, self.content_metrics.height(), None
+        rect = self.content_metrics.boundingRect(QRect(0, 0, text_width, 1 << 24), Qt.TextWordWrap, message)
+        return rect.width(), rect.height(), None
+
+    def layout(self, index, rect):
+        """Bubble rectangle, text rectangle and rich-text document for a row painted in rect"""
+        message = index.data(TranscriptModel.MessageRole)
+        text_width = self._text_width(rect.width())
+        width, height, document = self._text_size(index.row(), message["message"], text_width)
+        meta_width = self.meta_metrics.horizontalAdvance(f"{message['sender']} • {message['timestamp']}")
+        bubble_width = max(width, meta_width) + 2 * self.PADDING_X
+        bubble_height = height + self.META_SPACING + self.meta_metrics.height() + 2 * self.PADDING_Y
+        left = rect.right() - self.MARGIN - bubble_width if message["is_user"] else rect.left() + self.MARGIN
+        bubble = QRectF(left, rect.top() + self.ROW_SPACING / 2, bubble_width, bubble_height)
+        text = QRectF(bubble.left() + self.PADDING_X, bubble.top() + self.PADDING_Y, text_width, height)
+        return bubble, text, document
+
+    def sizeHint(self, option, index):
+        view_width = self.view.viewport().width()
+        cached = self.heights.get(index.row())
+        if cached and cached[0] == view_width:
+            return QSize(view_width, cached[1])
+        # Only the height matters here, so skip the bubble geometry
+        message = self.view.model().messages[index.row()]["message"]
+        _, text_height, _ = self._text_size(index.row(), message, self._text_width(view_width))
+        bubble_height = text_height + self.META_SPACING + self.meta_metrics.height() + 2 * self.PADDING_Y
+        height = int(bubble_height) + 1 + self.ROW_SPACING
+        self.heights[index.row()] = (view_width, height)
+        return QSize(view_width, height)
+
+    def paint(self, painter, option, index):
+        message = index.data(TranscriptModel.MessageRole)
+        bubble, text, document = self.layout(index, option.rect)
+
+        painter.save()
+        painter.setRenderHint(QPainter.Antialiasing)
+        opacity = self.view.animation_clock.opacity(index.row())
+        if opacity < 1.0:
+            painter.setOpacity(opacity)
+        role = "error" if message["is_error"] else "user" if message["is_user"] else "bot"
+        start, end = self.view.theme_engine.bubble_colors(role)
+        brush = QLinearGradient(bubble.topLeft(), bubble.bottomRight())
+        brush.setColorAt(0, start)
+        brush.setColorAt(1, end)
+        painter.setPen(QPen(QColor(255, 255, 255, 51), 1))
+        painter.setBrush(brush)
+        painter.drawRoundedRect(bubble, 15, 15)
+
+        painter.setPen(Qt.white)
+        if document is not None:
+            painter.translate(text.topLeft())
+            context = QAbstractTextDocumentLayout.PaintContext()
+            context.palette.setColor(QPalette.Text, Qt.white)
+            document.documentLayout().draw(painter, context)
+            painter.translate(-text.topLeft())
+        else:
+            painter.setFont(self.content_font)
+            painter.drawText(text, Qt.TextWordWrap, message["message"])
+
+        painter.setFont(self.meta_font)
+        painter.setPen(QColor(255, 255, 255, 230))
+        painter.drawText(
+            QPointF(text.left(), text.bottom() + self.META_SPACING + self.meta_metrics.ascent()),
+            f"{message['sender']} • {message['timestamp']}"
+        )
+        painter.restore()
+
+    def anchor_at(self, index, rect, pos):
+        """Link under pos in a painted row, or an empty string"""
+        _, text, document = self.layout(index, rect)
+        if document is None or not text.contains(QPointF(pos)):
+            return ""
+        return document.documentLayout().anchorAt(QPointF(pos) - text.topLeft())
+
+class TranscriptView(QListView):
+    """Virtualized chat transcript: only rows in view are ever laid out or painted"""
+
+    def __init__(self, model, animation_clock, theme_engine, parent=None):
+        super().__init__(parent)
+        self.setModel(model)
+        self.animation_clock = animation_clock
+        self.theme_engine = theme_engine
+        animation_clock.tick.connect(self.repaint_rows)
+        model.rowsInserted.connect(self.animate_rows)
+        model.modelReset.connect(animation_clock.clear)
+        self.bubble_delegate = MessageBubbleDelegate(self)
+        self.setItemDelegate(self.bubble_delegate)
+        self.setVerticalScrollMode(QAbstractItemView.ScrollPerPixel)
+        self.verticalScrollBar().setSingleStep(20)
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
+        self.setResizeMode(QListView.Adjust)
+        # Lay out long transcripts in chunks between events instead of all at once
+        self.setLayoutMode(QListView.Batched)
+        self.setBatchSize(500)
+        self.setSelectionMode(QAbstractItemView.NoSelection)
+        self.setFocusPolicy(Qt.NoFocus)
+        self.setMouseTracking(True)
+        self.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.customContextMenuRequested.connect(self.show_context_menu)
+        model.modelReset.connect(self.bubble_delegate.invalidate)
+        self.pending_row = None
+
+    def animate_rows(self, parent, first, last):
+        """Fade in a newly added message; a bulk insert of several rows just appears"""
+        if first == last:
+            self.animation_clock.start_fade(first)
+
+    def scroll_to_row(self, row):
+        """Center a row, once batched layout has got as far as it"""
+        self.pending_row = row
+        self._scroll_to_pending_row()
+
+    def _scroll_to_pending_row(self):
+        if self.pending_row is None or self.pending_row >= self.model().rowCount():
+            return
+        index = self.model().index(self.pending_row)
+        if self.visualRect(index).isValid():
+            self.scrollTo(index, QAbstractItemView.PositionAtCenter)
+            if self.viewport().rect().intersects(self.visualRect(index)):
+                self.pending_row = None
+                return
+        # Not laid out yet, or the scroll range hasn't caught up with it
+        QTimer.singleShot(20, self._scroll_to_pending_row)
+
+    def repaint_rows(self, rows):
+        for row in rows:
+            self.viewport().update(self.visualRect(self.model().index(row)))
+
+    def _anchor_at(self, pos):
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return ""
+        return self.bubble_delegate.anchor_at(index, self.visualRect(index), pos)
+
+    def mouseMoveEvent(self, event):
+        anchor = self._anchor_at(event.position().toPoint())
+        self.viewport().setCursor(Qt.PointingHandCursor if anchor else Qt.ArrowCursor)
+        super().mouseMoveEvent(event)
+
+    def mouseReleaseEvent(self, event):
+        anchor = self._anchor_at(event.position().toPoint())
+        if anchor and event.button() == Qt.LeftButton:
+            QDesktopServices.openUrl(QUrl(anchor))
+        super().mouseReleaseEvent(event)
+
+    def show_context_menu(self, pos):
+        """Offer to copy the message under the cursor"""
+        index = self.indexAt(pos)
+        if not index.isValid():
+            return
+        menu = QMenu(self)
+        copy_action = menu.addAction("Copy Message")
+        if menu.exec(self.viewport().mapToGlobal(pos)) == copy_action:
+            QApplication.clipboard().setText(index.data(Qt.DisplayRole))
 
 class EmojiPanel(QWidget):
     emoji_selected = Signal(str)
@@ -261,19 +1033,7 @@ class EmojiPanel(QWidget):
         for emoji in emojis:
             btn = QPushButton(emoji)
             btn.setFixedSize(35, 35)
-            btn.setStyleSheet("""
-                QPushButton {
-                    border: 1px solid #404040;
-                    border-radius: 5px;
-                    font-size: 12px;
-                    background-color: #3c3c3c;
-                    color: #ffffff;
-                }
-                QPushButton:hover {
-                    background-color: #4a4a4a;
-                    border-color: #007acc;
-                }
-            """)
+            btn.setObjectName("emojiButton")
             btn.clicked.connect(lambda checked, e=emoji: self.emoji_selected.emit(e))
             
             layout.addWidget(btn, row, col)
@@ -288,6 +1048,13 @@ class EmojiPanel(QWidget):
 class AdvancedQuickResponseWidget(QWidget):
     response_clicked = Signal(str)
     
+    CATEGORIES = {
+        "General": ["Hello", "Help", "Thank you", "Goodbye"],
+        "Questions": ["What time?", "Weather?", "News?", "Advice?"],
+        "Fun": ["Tell joke", "Sing song", "Play game", "Surprise me"],
+        "Tasks": ["To-do list", "Take notes", "Set reminder", "Search"],
+    }
+    
     def __init__(self):
         super().__init__()
         self.setup_ui()
@@ -301,68 +1068,43 @@ class AdvancedQuickResponseWidget(QWidget):
         categories_layout = QHBoxLayout()
         self.category_buttons = QButtonGroup()
         
-        categories = [
-            ("General", ["Hello", "Help", "Thank you", "Goodbye"]),
-            ("Questions", ["What time?", "Weather?", "News?", "Advice?"]),
-            ("Fun", ["Tell joke", "Sing song", "Play game", "Surprise me"]),
-            ("Tasks", ["To-do list", "Take notes", "Set reminder", "Search"])
-        ]
-        
         self.response_widgets = {}
         
-        for i, (category, responses) in enumerate(categories):
+        for i, category in enumerate(self.CATEGORIES):
             radio = QRadioButton(category)
             if i == 0:
                 radio.setChecked(True)
             radio.toggled.connect(lambda checked, cat=category: self.show_category(cat) if checked else None)
             categories_layout.addWidget(radio)
             self.category_buttons.addButton(radio)
-            
-            # Create response buttons for this category
-            response_widget = QWidget()
-            response_layout = QHBoxLayout(response_widget)
-            response_layout.setContentsMargins(0, 0, 0, 0)
-            
-            for response in responses:
-                btn = QPushButton(response)
-                btn.setStyleSheet("""
-                    QPushButton {
-                        border: 1px solid #007acc;
-                        border-radius: 15px;
-                        padding: 6px 12px;
-                        background-color: rgba(0, 122, 204, 0.1);
-                        color: #007acc;
-                        font-size: 11px;
-                    }
-                    QPushButton:hover {
-                        background-color: rgba(0, 122, 204, 0.2);
-                    }
-                    QPushButton:pressed {
-                        background-color: rgba(0, 122, 204, 0.3);
-                    }
-                """)
-                btn.clicked.connect(lambda checked, text=response: self.response_clicked.emit(text.split(' ', 1)[-1]))
-                response_layout.addWidget(btn)
-            
-            response_layout.addStretch()
-            self.response_widgets[category] = response_widget
-            
-            if i == 0:
-                response_widget.show()
-            else:
-                response_widget.hide()
         
         categories_layout.addStretch()
         layout.addLayout(categories_layout)
         
-        # Add all response widgets
-        for widget in self.response_widgets.values():
-            layout.addWidget(widget)
-        
         self.setLayout(layout)
+        self.show_category(next(iter(self.CATEGORIES)))
+    
+    def create_responses(self, category):
+        # Row of response buttons for one category
+        response_widget = QWidget()
+        response_layout = QHBoxLayout(response_widget)
+        response_layout.setContentsMargins(0, 0, 0, 0)
+        
+        for response in self.CATEGORIES[category]:
+            btn = QPushButton(response)
+            btn.setObjectName("quickResponse")
+            btn.clicked.connect(lambda checked, text=response: self.response_clicked.emit(text.split(' ', 1)[-1]))
+            response_layout.addWidget(btn)
+        
+        response_layout.addStretch()
+        return response_widget
     
     def show_category(self, category):
-        # Display quick response options based on selected category
+        # Display quick response options based on selected category; the
+        # buttons of a category are built the first time it's selected
+        if category not in self.response_widgets:
+            self.response_widgets[category] = self.create_responses(category)
+            self.layout().addWidget(self.response_widgets[category])
         for cat, widget in self.response_widgets.items():
             if cat == category:
                 widget.show()
@@ -373,16 +1115,7 @@ class EnhancedTypingIndicator(QLabel):
     def __init__(self):
         super().__init__()
         self.setText("AI is thinking")
-        self.setStyleSheet("""
-            QLabel {
-                color: #6c757d;
-                font-style: italic;
-                padding: 8px 15px;
-                background-color: rgba(108, 117, 125, 0.1);
-                border-radius: 10px;
-                margin: 5px;
-            }
-        """)
+        self.setObjectName("typingIndicator")
         self.hide()
         
         # Advanced animation
@@ -399,6 +1132,13 @@ class EnhancedTypingIndicator(QLabel):
     def hide_typing(self):
         self.hide()
         self.timer.stop()
+
+    def show_partial(self, text):
+        """Show the reply streaming in instead of the thinking animation"""
+        self.timer.stop()
+        preview = " ".join(text.split())
+        self.setText(f"AI: ...{preview[-80:]}" if len(preview) > 80 else f"AI: {preview}")
+        self.show()
         
     def animate_dots(self):
         self.dot_count = (self.dot_count + 1) % 4
@@ -413,18 +1153,194 @@ class EnhancedTypingIndicator(QLabel):
             current_text = self.text().split('.')[0]
             self.setText(f"{current_text}{dots}")
 
+class ArchiveIndexer(QObject):
+    """Maintains the search index of saved conversations on its own thread.
+
+    The index is loaded from disk once, then kept up to date folder by
+    folder: only transcripts that are new or changed since they were indexed
+    are parsed again, and deleted ones are dropped. The index is saved after
+    any change so the next start doesn't repeat the work.
+    """
+    ready = Signal(object)      # the SearchIndex, once loaded
+    progress = Signal(str)
+    finished = Signal(int)      # transcripts (re)indexed by the last request
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.index = None
+
+    def load(self):
+        try:
+            self.index = SearchIndex.load(self.path)
+        except (OSError, ValueError):
+            self.index = SearchIndex()
+        self.ready.emit(self.index)
+
+    def index_folder(self, folder, exclude):
+        """Index every saved conversation in folder, except the files in exclude"""
+        folder = os.path.abspath(folder)
+        exclude = {os.path.abspath(path) for path in exclude}
+        try:
+            files = sorted(
+                os.path.join(folder, name) for name in os.listdir(folder)
+                if name.endswith(".json") and os.path.join(folder, name) not in exclude
+            )
+        except OSError:
+            files = []
+
+        changed = 0
+        thread = QThread.currentThread()
+        for number, path in enumerate(files, 1):
+            if thread.isInterruptionRequested():
+                return
+            try:
+                stat = os.stat(path)
+                if self.index.is_current(path, stat.st_mtime, stat.st_size):
+                    continue
+                with open(path, 'rb') as f:
+                    texts = [
+                        msg.get('message', "") for msg in iter_transcript_messages(_JsonReader(f))
+                        if isinstance(msg, dict)
+                    ]
+            except (OSError, ValueError):
+                continue
+            if not self.index.index_source(path, texts, stat.st_mtime, stat.st_size, thread.isInterruptionRequested):
+                return
+            changed += 1
+            self.progress.emit(f"Indexing conversations... {number}/{len(files)}")
+
+        # Transcripts deleted from the folder, or now excluded
+        for source in self.index.source_names():
+            if os.path.dirname(source) == folder and (source in exclude or not os.path.exists(source)):
+                self.index.drop(source)
+                changed += 1
+
+        if changed:
+            try:
+                self.index.save(self.path)
+            except OSError:
+                pass
+        self.finished.emit(changed)
+
+class SearchPanel(QWidget):
+    """Search box over the current and saved conversations.
+
+    Results update on every keystroke; activating one (or pressing Enter
+    for the first) asks the window to jump to that message.
+    """
+    activated = Signal(str, int)  # source file ("" for the current chat), row
+
+    def __init__(self, search, parent=None):
+        super().__init__(parent)
+        self.search = search  # query -> [(source, row, label)]
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(4)
+
+        header = QHBoxLayout()
+        self.input = QLineEdit()
+        self.input.setObjectName("searchInput")
+        self.input.setPlaceholderText("Search messages... (Ctrl+F)")
+        self.input.textChanged.connect(self.update_results)
+        self.input.returnPressed.connect(self.activate_first)
+        header.addWidget(self.input)
+        self.summary = QLabel()
+        self.summary.setObjectName("statsLabel")
+        header.addWidget(self.summary)
+        layout.addLayout(header)
+
+        self.results = QListWidget()
+        self.results.setObjectName("searchResults")
+        self.results.setMaximumHeight(180)
+        self.results.itemActivated.connect(self.activate)
+        self.results.hide()
+        layout.addWidget(self.results)
+
+    def open(self):
+        self.show()
+        self.input.setFocus()
+        self.input.selectAll()
+
+    def update_results(self, query):
+        self.results.clear()
+        if not query.strip():
+            self.summary.clear()
+            self.results.hide()
+            return
+        start = time.perf_counter()
+        hits = self.search(query)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        for source, row, label in hits:
+            item = QListWidgetItem(label)
+            item.setData(Qt.UserRole, (source, row))
+            self.results.addItem(item)
+        self.results.setVisible(bool(hits))
+        noun = "result" if len(hits) == 1 else "results"
+        self.summary.setText(f"{len(hits)} {noun} · {elapsed_ms:.1f} ms")
+
+    def activate(self, item):
+        source, row = item.data(Qt.UserRole)
+        self.activated.emit(source, row)
+
+    def activate_first(self):
+        if self.results.count():
+            self.activate(self.results.item(0))
+
+class HealthProbe(QObject):
+    """Checks the backend from a worker thread, so a slow or dead server never blocks the UI"""
+    finished = Signal(str, float)  # "connected", "error" or "disconnected"; round trip in ms
+
+    def __init__(self, url="http://127.0.0.1:5003/", timeout=2):
+        super().__init__()
+        self.url = url
+        self.timeout = timeout
+        self.session = None
+
+    def probe(self):
+        # Imported here, like the keep-alive session, on the worker thread
+        import requests
+        if self.session is None:
+            self.session = requests.Session()
+        start = time.perf_counter()
+        try:
+            response = self.session.get(self.url, timeout=self.timeout)
+            status = "connected" if response.status_code == 200 else "error"
+        except requests.exceptions.RequestException:
+            status = "disconnected"
+        self.finished.emit(status, (time.perf_counter() - start) * 1000)
+
 class ConnectionStatusWidget(QWidget):
+    HEALTHY_INTERVAL = 10.0  # seconds between probes while connected
+    MIN_BACKOFF = 1.0
+    MAX_BACKOFF = 60.0
+
+    probe_requested = Signal()
+
     def __init__(self):
         super().__init__()
         self.setup_ui()
-        self.check_connection()
-        
-        # Auto-check connection every 10 seconds
-        self.timer = QTimer()
+        self.polling = True
+        self.probing = False
+        self.backoff = self.MIN_BACKOFF
+        self.rtt_ms = None
+        
+        # Probes run on their own thread; results come back as signals
+        self.probe_thread = QThread(self)
+        self.probe = HealthProbe()
+        self.probe.moveToThread(self.probe_thread)
+        self.probe_requested.connect(self.probe.probe)
+        self.probe.finished.connect(self.handle_probe)
+        self.probe_thread.start()
+        
+        # Next check: every 10 s while healthy, backing off while the server is
+        # down. The first one waits for set_polling(True), once the window is up.
+        self.timer = QTimer(self)
+        self.timer.setSingleShot(True)
         self.timer.timeout.connect(self.check_connection)
-        self.timer.start(10000)
         
     def setup_ui(self):
+        self.setObjectName("connectionStatus")
         layout = QHBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(5)
@@ -441,41 +1357,145 @@ class ConnectionStatusWidget(QWidget):
         
         self.setLayout(layout)
     
+    def set_polling(self, enabled):
+        # Probing is only needed while there's no live WebSocket to watch
+        self.polling = enabled
+        if not enabled:
+            self.timer.stop()
+        elif not self.timer.isActive() and not self.probing:
+            self.timer.start(0)
+
     def check_connection(self):
-        # Check if backend server is running
-        try:
-            response = requests.get("http://127.0.0.1:5003/", timeout=2)
-            if response.status_code == 200:
-                self.set_status("connected")
-            else:
-                self.set_status("error")
-        except:
-            self.set_status("disconnected")
+        # Ask the probe thread to check the backend; returns immediately
+        if self.probing or not self.polling:
+            return
+        self.probing = True
+        self.probe_requested.emit()
+
+    def handle_probe(self, status, rtt_ms):
+        self.probing = False
+        if status == "connected":
+            self.rtt_ms = rtt_ms
+            self.backoff = self.MIN_BACKOFF
+            delay = self.HEALTHY_INTERVAL
+        else:
+            delay = self.backoff
+            self.backoff = min(self.backoff * 2, self.MAX_BACKOFF)
+        self.set_status(status)
+        if self.polling:
+            self.timer.start(int(delay * 1000))
+
+    def record_heartbeat(self, rtt_ms=None):
+        # Successful chat traffic proves the backend is up, so the next probe
+        # can wait a full interval
+        if rtt_ms is not None:
+            self.rtt_ms = rtt_ms
+        self.backoff = self.MIN_BACKOFF
+        self.set_status("connected")
+        if self.polling and not self.probing:
+            self.timer.start(int(self.HEALTHY_INTERVAL * 1000))
+
+    def stop(self):
+        self.timer.stop()
+        self.probe_thread.quit()
+        self.probe_thread.wait(3000)
     
     def set_status(self, status):
-        # Update the connection status indicator
-        if status == "connected":
-            self.status_dot.setStyleSheet("color: #28a745;")
-            self.status_text.setText("Connected")
-            self.status_text.setStyleSheet("color: #28a745;")
-        elif status == "disconnected":
-            self.status_dot.setStyleSheet("color: #dc3545;")
-            self.status_text.setText("Disconnected")
-            self.status_text.setStyleSheet("color: #dc3545;")
-        elif status == "error":
-            self.status_dot.setStyleSheet("color: #ffc107;")
-            self.status_text.setText("Error")
-            self.status_text.setStyleSheet("color: #ffc107;")
+        # Update the connection status indicator; colors come from the theme's
+        # #connectionStatus QLabel[state=...] rules
+        labels = {"connected": "Connected", "disconnected": "Disconnected", "error": "Error"}
+        if status not in labels:
+            return
+        text = labels[status]
+        if status == "connected" and self.rtt_ms is not None:
+            text += f" · {self.rtt_ms:.0f} ms"
+        self.status_text.setText(text)
+        self.status_text.setToolTip("Round trip to the backend" if self.rtt_ms is not None else "")
+        if self.status_text.property("state") == status:
+            return
+        for label in (self.status_dot, self.status_text):
+            label.setProperty("state", status)
+            # Dynamic properties only take effect on re-polish
+            label.style().unpolish(label)
+            label.style().polish(label)
+
+def write_conversation_json(f, messages, metadata):
+    """Write a saved conversation (the format Load Chat reads)"""
+    json.dump({
+        "metadata": {**metadata, "message_count": len(messages)},
+        "messages": messages
+    }, f, indent=2, ensure_ascii=False)
+
+def write_conversation_text(f, messages, exported_at):
+    """Write a conversation as a plain-text transcript"""
+    f.write("=" * 50 + "\n")
+    f.write("AI CHATBOT CONVERSATION EXPORT\n")
+    f.write("=" * 50 + "\n")
+    f.write(f"Exported: {exported_at}\n")
+    f.write(f"Messages: {len(messages)}\n")
+    f.write("=" * 50 + "\n\n")
+    
+    for msg in messages:
+        f.write(f"[{msg['timestamp']}] {msg['sender']}:\n")
+        f.write(f"{msg['message']}\n\n")
+
+class StartupProfile:
+    """Wall-clock time of each startup phase, printed with --startup-profile"""
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.start = self.last = time.perf_counter()
+        self.phases = []  # (name, ms, ms since start)
+
+    def mark(self, phase):
+        """End the phase that's been running since the previous mark"""
+        now = time.perf_counter()
+        self.phases.append((phase, (now - self.last) * 1000, (now - self.start) * 1000))
+        self.last = now
+
+    def finish(self):
+        """Mark the window as ready and print the report, if enabled"""
+        self.mark("ready")
+        if not self.enabled:
+            return
+        print("Startup profile (ms):")
+        for phase, ms, at in self.phases:
+            print(f"  {phase:<22} {ms:8.1f}   at {at:8.1f}")
+        sys.stdout.flush()
 
 class UltraEnhancedChatbotGUI(QMainWindow):
-    def __init__(self):
+    # Emitted from the journal's writer thread: title, filename, error ("" if none)
+    file_written = Signal(str, str, str)
+    # Emitted from the journal's writer thread: text for the status bar
+    journal_status = Signal(str)
+    # Folder to (re)index for search, and files in it to leave out
+    index_folder_requested = Signal(str, list)
+
+    def __init__(self, startup_profile=None):
         super().__init__()
+        self.startup_profile = startup_profile or StartupProfile()
+        self.started = False
         self.current_theme = "Dark"
+        self.theme_engine = ThemeEngine()
         self.conversation_history = []
+        # Identifies this window's conversation to the backend (history, rate
+        # limits). The last session carries on, recovered from its journal.
+        self.session_id = latest_session(SESSIONS_DIR) or uuid.uuid4().hex
+        self.journal = SessionJournal(SESSIONS_DIR, self.session_id)
+        # Messages of this chat that were typed or received here, as opposed
+        # to opened from a file
+        self.live_messages = len(self.journal.recovered)
+        self.file_written.connect(self.handle_file_written)
+        # Search: this chat is indexed as messages arrive, saved ones in the background
+        self.session_index = SearchIndex()
+        self.archive_index = None
+        self.index_thread = None
         self.settings = self.load_settings()
+        self.startup_profile.mark("settings and session")
         self.init_ui()
         self.setup_shortcuts()
+        self.startup_profile.mark("widgets")
         self.apply_theme()
+        self.startup_profile.mark("theme")
         
     def load_settings(self):
         # Load user preferences from file
@@ -517,6 +1537,7 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         
         # Create toolbar
         self.create_toolbar()
+        self.startup_profile.mark("menus and toolbar")
         
         # Central widget
         central_widget = QWidget()
@@ -544,53 +1565,26 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         # Progress bar for requests
         self.progress_bar = QProgressBar()
         self.progress_bar.hide()
-        self.progress_bar.setStyleSheet("""
-            QProgressBar {
-                border: 1px solid #ddd;
-                border-radius: 10px;
-                text-align: center;
-                height: 20px;
-            }
-            QProgressBar::chunk {
-                background-color: #007acc;
-                border-radius: 9px;
-            }
-        """)
+        self.progress_bar.setObjectName("requestProgress")
         main_layout.addWidget(self.progress_bar)
         
-        # Chat area with enhanced scroll
-        self.chat_scroll = QScrollArea()
-        self.chat_scroll.setWidgetResizable(True)
-        self.chat_scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarAlwaysOff)
-        self.chat_scroll.setStyleSheet("""
-            QScrollArea {
-                border: 1px solid #404040;
-                border-radius: 10px;
-                background-color: #2d2d30;
-            }
-            QScrollBar::vertical {
-                background: #404040;
-                width: 8px;
-                border-radius: 4px;
-            }
-            QScrollBar::handle:vertical {
-                background: #666666;
-                border-radius: 4px;
-                min-height: 20px;
-            }
-            QScrollBar::handle:vertical:hover {
-                background: #888888;
-            }
-        """)
+        # Chat transcript; bubbles are painted, not built from widgets
+        self.transcript_model = TranscriptModel(self.conversation_history, self)
+        self.animation_clock = AnimationClock(parent=self)
+        self.animation_clock.enabled = self.settings.get("animations", True)
+        self.chat_view = TranscriptView(self.transcript_model, self.animation_clock, self.theme_engine)
+        self.chat_view.setObjectName("transcript")
         
-        self.chat_widget = QWidget()
-        self.chat_layout = QVBoxLayout(self.chat_widget)
-        self.chat_layout.setAlignment(Qt.AlignTop)
-        self.chat_layout.setSpacing(10)
-        self.chat_layout.setContentsMargins(10, 10, 10, 10)
+        # Search panel; built on first use, above the transcript
+        self.search_panel = None
         
-        self.chat_scroll.setWidget(self.chat_widget)
-        main_layout.addWidget(self.chat_scroll)
+        main_layout.addWidget(self.chat_view)
+        
+        # Auto-scroll shortly after messages arrive; a burst scrolls once
+        self.scroll_timer = QTimer(self)
+        self.scroll_timer.setSingleShot(True)
+        self.scroll_timer.setInterval(100)
+        self.scroll_timer.timeout.connect(self.scroll_to_bottom)
         
         # Typing indicator
         self.typing_indicator = EnhancedTypingIndicator()
@@ -599,66 +1593,32 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         # Enhanced input area
         input_container = QFrame()
         input_container.setFrameStyle(QFrame.StyledPanel)
-        input_container.setStyleSheet("""
-            QFrame {
-                background-color: #3c3c3c;
-                border: 1px solid #404040;
-                border-radius: 15px;
-                padding: 5px;
-            }
-        """)
+        input_container.setObjectName("inputContainer")
         
         input_layout = QVBoxLayout(input_container)
         input_layout.setSpacing(8)
+        self.input_layout = input_layout
         
         # Main input row
         main_input_layout = QHBoxLayout()
         
         self.user_input = QLineEdit()
         self.user_input.setPlaceholderText("Type your message here... (Press Enter to send)")
-        self.user_input.setStyleSheet("""
-            QLineEdit {
-                border: 2px solid #404040;
-                border-radius: 20px;
-                padding: 10px 15px;
-                font-size: 13px;
-                background-color: #2d2d30;
-                color: #ffffff;
-            }
-            QLineEdit:focus {
-                border-color: #007acc;
-                background-color: #333333;
-            }
-            QLineEdit::placeholder {
-                color: #cccccc;
-            }
-        """)
+        self.user_input.setObjectName("messageInput")
         self.user_input.returnPressed.connect(self.send_message)
         
         self.send_button = QPushButton("Send")
-        self.send_button.setStyleSheet("""
-            QPushButton {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #007acc, stop:1 #0056b3);
-                color: white;
-                border: none;
-                border-radius: 20px;
-                padding: 10px 20px;
-                font-weight: bold;
-                font-size: 12px;
-                min-width: 80px;
-            }
-            QPushButton:hover {
-                background: qlineargradient(x1:0, y1:0, x2:0, y2:1,
-                    stop:0 #0056b3, stop:1 #004494);
-            }
-            QPushButton:disabled {
-                background-color: #cccccc;
-            }
-        """)
+        self.send_button.setObjectName("sendButton")
         self.send_button.clicked.connect(self.send_message)
         
+        self.emoji_btn = QPushButton("☺")
+        self.emoji_btn.setObjectName("emojiButton")
+        self.emoji_btn.setFixedSize(35, 35)
+        self.emoji_btn.setToolTip("Expressions (Ctrl+E)")
+        self.emoji_btn.clicked.connect(self.toggle_emoji_panel)
+        
         main_input_layout.addWidget(self.user_input)
+        main_input_layout.addWidget(self.emoji_btn)
         main_input_layout.addWidget(self.send_button)
         
         input_layout.addLayout(main_input_layout)
@@ -668,11 +1628,8 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         self.quick_responses.response_clicked.connect(self.send_quick_response)
         input_layout.addWidget(self.quick_responses)
         
-        # Emoji panel (initially hidden)
-        self.emoji_panel = EmojiPanel()
-        self.emoji_panel.emoji_selected.connect(self.insert_emoji)
-        self.emoji_panel.hide()
-        input_layout.addWidget(self.emoji_panel)
+        # Emoji panel; built the first time it's opened
+        self.emoji_panel = None
         
         main_layout.addWidget(input_container)
         
@@ -686,23 +1643,7 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         self.export_btn = QPushButton("Export")
         
         for btn in [self.clear_btn, self.save_btn, self.load_btn, self.export_btn]:
-            btn.setStyleSheet("""
-                QPushButton {
-                    background-color: #3c3c3c;
-                    border: 1px solid #404040;
-                    border-radius: 8px;
-                    padding: 8px 15px;
-                    font-size: 11px;
-                    color: #ffffff;
-                }
-                QPushButton:hover {
-                    background-color: #4a4a4a;
-                    border-color: #007acc;
-                }
-                QPushButton:pressed {
-                    background-color: #2a2a2a;
-                }
-            """)
+            btn.setObjectName("actionButton")
         
         self.clear_btn.clicked.connect(self.clear_chat)
         self.save_btn.clicked.connect(self.save_conversation)
@@ -717,7 +1658,7 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         
         # Statistics
         self.stats_label = QLabel("Messages: 0 | Session: 0m")
-        self.stats_label.setStyleSheet("color: #6c757d; font-size: 10px;")
+        self.stats_label.setObjectName("statsLabel")
         bottom_layout.addWidget(self.stats_label)
         
         main_layout.addLayout(bottom_layout)
@@ -726,16 +1667,41 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         self.status_bar = QStatusBar()
         self.setStatusBar(self.status_bar)
         self.status_bar.showMessage("Ultra Enhanced Chatbot Ready!")
+        self.journal_status.connect(self.status_bar.showMessage)
         
         # Initialize variables
-        self.thread = None
-        self.worker = None
+        self.load_thread = None
         self.message_count = 0
         self.session_start = datetime.now()
         self.emoji_panel_visible = False
-        
-        # Welcome message
-        self.add_message("Ultra AI", "Welcome to the Ultra Enhanced AI Chatbot!\n\nI'm equipped with:\n• Beautiful message bubbles\n• Dark/Light themes\n• Quick responses\n• Expression support\n• Connection monitoring\n• And much more!\n\nHow can I assist you today?", False)
+        self.last_timing = None
+        self.partial_replies = {}
+        
+        # Persistent channel to the backend; HTTP requests are the fallback.
+        # It's opened by finish_startup, once the window is on screen.
+        self.chat_socket = ChatSocketClient(self.session_id, parent=self)
+        self.chat_socket.state_changed.connect(self.handle_socket_state)
+        self.chat_socket.rtt.connect(self.connection_status.record_heartbeat)
+        
+        # Outgoing messages wait here, so input never blocks on a reply
+        self.request_queue = ChatRequestQueue(self.session_id, self.chat_socket, parent=self)
+        self.request_queue.reply.connect(self.handle_request_reply)
+        self.request_queue.error.connect(self.handle_request_error)
+        self.request_queue.token.connect(self.handle_request_token)
+        self.request_queue.started.connect(self.handle_request_started)
+        self.request_queue.queue_changed.connect(self.handle_queue_changed)
+        self.request_queue.heartbeat.connect(self.connection_status.record_heartbeat)
+        
+        if self.journal.recovered:
+            self.transcript_model.append_messages(self.journal.recovered)
+            self.session_index.add_many("", 0, (msg['message'] for msg in self.journal.recovered))
+            self.message_count = len(self.journal.recovered)
+            self.update_stats()
+            self.scroll_to_bottom()
+            self.status_bar.showMessage(f"Restored previous session ({self.message_count} messages)")
+        else:
+            # Welcome message
+            self.add_message("Ultra AI", "Welcome to the Ultra Enhanced AI Chatbot!\n\nI'm equipped with:\n• Beautiful message bubbles\n• Dark/Light themes\n• Quick responses\n• Expression support\n• Connection monitoring\n• And much more!\n\nHow can I assist you today?", False)
     
     def create_menu_bar(self):
         """Create application menu bar"""
@@ -749,6 +1715,11 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         new_action.triggered.connect(self.clear_chat)
         file_menu.addAction(new_action)
         
+        cancel_action = QAction('&Cancel Queued Messages', self)
+        cancel_action.setShortcut('Esc')
+        cancel_action.triggered.connect(self.cancel_queued_messages)
+        file_menu.addAction(cancel_action)
+        
         file_menu.addSeparator()
         
         save_action = QAction('&Save Chat', self)
@@ -761,6 +1732,10 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         load_action.triggered.connect(self.load_conversation)
         file_menu.addAction(load_action)
         
+        index_action = QAction('&Index Conversations Folder...', self)
+        index_action.triggered.connect(self.choose_index_folder)
+        file_menu.addAction(index_action)
+        
         file_menu.addSeparator()
         
         exit_action = QAction('E&xit', self)
@@ -812,6 +1787,7 @@ class UltraEnhancedChatbotGUI(QMainWindow):
             ('Ctrl+Return', self.send_message),
             ('Ctrl+L', self.clear_chat),
             ('Ctrl+E', self.toggle_emoji_panel),
+            ('Ctrl+F', self.toggle_search),
             ('F11', self.toggle_fullscreen)
         ]
         
@@ -828,6 +1804,10 @@ class UltraEnhancedChatbotGUI(QMainWindow):
     
     def toggle_emoji_panel(self):
         """Toggle emoji panel visibility"""
+        if self.emoji_panel is None:
+            self.emoji_panel = EmojiPanel()
+            self.emoji_panel.emoji_selected.connect(self.insert_emoji)
+            self.input_layout.addWidget(self.emoji_panel)
         self.emoji_panel_visible = not self.emoji_panel_visible
         if self.emoji_panel_visible:
             self.emoji_panel.show()
@@ -859,103 +1839,43 @@ class UltraEnhancedChatbotGUI(QMainWindow):
     
     def apply_theme(self):
         """Apply the current theme"""
-        if self.current_theme == "Dark":
-            # Dark theme styles
-            self.setStyleSheet(f"""
-                QMainWindow {{
-                    background-color: {Colors.DARK_BG};
-                    color: {Colors.DARK_TEXT};
-                }}
-                QMenuBar {{
-                    background-color: {Colors.DARK_SURFACE};
-                    color: {Colors.DARK_TEXT};
-                    border-bottom: 1px solid {Colors.DARK_BORDER};
-                }}
-                QMenuBar::item {{
-                    background-color: transparent;
-                    padding: 4px 8px;
-                }}
-                QMenuBar::item:selected {{
-                    background-color: {Colors.DARK_PRIMARY};
-                }}
-                QScrollArea {{
-                    background-color: {Colors.DARK_SURFACE};
-                    border: 1px solid {Colors.DARK_BORDER};
-                }}
-                QFrame {{
-                    background-color: {Colors.DARK_CARD};
-                    border: 1px solid {Colors.DARK_BORDER};
-                }}
-            """)
-        else:
-            # Light theme styles
-            self.setStyleSheet(f"""
-                QMainWindow {{
-                    background-color: {Colors.LIGHT_BG};
-                    color: {Colors.LIGHT_TEXT};
-                }}
-                QMenuBar {{
-                    background-color: {Colors.LIGHT_SURFACE};
-                    color: {Colors.LIGHT_TEXT};
-                    border-bottom: 1px solid {Colors.LIGHT_BORDER};
-                }}
-                QMenuBar::item {{
-                    background-color: transparent;
-                    padding: 4px 8px;
-                }}
-                QMenuBar::item:selected {{
-                    background-color: {Colors.LIGHT_PRIMARY};
-                    color: white;
-                }}
-                QScrollArea {{
-                    background-color: {Colors.LIGHT_SURFACE};
-                    border: 1px solid {Colors.LIGHT_BORDER};
-                }}
-            """)
+        self.theme_engine.apply(self.current_theme)
+        # Bubbles are painted with the theme's colors
+        self.chat_view.viewport().update()
     
     def add_message(self, sender, message, is_user, is_error=False):
         """Add a message to the chat"""
         timestamp = datetime.now().strftime("%H:%M:%S")
         
-        # Create animated message bubble
-        bubble = AnimatedMessageBubble(sender, message, timestamp, is_user, is_error)
-        
-        # Create container for proper alignment
-        container = QWidget()
-        container_layout = QHBoxLayout(container)
-        container_layout.setContentsMargins(0, 0, 0, 0)
-        
-        if is_user:
-            container_layout.addStretch()
-            container_layout.addWidget(bubble, 0)
-        else:
-            container_layout.addWidget(bubble, 0)
-            container_layout.addStretch()
-        
-        self.chat_layout.addWidget(container)
-        
-        # Update statistics
-        self.message_count += 1
-        session_time = (datetime.now() - self.session_start).total_seconds() // 60
-        self.stats_label.setText(f"Messages: {self.message_count} | Session: {int(session_time)}m")
-        
-        # Store in history
-        self.conversation_history.append({
+        # Store in history; the transcript view paints straight from it
+        entry = {
             "sender": sender,
             "message": message,
             "timestamp": timestamp,
             "is_user": is_user,
             "is_error": is_error
-        })
+        }
+        self.transcript_model.append_messages([entry])
+        self.journal.append([entry])
+        self.live_messages += 1
+        self.session_index.add("", len(self.conversation_history) - 1, message)
+        
+        # Update statistics
+        self.message_count += 1
+        self.update_stats()
         
         # Auto-scroll to bottom
         if self.settings.get("auto_scroll", True):
-            QTimer.singleShot(100, self.scroll_to_bottom)
+            self.scroll_timer.start()
+    
+    def update_stats(self):
+        """Show the message count and session length"""
+        session_time = (datetime.now() - self.session_start).total_seconds() // 60
+        self.stats_label.setText(f"Messages: {self.message_count} | Session: {int(session_time)}m")
     
     def scroll_to_bottom(self):
         """Scroll chat to bottom"""
-        scrollbar = self.chat_scroll.verticalScrollBar()
-        scrollbar.setValue(scrollbar.maximum())
+        self.chat_view.scrollToBottom()
     
     def send_message(self):
         """Send a message to the chatbot"""
@@ -965,30 +1885,14 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         
         self.add_message("You", user_message, True)
         self.user_input.clear()
-        
-        self.set_input_enabled(False)
-        self.progress_bar.show()
-        self.status_bar.showMessage("Processing your message...")
-        
-        # Start worker thread
-        self.thread = QThread()
-        self.worker = ChatbotWorker(user_message)
-        self.worker.moveToThread(self.thread)
-        
-        # Connect signals
-        self.worker.signals.result.connect(self.handle_bot_reply)
-        self.worker.signals.error.connect(self.handle_error)
-        self.worker.signals.typing.connect(self.handle_typing)
-        self.worker.signals.progress.connect(self.progress_bar.setValue)
-        self.worker.signals.finished.connect(self.thread.quit)
-        self.worker.signals.finished.connect(self.worker.deleteLater)
-        self.worker.signals.finished.connect(self.thread.deleteLater)
-        self.worker.signals.finished.connect(lambda: self.set_input_enabled(True))
-        self.worker.signals.finished.connect(lambda: self.progress_bar.hide())
-        self.worker.signals.finished.connect(lambda: self.status_bar.showMessage("Ready for your next message!"))
-        
-        self.thread.started.connect(self.worker.run)
-        self.thread.start()
+        self.request_queue.submit(user_message)
+    
+    def cancel_queued_messages(self):
+        """Cancel messages still waiting to be sent"""
+        cancelled = len(self.request_queue.cancel_pending())
+        if cancelled:
+            noun = "message" if cancelled == 1 else "messages"
+            self.add_message("System", f"Cancelled {cancelled} queued {noun}.", False, True)
     
     def send_quick_response(self, message):
         """Send a quick response"""
@@ -1003,30 +1907,191 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         """Handle error messages"""
         self.add_message("System", error_message, False, True)
     
-    def handle_typing(self, is_typing):
-        """Handle typing indicator"""
-        if is_typing:
-            self.typing_indicator.show_typing()
+    def handle_request_started(self, request_id):
+        """A queued message has gone out"""
+        self.partial_replies[request_id] = ""
+        self.progress_bar.setValue(25)
+        self.typing_indicator.show_typing()
+    
+    def handle_request_token(self, request_id, text):
+        """Show streamed model output as it arrives"""
+        self.partial_replies[request_id] = self.partial_replies.get(request_id, "") + text
+        self.progress_bar.setValue(75)
+        self.typing_indicator.show_partial(self.partial_replies[request_id])
+    
+    def handle_request_reply(self, request_id, body):
+        """Handle the reply to a queued message"""
+        self.partial_replies.pop(request_id, None)
+        reply = body.get("reply", "Sorry, I received an unexpected response.")
+        if body.get("status", 200) >= 400:
+            if body.get("retry_after"):
+                reply += f" (retry in {body['retry_after']}s)"
+            self.handle_error(reply)
         else:
-            self.typing_indicator.hide_typing()
+            self.handle_bot_reply(reply, "chatbot")
+        if body.get("timing"):
+            self.handle_timing(body["timing"])
     
-    def set_input_enabled(self, enabled):
-        # Enable or disable input controls
-        self.user_input.setEnabled(enabled)
-        self.send_button.setEnabled(enabled)
-        
-        if enabled:
+    def handle_request_error(self, request_id, error_message):
+        """Handle a queued message that got no reply"""
+        self.partial_replies.pop(request_id, None)
+        self.handle_error(error_message)
+        # A failed request is a reason to re-check now rather than at the next probe
+        self.connection_status.check_connection()
+    
+    def handle_queue_changed(self, outstanding):
+        """Track how many messages are queued or awaiting a reply"""
+        if outstanding:
+            self.progress_bar.show()
+            waiting = outstanding - 1
+            message = "Processing your message..."
+            if waiting:
+                message += f"  |  {waiting} queued (Esc to cancel)"
+            self.status_bar.showMessage(message)
+            return
+        self.typing_indicator.hide_typing()
+        self.progress_bar.setValue(0)
+        self.progress_bar.hide()
+        self.show_ready_status()
+    
+    def handle_socket_state(self, state):
+        """Mirror the channel's state in the connection indicator"""
+        connected = state == "connected"
+        self.connection_status.set_polling(not connected)
+        if connected:
+            self.connection_status.set_status("connected")
+        elif state == "reconnecting":
+            self.connection_status.set_status("disconnected")
+            if self.partial_replies:
+                # Replies still due arrive after the reconnect
+                self.status_bar.showMessage("Connection lost, reconnecting...")
+    
+    def handle_timing(self, timing):
+        """Remember the backend's stage timings for the last reply"""
+        self.last_timing = timing
+    
+    def show_ready_status(self):
+        """Show the ready message with the last request's timing breakdown"""
+        message = "Ready for your next message!"
+        if self.last_timing:
+            stages = ", ".join(
+                f"{name} {ms:.0f}ms" for name, ms in self.last_timing.get("stages", {}).items()
+            )
+            message += f"  |  {self.last_timing.get('total_ms', 0):.0f}ms"
+            if stages:
+                message += f" ({stages})"
+            message += f"  |  trace {self.last_timing.get('trace_id', '-')}"
+            self.last_timing = None
+        self.status_bar.showMessage(message)
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.started:
+            self.started = True
+            self.startup_profile.mark("first paint")
+            # Runs right after this first frame is on screen
+            QTimer.singleShot(0, self.finish_startup)
+    
+    def finish_startup(self):
+        """Connect to the backend and start background work, once the window is up"""
+        self.chat_socket.open()
+        self.connection_status.set_polling(not self.chat_socket.is_connected)
+        self.startup_profile.mark("connect")
+        self.start_archive_indexer()
+        self.startup_profile.mark("archive indexer")
+        # Ready once the event loop gets back to handling input
+        QTimer.singleShot(0, self.startup_profile.finish)
+    
+    def start_archive_indexer(self):
+        """Load the saved-conversation index and bring past sessions into it"""
+        self.index_thread = QThread()
+        self.archive_indexer = ArchiveIndexer(SEARCH_INDEX_PATH)
+        self.archive_indexer.moveToThread(self.index_thread)
+        self.archive_indexer.ready.connect(self.handle_index_ready)
+        self.archive_indexer.progress.connect(self.status_bar.showMessage)
+        self.archive_indexer.finished.connect(self.handle_index_finished)
+        self.index_folder_requested.connect(self.archive_indexer.index_folder)
+        self.index_thread.started.connect(self.archive_indexer.load)
+        self.index_thread.start()
+        # This session is searched through session_index, not its snapshot
+        self.index_folder_requested.emit(SESSIONS_DIR, [self.journal.snapshot_path])
+    
+    def handle_index_ready(self, index):
+        """Saved conversations become searchable"""
+        self.archive_index = index
+    
+    def handle_index_finished(self, changed):
+        """Report a finished indexing run"""
+        if changed:
+            self.status_bar.showMessage(f"Search index updated ({changed} conversations)")
+    
+    def choose_index_folder(self):
+        """Add a folder of saved conversations to the search index"""
+        folder = QFileDialog.getExistingDirectory(self, "Index Conversations Folder")
+        if folder:
+            self.status_bar.showMessage("Indexing conversations...")
+            self.index_folder_requested.emit(folder, [])
+    
+    def toggle_search(self):
+        """Show the search box, or hide it if it's already in use"""
+        if self.search_panel is None:
+            self.search_panel = SearchPanel(self.search_messages)
+            self.search_panel.activated.connect(self.jump_to_message)
+            self.search_panel.hide()
+            layout = self.centralWidget().layout()
+            layout.insertWidget(layout.indexOf(self.chat_view), self.search_panel)
+        if self.search_panel.isVisible() and self.search_panel.input.hasFocus():
+            self.search_panel.hide()
             self.user_input.setFocus()
+        else:
+            self.search_panel.open()
+    
+    def search_messages(self, query, limit=50):
+        """(source, row, label) of messages matching query, this chat first"""
+        hits = []
+        for _, row in self.session_index.search(query, limit):
+            msg = self.conversation_history[row]
+            first_line = msg['message'].split("\n", 1)[0]
+            hits.append(("", row, f"{msg['sender']}: {first_line[:80]}"))
+        if self.archive_index is not None and len(hits) < limit:
+            for source, row in self.archive_index.search(query, limit - len(hits)):
+                hits.append((source, row, f"{os.path.basename(source)} · message {row + 1}"))
+        return hits
+    
+    def jump_to_message(self, source, row):
+        """Scroll to a message, opening its saved conversation first if needed"""
+        if source:
+            self.open_transcript(source, jump_to=row)
+            return
+        if row >= self.transcript_model.rowCount():
+            return
+        self.scroll_timer.stop()
+        self.chat_view.scroll_to_row(row)
+        # Fade the bubble in again so it stands out
+        self.animation_clock.start_fade(row)
+    
+    def archive_session(self):
+        """Keep the current chat as a past session before it's replaced"""
+        # The journal moves what it persisted into a new past session and
+        # starts over, so this window keeps its session id (which is also the
+        # backend's). Messages opened from a file were never persisted.
+        current_snapshot = self.journal.snapshot_path
+        
+        def archived(error):
+            # On the journal's thread; the signal is queued to the indexer
+            if error:
+                self.journal_status.emit(f"Could not keep the previous chat: {error}")
+            else:
+                self.index_folder_requested.emit(SESSIONS_DIR, [current_snapshot])
+        
+        self.journal.archive(uuid.uuid4().hex, archived)
     
     def clear_chat(self):
         """Clear all messages"""
-        # Remove all message widgets
-        for i in reversed(range(self.chat_layout.count())):
-            child = self.chat_layout.itemAt(i).widget()
-            if child:
-                child.deleteLater()
-        
-        self.conversation_history.clear()
+        self.transcript_model.clear()
+        self.journal.clear()
+        self.live_messages = 0
+        self.session_index = SearchIndex()
         self.message_count = 0
         self.session_start = datetime.now()
         self.stats_label.setText("Messages: 0 | Session: 0m")
@@ -1047,23 +2112,17 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         )
         
         if filename:
-            try:
-                conversation_data = {
-                    "metadata": {
-                        "saved_at": datetime.now().isoformat(),
-                        "message_count": len(self.conversation_history),
-                        "session_duration": str(datetime.now() - self.session_start)
-                    },
-                    "messages": self.conversation_history
-                }
-                
-                with open(filename, 'w', encoding='utf-8') as f:
-                    json.dump(conversation_data, f, indent=2, ensure_ascii=False)
-                
-                QMessageBox.information(self, "Save Chat", f"Conversation saved successfully!\n{filename}")
-                self.status_bar.showMessage(f"Saved: {os.path.basename(filename)}")
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to save conversation:\n{str(e)}")
+            # Written by the journal's thread from its copy of the transcript
+            metadata = {
+                "saved_at": datetime.now().isoformat(),
+                "session_duration": str(datetime.now() - self.session_start)
+            }
+            self.status_bar.showMessage(f"Saving {os.path.basename(filename)}...")
+            self.journal.export(
+                filename,
+                lambda f, messages: write_conversation_json(f, messages, metadata),
+                lambda error: self.file_written.emit("Save Chat", filename, error or "")
+            )
     
     def load_conversation(self):
         """Load conversation from file"""
@@ -1072,37 +2131,82 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         )
         
         if filename:
-            try:
-                with open(filename, 'r', encoding='utf-8') as f:
-                    data = json.load(f)
-                
-                # Clear current chat
-                self.clear_chat()
-                
-                # Load messages
-                messages = data.get("messages", data) if "messages" in data else data
-                
-                for msg in messages:
-                    self.add_message(
-                        msg['sender'],
-                        msg['message'],
-                        msg['is_user'],
-                        msg.get('is_error', False)
-                    )
-                
-                metadata = data.get("metadata", {})
-                msg_count = metadata.get("message_count", len(messages))
-                
-                QMessageBox.information(
-                    self, "Load Chat", 
-                    f"Conversation loaded successfully!\n\n"
-                    f"Messages: {msg_count}\n"
-                    f"File: {os.path.basename(filename)}"
-                )
-                self.status_bar.showMessage(f"Loaded: {os.path.basename(filename)}")
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to load conversation:\n{str(e)}")
+            self.open_transcript(filename)
+    
+    def open_transcript(self, filename, jump_to=None):
+        """Replace the chat with a saved conversation, optionally scrolling to one of its messages"""
+        self.pending_jump = jump_to
+        
+        # A live chat being replaced isn't lost: it stays on disk and
+        # searchable as a past session (more than just the greeting, as on exit)
+        if self.live_messages > 1:
+            self.archive_session()
+        self.clear_chat()
+        
+        # Bulk-loaded bubbles just appear
+        self.animation_clock.enabled = False
+        self.load_dialog = QProgressDialog("Loading conversation...", "Cancel", 0, 100, self)
+        self.load_dialog.setWindowTitle("Load Chat")
+        self.load_dialog.setWindowModality(Qt.WindowModal)
+        self.load_dialog.setMinimumDuration(300)
+        
+        self.load_thread = QThread()
+        self.transcript_loader = TranscriptLoader(filename)
+        self.transcript_loader.moveToThread(self.load_thread)
+        self.transcript_loader.batch.connect(self.handle_loaded_batch)
+        self.transcript_loader.progress.connect(self.load_dialog.setValue)
+        self.transcript_loader.finished.connect(self.finish_loading)
+        self.transcript_loader.failed.connect(self.handle_load_error)
+        # Cancel is read from the worker thread between messages
+        self.load_dialog.canceled.connect(self.transcript_loader.cancel, Qt.DirectConnection)
+        self.load_thread.started.connect(self.transcript_loader.run)
+        self.load_thread.start()
+    
+    def handle_loaded_batch(self, entries):
+        """Insert a batch of loaded messages with a single row insertion"""
+        if self.transcript_loader.cancelled:
+            return
+        self.session_index.add_many("", len(self.conversation_history), (msg['message'] for msg in entries))
+        self.transcript_model.append_messages(entries)
+        # Already saved in the file; only Save Chat and Export need them
+        self.journal.append(entries, persist=False)
+        self.message_count += len(entries)
+        self.update_stats()
+    
+    def stop_loading(self):
+        """Tear down the transcript loader and its progress dialog"""
+        self.load_thread.quit()
+        self.load_thread.wait()
+        self.load_dialog.reset()
+        self.animation_clock.enabled = self.settings.get("animations", True)
+        if self.pending_jump is None:
+            self.scroll_to_bottom()
+    
+    def finish_loading(self, count):
+        """Report how a transcript load ended"""
+        self.stop_loading()
+        filename = self.transcript_loader.filename
+        if self.transcript_loader.cancelled:
+            self.status_bar.showMessage(f"Loading cancelled: {os.path.basename(filename)}")
+            return
+        if self.pending_jump is not None:
+            # Loaded messages follow the "Chat cleared!" greeting
+            self.jump_to_message("", self.pending_jump + 1)
+            self.status_bar.showMessage(f"Loaded: {os.path.basename(filename)}")
+            return
+        
+        QMessageBox.information(
+            self, "Load Chat", 
+            f"Conversation loaded successfully!\n\n"
+            f"Messages: {count}\n"
+            f"File: {os.path.basename(filename)}"
+        )
+        self.status_bar.showMessage(f"Loaded: {os.path.basename(filename)}")
+    
+    def handle_load_error(self, error):
+        """Report a transcript that couldn't be loaded"""
+        self.stop_loading()
+        QMessageBox.critical(self, "Error", f"Failed to load conversation:\n{error}")
     
     def export_conversation(self):
         """Export conversation as text"""
@@ -1117,28 +2221,23 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         )
         
         if filename:
-            try:
-                with open(filename, 'w', encoding='utf-8') as f:
-                    f.write("=" * 50 + "\n")
-                    f.write("AI CHATBOT CONVERSATION EXPORT\n")
-                    f.write("=" * 50 + "\n")
-                    f.write(f"Exported: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n")
-                    f.write(f"Messages: {len(self.conversation_history)}\n")
-                    f.write("=" * 50 + "\n\n")
-                    
-                    for msg in self.conversation_history:
-                        timestamp = msg['timestamp']
-                        sender = msg['sender']
-                        message = msg['message']
-                        
-                        f.write(f"[{timestamp}] {sender}:\n")
-                        f.write(f"{message}\n\n")
-                
-                QMessageBox.information(self, "Export Chat", f"Conversation exported successfully!\n{filename}")
-                self.status_bar.showMessage(f"Exported: {os.path.basename(filename)}")
-                
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to export conversation:\n{str(e)}")
+            exported_at = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            self.status_bar.showMessage(f"Exporting {os.path.basename(filename)}...")
+            self.journal.export(
+                filename,
+                lambda f, messages: write_conversation_text(f, messages, exported_at),
+                lambda error: self.file_written.emit("Export Chat", filename, error or "")
+            )
+    
+    def handle_file_written(self, title, filename, error):
+        """Report a finished save or export"""
+        if error:
+            action = "save" if title == "Save Chat" else "export"
+            QMessageBox.critical(self, "Error", f"Failed to {action} conversation:\n{error}")
+            return
+        done = "saved" if title == "Save Chat" else "exported"
+        QMessageBox.information(self, title, f"Conversation {done} successfully!\n{filename}")
+        self.status_bar.showMessage(f"{done.capitalize()}: {os.path.basename(filename)}")
     
     def show_about(self):
         """Show about dialog"""
@@ -1171,12 +2270,19 @@ class UltraEnhancedChatbotGUI(QMainWindow):
         # Save settings
         self.save_settings()
         
-        # Stop worker if running
-        if self.thread and self.thread.isRunning():
-            if self.worker:
-                self.worker.stop()
-            self.thread.quit()
-            self.thread.wait(1000)
+        # Stop the request worker; queued messages are dropped
+        self.request_queue.stop()
+        if self.index_thread is not None:
+            # The indexer checks for interruption between files and while
+            # tokenizing one, so this doesn't take long; waiting with a cap
+            # would destroy the thread mid-save
+            self.index_thread.requestInterruption()
+            self.index_thread.quit()
+            self.index_thread.wait()
+        if self.load_thread is not None and self.load_thread.isRunning():
+            self.transcript_loader.cancel()
+            self.load_thread.quit()
+            self.load_thread.wait(1000)
         
         # Ask to save conversation if enabled
         if (self.settings.get("save_on_exit", True) and 
@@ -1195,10 +2301,21 @@ class UltraEnhancedChatbotGUI(QMainWindow):
                 event.ignore()
                 return
         
+        self.chat_socket.close()
+        self.connection_status.stop()
+        # Flushes the autosave journal, including a save chosen above
+        self.journal.close()
         event.accept()
 
 if __name__ == "__main__":
-    app = QApplication(sys.argv)
+    parser = argparse.ArgumentParser(description="Ultra Enhanced AI Chatbot")
+    parser.add_argument("--startup-profile", action="store_true",
+                        help="Print how long each startup phase took once the window is ready")
+    # Anything else is for Qt (-style, -platform, ...)
+    args, qt_args = parser.parse_known_args()
+    startup_profile = StartupProfile(enabled=args.startup_profile)
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("Ultra Enhanced AI Chatbot")
     app.setOrganizationName("ChatBot Ultra")
     app.setApplicationVersion("2.0")
@@ -1206,7 +2323,10 @@ if __name__ == "__main__":
     # Set high DPI support
     app.setAttribute(Qt.AA_EnableHighDpiScaling, True)
     
-    window = UltraEnhancedChatbotGUI()
+    startup_profile.mark("qapplication")
+    
+    window = UltraEnhancedChatbotGUI(startup_profile)
     window.show()
+    startup_profile.mark("show")
     
     sys.exit(app.exec())
\ No newline at end of file
@@ -0,0 +1,215 @@
+import concurrent.futures
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Protocol (JSON text frames)
+#   client -> server
+#     {"type": "chat", "id": <request id>, "message": "..."}
+#     {"type": "resume", "pending": [<request ids sent but not answered>]}
+#     {"type": "ping", "sent": <client clock, echoed back>}
+#   server -> client
+#     {"type": "hello", "session_id": ..., "heartbeat_interval": seconds}
+#     {"type": "token", "id": ..., "text": "..."}       streamed model output
+#     {"type": "reply", "id": ..., "status": 200, ...}  the /chat JSON body
+#                                                       (503 when too many are queued)
+#     {"type": "unknown", "id": ...}                    never received, resend it
+#     {"type": "heartbeat", "ts": ..., "state": {...}}  when idle, with server load
+#     {"type": "pong", "ts": ..., "sent": ...}
+
+
+class _Session:
+    # Per-session delivery state that outlives any single connection
+    def __init__(self):
+        self.connection = None
+        self.in_progress = set()
+        self.replies = OrderedDict()  # request id -> reply frame, newest last
+        self.last_seen = time.monotonic()
+
+    def idle(self):
+        return self.connection is None and not self.in_progress
+
+
+class ChannelHub:
+    # Runs chat requests that arrive over WebSocket connections and routes the
+    # results to whichever connection the session has *now*. A client that
+    # reconnects and resumes still gets replies that finished while it was away.
+    # Sessions nobody has resumed within session_ttl are dropped, as are the
+    # least recently used idle ones past max_sessions. Chats run on a fixed
+    # pool of chat_workers threads; past max_pending queued or running chats,
+    # new ones are refused with a 503 reply.
+    def __init__(self, dispatch, server_state=None, heartbeat_interval=15.0, replies_kept=100,
+                 session_ttl=600.0, max_sessions=10000, chat_workers=16, max_pending=256):
+        self.dispatch = dispatch
+        self.server_state = server_state or (lambda: {})
+        self.heartbeat_interval = heartbeat_interval
+        self.replies_kept = replies_kept
+        self.session_ttl = session_ttl
+        self.max_sessions = max_sessions
+        self.max_pending = max_pending
+        self.executor = concurrent.futures.ThreadPoolExecutor(max_workers=chat_workers, thread_name_prefix="ws-chat")
+        self.pending = 0
+        self.sessions = OrderedDict()  # session id -> _Session, least recently used first
+        self.lock = threading.Lock()
+        self.counters = {"connections": 0, "open": 0, "messages": 0, "resumed_replies": 0,
+                         "rejected": 0, "evicted_sessions": 0}
+
+    def _touch(self, session_id, session):
+        # Caller holds the lock; keeps self.sessions ordered by last_seen
+        session.last_seen = time.monotonic()
+        if session_id in self.sessions:
+            self.sessions.move_to_end(session_id)
+
+    def _evict(self):
+        # Caller holds the lock. Walks sessions oldest first and stops at the
+        # first idle one that is neither expired nor over the cap; sessions with
+        # a connection or a running chat are never dropped.
+        expired = time.monotonic() - self.session_ttl
+        over = len(self.sessions) - self.max_sessions + 1
+        evicted = []
+        for session_id, session in self.sessions.items():
+            if not session.idle():
+                continue
+            if session.last_seen >= expired and over <= 0:
+                break
+            evicted.append(session_id)
+            over -= 1
+        for session_id in evicted:
+            del self.sessions[session_id]
+        self.counters["evicted_sessions"] += len(evicted)
+
+    def serve(self, ws, session_id=None, remote_addr=None):
+        # Handle one connection until the client goes away
+        session_id = session_id or uuid.uuid4().hex
+        connection = _Connection(ws, remote_addr)
+        with self.lock:
+            self._evict()
+            session = self.sessions.get(session_id)
+            if session is None:
+                session = self.sessions[session_id] = _Session()
+            session.connection = connection
+            self._touch(session_id, session)
+            self.counters["connections"] += 1
+            self.counters["open"] += 1
+
+        connection.send({"type": "hello", "session_id": session_id, "heartbeat_interval": self.heartbeat_interval})
+        try:
+            while True:
+                raw = ws.receive(timeout=self.heartbeat_interval)
+                if raw is None:
+                    connection.send({"type": "heartbeat", "ts": time.time(), "state": self.server_state()})
+                    continue
+                try:
+                    frame = json.loads(raw)
+                except ValueError:
+                    continue
+                self._handle(frame, session_id, session, connection)
+        except Exception as e:
+            # ConnectionClosed and friends; the session stays around for resume
+            logger.info("WebSocket for session %s closed: %s", session_id, e)
+        finally:
+            with self.lock:
+                if session.connection is connection:
+                    session.connection = None
+                self._touch(session_id, session)
+                self.counters["open"] -= 1
+
+    def _handle(self, frame, session_id, session, connection):
+        kind = frame.get("type")
+        if kind == "ping":
+            connection.send({"type": "pong", "ts": time.time(), "sent": frame.get("sent")})
+        elif kind == "chat" and frame.get("id"):
+            with self.lock:
+                self.counters["messages"] += 1
+                accepted = self.pending < self.max_pending
+                if accepted:
+                    self.pending += 1
+                    session.in_progress.add(frame["id"])
+                else:
+                    self.counters["rejected"] += 1
+            if not accepted:
+                connection.send({
+                    "type": "reply", "id": frame["id"], "status": 503, "retry_after": 1,
+                    "reply": "The server is busy right now. Please try again in a moment.",
+                    "error": "Too many pending requests",
+                })
+                return
+            self.executor.submit(self._run_chat, frame["id"], frame.get("message", ""), session_id, session,
+                                 connection.remote_addr)
+        elif kind == "resume":
+            for request_id in frame.get("pending", []):
+                with self.lock:
+                    reply = session.replies.get(request_id)
+                    running = request_id in session.in_progress
+                if reply is not None:
+                    with self.lock:
+                        self.counters["resumed_replies"] += 1
+                    connection.send(reply)
+                elif not running:
+                    connection.send({"type": "unknown", "id": request_id})
+                # Still running: the reply goes to this connection when it's done
+
+    def _deliver(self, session, frame):
+        with self.lock:
+            connection = session.connection
+        if connection is not None:
+            connection.send(frame)
+
+    def _run_chat(self, request_id, message, session_id, session, remote_addr):
+        def on_token(text):
+            self._deliver(session, {"type": "token", "id": request_id, "text": text})
+
+        try:
+            status, body = self.dispatch(message, session_id, on_token, remote_addr)
+        except Exception as e:
+            logger.error("WebSocket chat dispatch failed: %s", e, exc_info=True)
+            status, body = 500, {"reply": "I apologize, but I'm having trouble processing your message. Please try again.", "error": str(e)}
+
+        frame = {"type": "reply", "id": request_id, "status": status, **body}
+        with self.lock:
+            self.pending -= 1
+            session.in_progress.discard(request_id)
+            self._touch(session_id, session)
+            session.replies[request_id] = frame
+            while len(session.replies) > self.replies_kept:
+                session.replies.popitem(last=False)
+        self._deliver(session, frame)
+
+    def stats(self):
+        with self.lock:
+            return {**self.counters, "sessions": len(self.sessions), "pending": self.pending}
+
+
+class _Connection:
+    # Serializes sends; chat threads and the receive loop share one socket
+    def __init__(self, ws, remote_addr=None):
+        self.ws = ws
+        self.remote_addr = remote_addr
+        self.lock = threading.Lock()
+
+    def send(self, frame):
+        try:
+            with self.lock:
+                self.ws.send(json.dumps(frame))
+        except Exception as e:
+            logger.debug("Dropping WebSocket frame: %s", e)
+
+
+def create_channel_hub(dispatch, server_state=None):
+    # Build the hub from environment settings
+    return ChannelHub(
+        dispatch,
+        server_state=server_state,
+        heartbeat_interval=float(os.getenv("WS_HEARTBEAT_SECONDS", "15")),
+        replies_kept=int(os.getenv("WS_REPLIES_KEPT", "100")),
+        session_ttl=float(os.getenv("WS_SESSION_TTL_SECONDS", "600")),
+        max_sessions=int(os.getenv("WS_MAX_SESSIONS", "10000")),
+        chat_workers=int(os.getenv("WS_CHAT_WORKERS", "16")),
+        max_pending=int(os.getenv("WS_MAX_PENDING", "256")),
+    )